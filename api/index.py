@@ -13,9 +13,15 @@ parent_dir = os.path.dirname(current_dir)
 sys.path.insert(0, parent_dir)
 
 try:
-    from flask import Flask, request, jsonify, send_from_directory
+    from flask import Flask, request, jsonify
     from flask_cors import CORS
-    import requests
+    from src.utils.static_assets import StaticAssets
+    from src.utils.http_cache import conditional_json
+    from src.utils.circuit_breaker import breakers
+    from src.utils.strategy_ranking import ranking, run_strategy
+    
+    # requests é importado dentro das funções que fazem HTTP: /api/health, /api/test e os
+    # arquivos estáticos respondem sem pagar o custo do import no cold start da função
     
     # Criar aplicação Flask
     app = Flask(__name__)
@@ -24,10 +30,19 @@ try:
     # Configurar CORS
     CORS(app)
     
+    # URL base do YouTube (pode ser apontada para um servidor local em benchmarks offline)
+    YOUTUBE_BASE_URL = os.environ.get('YOUTUBE_BASE_URL', 'https://www.youtube.com').rstrip('/')
+    
     # Regex para validar URLs do YouTube
     YOUTUBE_URL_PATTERN = re.compile(
         r'^(https?://)?(www\.)?(youtube\.com/watch\?v=|youtu\.be/|youtube\.com/shorts/|youtube\.com/embed/)([a-zA-Z0-9_-]{11})'
     )
+    VIDEO_ID_PATTERN = re.compile(r'^[a-zA-Z0-9_-]{11}$')
+    
+    # Cache HTTP de GET /api/info/<id> (s): respostas completas, degradadas e janela de revalidação
+    INFO_MAX_AGE = int(os.environ.get('INFO_MAX_AGE', 300))
+    INFO_DEGRADED_MAX_AGE = int(os.environ.get('INFO_DEGRADED_MAX_AGE', 60))
+    INFO_STALE_WHILE_REVALIDATE = int(os.environ.get('INFO_STALE_WHILE_REVALIDATE', 600))
     
     def get_random_headers():
         """Gera headers aleatórios para simular diferentes navegadores"""
@@ -103,159 +118,198 @@ try:
         else:
             return str(number)
     
+    def parse_video_info_html(html, video_id):
+        """Extrai título, descrição, canal, visualizações e duração do HTML da página do vídeo"""
+        # Extrair título
+        title = f'Vídeo YouTube (ID: {video_id})'
+        title_match = re.search(r'<title>([^<]+)</title>', html)
+        if title_match:
+            title = title_match.group(1).replace(' - YouTube', '').strip()
+        
+        # Extrair descrição
+        description = 'Descrição não disponível'
+        desc_patterns = [
+            r'"description":"([^"]+)"',
+            r'"shortDescription":"([^"]+)"',
+            r'<meta name="description" content="([^"]+)"',
+        ]
+        
+        for pattern in desc_patterns:
+            desc_match = re.search(pattern, html)
+            if desc_match:
+                description = desc_match.group(1)[:200] + '...'
+                break
+        
+        # Extrair canal
+        uploader = 'Canal não identificado'
+        channel_patterns = [
+            r'"ownerText":\{"runs":\[\{"text":"([^"]+)"',
+            r'"channelName":"([^"]+)"',
+            r'"author":"([^"]+)"',
+            r'<link rel="canonical" href="https://www\.youtube\.com/channel/[^"]+">([^<]+)</link>',
+        ]
+        
+        for pattern in channel_patterns:
+            channel_match = re.search(pattern, html)
+            if channel_match:
+                uploader = channel_match.group(1)
+                break
+        
+        # Extrair visualizações
+        view_count = 'N/A'
+        view_patterns = [
+            r'"viewCount":"(\d+)"',
+            r'"view_count":"(\d+)"',
+            r'(\d+(?:,\d+)*)\s*visualizações',
+            r'(\d+(?:,\d+)*)\s*views',
+        ]
+        
+        for pattern in view_patterns:
+            view_match = re.search(pattern, html)
+            if view_match:
+                view_count = format_number(int(view_match.group(1).replace(',', '')))
+                break
+        
+        # Extrair duração
+        duration = 'N/A'
+        duration_patterns = [
+            r'"lengthSeconds":"(\d+)"',
+            r'"duration":"PT(\d+)S"',
+            r'(\d+):(\d+):(\d+)',
+            r'(\d+):(\d+)',
+        ]
+        
+        for pattern in duration_patterns:
+            duration_match = re.search(pattern, html)
+            if duration_match:
+                if len(duration_match.groups()) > 1:
+                    # Formato HH:MM:SS ou MM:SS
+                    parts = duration_match.groups()
+                    if len(parts) == 3:
+                        hours, minutes, seconds = map(int, parts)
+                        duration = format_duration(hours * 3600 + minutes * 60 + seconds)
+                    elif len(parts) == 2:
+                        minutes, seconds = map(int, parts)
+                        duration = format_duration(minutes * 60 + seconds)
+                else:
+                    # Formato em segundos
+                    duration = format_duration(int(duration_match.group(1)))
+                break
+        
+        return {
+            'title': title,
+            'description': description,
+            'uploader': uploader,
+            'view_count': view_count,
+            'duration': duration,
+            'thumbnail': f'https://img.youtube.com/vi/{video_id}/maxresdefault.jpg',
+        }
+    
+    def is_upstream_status(status_code):
+        """Status de bloqueio ou falha do YouTube (e não de vídeo inexistente ou privado)"""
+        return status_code in (403, 429) or status_code >= 500
+    
+    def fetch_watch_page(video_id):
+        """
+        Baixa e interpreta a página do vídeo. None se o vídeo não existe (404, removido);
+        bloqueios (403/429/5xx) e erros de rede viram exceção
+        """
+        import requests
+        
+        url = f"{YOUTUBE_BASE_URL}/watch?v={video_id}"
+        headers = get_random_headers()
+        
+        response = requests.get(url, headers=headers, timeout=10)
+        if is_upstream_status(response.status_code):
+            raise requests.HTTPError(f'HTTP {response.status_code} na página do vídeo', response=response)
+        if response.status_code != 200:
+            return None
+        
+        return parse_video_info_html(response.text, video_id)
+    
     def get_video_info_from_html(video_id):
         """Extrai informações do vídeo via web scraping"""
         try:
-            url = f"https://www.youtube.com/watch?v={video_id}"
-            headers = get_random_headers()
-            
-            response = requests.get(url, headers=headers, timeout=10)
-            if response.status_code != 200:
-                return None
-                
-            html = response.text
-            
-            # Extrair título
-            title = f'Vídeo YouTube (ID: {video_id})'
-            title_match = re.search(r'<title>([^<]+)</title>', html)
-            if title_match:
-                title = title_match.group(1).replace(' - YouTube', '').strip()
-            
-            # Extrair descrição
-            description = 'Descrição não disponível'
-            desc_patterns = [
-                r'"description":"([^"]+)"',
-                r'"shortDescription":"([^"]+)"',
-                r'<meta name="description" content="([^"]+)"',
-            ]
-            
-            for pattern in desc_patterns:
-                desc_match = re.search(pattern, html)
-                if desc_match:
-                    description = desc_match.group(1)[:200] + '...'
-                    break
-            
-            # Extrair canal
-            uploader = 'Canal não identificado'
-            channel_patterns = [
-                r'"ownerText":\{"runs":\[\{"text":"([^"]+)"',
-                r'"channelName":"([^"]+)"',
-                r'"author":"([^"]+)"',
-                r'<link rel="canonical" href="https://www\.youtube\.com/channel/[^"]+">([^<]+)</link>',
-            ]
-            
-            for pattern in channel_patterns:
-                channel_match = re.search(pattern, html)
-                if channel_match:
-                    uploader = channel_match.group(1)
-                    break
-            
-            # Extrair visualizações
-            view_count = 'N/A'
-            view_patterns = [
-                r'"viewCount":"(\d+)"',
-                r'"view_count":"(\d+)"',
-                r'(\d+(?:,\d+)*)\s*visualizações',
-                r'(\d+(?:,\d+)*)\s*views',
-            ]
-            
-            for pattern in view_patterns:
-                view_match = re.search(pattern, html)
-                if view_match:
-                    view_count = format_number(int(view_match.group(1).replace(',', '')))
-                    break
-            
-            # Extrair duração
-            duration = 'N/A'
-            duration_patterns = [
-                r'"lengthSeconds":"(\d+)"',
-                r'"duration":"PT(\d+)S"',
-                r'(\d+):(\d+):(\d+)',
-                r'(\d+):(\d+)',
-            ]
-            
-            for pattern in duration_patterns:
-                duration_match = re.search(pattern, html)
-                if duration_match:
-                    if ':' in duration_match.group(0):
-                        # Formato HH:MM:SS ou MM:SS
-                        parts = duration_match.group(0).split(':')
-                        if len(parts) == 3:
-                            hours, minutes, seconds = map(int, parts)
-                            duration = format_duration(hours * 3600 + minutes * 60 + seconds)
-                        elif len(parts) == 2:
-                            minutes, seconds = map(int, parts)
-                            duration = format_duration(minutes * 60 + seconds)
-                    else:
-                        # Formato em segundos
-                        duration = format_duration(int(duration_match.group(1)))
-                    break
-            
-            return {
-                'title': title,
-                'description': description,
-                'uploader': uploader,
-                'view_count': view_count,
-                'duration': duration,
-                'thumbnail': f'https://img.youtube.com/vi/{video_id}/maxresdefault.jpg',
-            }
-            
+            return fetch_watch_page(video_id)
         except Exception as e:
             print(f"Erro no web scraping: {e}")
             return None
     
+    def info_from_oembed(video_id):
+        """Estratégia oEmbed: só título e thumbnail (None se o YouTube não respondeu 200)"""
+        import requests
+        
+        api_url = f"{YOUTUBE_BASE_URL}/oembed?url=https://www.youtube.com/watch?v={video_id}&format=json"
+        headers = get_random_headers()
+        response = run_strategy(
+            'oembed',
+            lambda: requests.get(api_url, headers=headers, timeout=10),
+            is_failure=lambda r: is_upstream_status(r.status_code),
+        )
+        if response.status_code != 200:
+            return None
+        
+        data = response.json()
+        return {
+            'success': True,
+            'video_id': video_id,
+            'title': data.get('title', f'Vídeo YouTube (ID: {video_id})'),
+            'description': 'Informações não disponíveis devido a restrições do YouTube.',
+            'duration': 'N/A',
+            'uploader': 'Canal não identificado',
+            'view_count': 'N/A',
+            'upload_date': 'Data não disponível',
+            'thumbnail': data.get('thumbnail_url', f'https://img.youtube.com/vi/{video_id}/maxresdefault.jpg'),
+            'youtube_url': f'https://www.youtube.com/watch?v={video_id}',
+            'direct_link': f'https://www.youtube.com/watch?v={video_id}',
+            'warning': 'Informações limitadas - YouTube bloqueou acesso detalhado',
+            'formats': []
+        }
+    
+    def info_from_watch_page(video_id):
+        """
+        Estratégia de web scraping da página do vídeo (None se o vídeo não existe). Só bloqueios
+        e erros de rede contam como falha no circuito; um vídeo removido ou privado, não
+        """
+        scraped_data = run_strategy('watch_page', lambda: fetch_watch_page(video_id))
+        if not scraped_data:
+            return None
+        
+        return {
+            'success': True,
+            'video_id': video_id,
+            'title': scraped_data['title'],
+            'description': scraped_data['description'],
+            'duration': scraped_data['duration'],
+            'uploader': scraped_data['uploader'],
+            'view_count': scraped_data['view_count'],
+            'upload_date': 'Data não disponível',
+            'thumbnail': scraped_data['thumbnail'],
+            'youtube_url': f'https://www.youtube.com/watch?v={video_id}',
+            'direct_link': f'https://www.youtube.com/watch?v={video_id}',
+            'formats': []
+        }
+    
+    # Estratégias na ordem padrão; cada requisição as tenta na ordem do ranking (sucesso e
+    # latência observados), e circuitos abertos são pulados na hora
+    INFO_STRATEGIES = {
+        'oembed': info_from_oembed,
+        'watch_page': info_from_watch_page,
+    }
+    
     def get_video_info_with_fallback(url):
         """Obtém informações do vídeo com múltiplas estratégias de fallback"""
         video_id = extract_video_id(url)
         if not video_id:
             raise Exception('URL do YouTube inválida')
         
-        # Estratégia 1: API não oficial do YouTube
-        try:
-            api_url = f"https://www.youtube.com/oembed?url=https://www.youtube.com/watch?v={video_id}&format=json"
-            headers = get_random_headers()
-            response = requests.get(api_url, headers=headers, timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                return {
-                    'success': True,
-                    'video_id': video_id,
-                    'title': data.get('title', f'Vídeo YouTube (ID: {video_id})'),
-                    'description': 'Informações não disponíveis devido a restrições do YouTube.',
-                    'duration': 'N/A',
-                    'uploader': 'Canal não identificado',
-                    'view_count': 'N/A',
-                    'upload_date': 'Data não disponível',
-                    'thumbnail': data.get('thumbnail_url', f'https://img.youtube.com/vi/{video_id}/maxresdefault.jpg'),
-                    'youtube_url': f'https://www.youtube.com/watch?v={video_id}',
-                    'direct_link': f'https://www.youtube.com/watch?v={video_id}',
-                    'warning': 'Informações limitadas - YouTube bloqueou acesso detalhado',
-                    'formats': []
-                }
-        except Exception as e:
-            print(f"Erro no fallback API: {e}")
-        
-        # Estratégia 2: Web scraping
-        try:
-            scraped_data = get_video_info_from_html(video_id)
-            if scraped_data:
-                return {
-                    'success': True,
-                    'video_id': video_id,
-                    'title': scraped_data['title'],
-                    'description': scraped_data['description'],
-                    'duration': scraped_data['duration'],
-                    'uploader': scraped_data['uploader'],
-                    'view_count': scraped_data['view_count'],
-                    'upload_date': 'Data não disponível',
-                    'thumbnail': scraped_data['thumbnail'],
-                    'youtube_url': f'https://www.youtube.com/watch?v={video_id}',
-                    'direct_link': f'https://www.youtube.com/watch?v={video_id}',
-                    'formats': []
-                }
-        except Exception as e:
-            print(f"Erro no web scraping: {e}")
+        for name in ranking.order(list(INFO_STRATEGIES)):
+            try:
+                video_info = INFO_STRATEGIES[name](video_id)
+                if video_info:
+                    return video_info
+            except Exception as e:
+                print(f"Erro na estratégia {name}: {e}")
         
         # Fallback final: informações mínimas
         return {
@@ -297,6 +351,23 @@ try:
             print(f"Erro ao obter informações do vídeo: {e}")
             return jsonify({'error': 'Erro interno do servidor.'}), 500
 
+    @app.route('/api/info/<video_id>', methods=['GET'])
+    def get_video_info_cacheable(video_id):
+        """Cacheable variant of /api/info for browsers and edge caches (ETag + 304)"""
+        if not VIDEO_ID_PATTERN.match(video_id):
+            return jsonify({'error': 'ID de vídeo inválido.'}), 400
+
+        try:
+            video_info = get_video_info_with_fallback(f'https://www.youtube.com/watch?v={video_id}')
+            # Respostas degradadas (oEmbed/mínimas) ficam pouco tempo em cache para que a
+            # próxima revalidação tente de novo as informações completas
+            max_age = INFO_DEGRADED_MAX_AGE if video_info.get('warning') else INFO_MAX_AGE
+            return conditional_json(video_info, max_age, INFO_STALE_WHILE_REVALIDATE)
+
+        except Exception as e:
+            print(f"Erro ao obter informações do vídeo: {e}")
+            return jsonify({'error': 'Erro interno do servidor.'}), 500
+
     @app.route('/api/download', methods=['POST'])
     def download_video():
         """Download video optimized for serverless environments"""
@@ -342,6 +413,16 @@ try:
             'version': '1.0.0'
         }), 200
 
+    @app.route('/api/breakers', methods=['GET'])
+    def breaker_status():
+        """Circuit breaker state of each upstream strategy, for monitoring"""
+        return jsonify(breakers.snapshot()), 200
+
+    @app.route('/api/strategies', methods=['GET'])
+    def strategy_stats():
+        """Rolling success rate and latency of each info strategy, used to order the fallback chain"""
+        return jsonify(ranking.snapshot()), 200
+
     @app.route('/api/test', methods=['GET'])
     def test_api():
         """Endpoint de teste para verificar se a API está funcionando"""
@@ -354,36 +435,14 @@ try:
                 'info': '/api/info (POST) - Obter informações do vídeo',
                 'download': '/api/download (POST) - Download de vídeo',
                 'health': '/api/health (GET) - Health check',
+                'breakers': '/api/breakers (GET) - Estado dos circuit breakers',
+                'strategies': '/api/strategies (GET) - Histórico de sucesso e latência das estratégias',
                 'test': '/api/test (GET) - Testar API'
             }
         })
     
-    @app.route('/', defaults={'path': ''})
-    @app.route('/<path:path>')
-    def serve(path):
-        # Se for uma rota da API, retorna JSON
-        if path.startswith('api/'):
-            return jsonify({
-                'message': 'YouTube Downloader API is running!',
-                'version': '2.1.0',
-                'status': 'online',
-                'endpoints': ['/api/info', '/api/download', '/api/health', '/api/test']
-            })
-        
-        # Para outras rotas, serve o arquivo estático
-        static_folder = os.path.join(parent_dir, 'static')
-        
-        # Se o arquivo existe na pasta static, serve ele
-        if path and os.path.exists(os.path.join(static_folder, path)):
-            return send_from_directory(static_folder, path)
-        
-        # Senão, serve o index.html
-        index_path = os.path.join(static_folder, 'index.html')
-        if os.path.exists(index_path):
-            return send_from_directory(static_folder, 'index.html')
-        
-        # Fallback: retorna a aplicação básica
-        return """
+    # Página mínima servida quando o deploy não inclui static/index.html
+    FALLBACK_INDEX_HTML = """
         <!DOCTYPE html>
         <html lang="pt-BR">
         <head>
@@ -549,7 +608,29 @@ try:
             </script>
         </body>
         </html>
-        """
+    """
+
+    # Manifesto dos arquivos estáticos, montado uma vez por instância (cold start)
+    static_assets = StaticAssets(os.path.join(parent_dir, 'static'))
+    static_assets.register_default('index.html', FALLBACK_INDEX_HTML)
+
+    @app.route('/', defaults={'path': ''})
+    @app.route('/<path:path>')
+    def serve(path):
+        # Se for uma rota da API, retorna JSON
+        if path.startswith('api/'):
+            return jsonify({
+                'message': 'YouTube Downloader API is running!',
+                'version': '2.1.0',
+                'status': 'online',
+                'endpoints': ['/api/info', '/api/download', '/api/health', '/api/test']
+            })
+        
+        # Para outras rotas, serve o arquivo estático (ou o index.html, para a SPA)
+        response = static_assets.serve(path, request)
+        if response is None:
+            return jsonify({'error': 'Arquivo não encontrado'}), 404
+        return response
 
 except ImportError as e:
     # Fallback se houver problemas com imports
@@ -0,0 +1,126 @@
+# benchmarks/bench_cache.py
+
+"""
+Taxa de acerto do cache de metadados em função do número de workers, por backend.
+
+Cada worker é um processo separado (como no gunicorn) que atende um fluxo de requisições
+com popularidade Zipf sobre um catálogo de vídeos. Em um miss, o worker "extrai" o vídeo
+(espera --extract-ms e grava um info_dict realista no cache). Com L1 apenas, cada worker
+aquece o próprio cache e a taxa de acerto cai conforme a frota cresce; com L2 compartilhado
+(SQLite ou o stand-in Redis) os workers aproveitam as extrações uns dos outros.
+
+Uso:
+  python -m benchmarks.bench_cache --workers 1,2,4,8 --backends memory,sqlite,redis
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+
+from .common import print_table, append_history
+from .fixtures import make_info_dict
+from .stand_in_redis import StandInRedis
+
+
+def zipf_stream(rng: random.Random, catalog: int, count: int, exponent: float):
+    """IDs de vídeo com popularidade Zipf (o vídeo de rank k tem peso 1/k^s)"""
+    weights = [1.0 / (rank ** exponent) for rank in range(1, catalog + 1)]
+    ranks = rng.choices(range(catalog), weights=weights, k=count)
+    return [f'vid{rank:08d}' for rank in ranks]
+
+
+def worker(worker_id, url, requests, catalog, exponent, extract_ms, l1_entries, results):
+    from src.utils.cache_backends import cache_from_url
+    from src.utils.metadata_cache import MetadataCache
+
+    cache = MetadataCache(ttl=3600, cache=cache_from_url(url, l1_entries=l1_entries))
+    rng = random.Random(1000 + worker_id)
+    extractions = 0
+    latencies = []
+
+    for video_id in zipf_stream(rng, catalog, requests, exponent):
+        started = time.perf_counter()
+        if cache.get(video_id) is None:
+            time.sleep(extract_ms / 1000.0)
+            cache.set(video_id, make_info_dict(video_id[:11].ljust(11, '_')))
+            extractions += 1
+        latencies.append(time.perf_counter() - started)
+
+    stats = cache.stats()
+    stats.update({'extractions': extractions, 'latency_s': sum(latencies)})
+    results.put(stats)
+
+
+def run(url, workers, requests, catalog, exponent, extract_ms, l1_entries):
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=worker, args=(i, url, requests, catalog, exponent, extract_ms, l1_entries, results))
+        for i in range(workers)
+    ]
+    started = time.perf_counter()
+    for process in processes:
+        process.start()
+    stats = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - started
+
+    total = workers * requests
+    l1_hits = sum(s['l1_hits'] for s in stats)
+    l2_hits = sum(s['l2_hits'] for s in stats)
+    extractions = sum(s['extractions'] for s in stats)
+    return {
+        'workers': workers,
+        'requests': total,
+        'hit_rate': f'{(l1_hits + l2_hits) / total:.1%}',
+        'l1_hits': l1_hits,
+        'l2_hits': l2_hits,
+        'extractions': extractions,
+        'avg_ms': round(sum(s['latency_s'] for s in stats) / total * 1000, 2),
+        'elapsed_s': round(elapsed, 2),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Taxa de acerto do cache de metadados por número de workers')
+    parser.add_argument('--workers', default='1,2,4,8', help='tamanhos de frota separados por vírgula')
+    parser.add_argument('--backends', default='memory,sqlite,redis', help='backends L2 a comparar')
+    parser.add_argument('--requests', type=int, default=400, help='requisições por worker')
+    parser.add_argument('--catalog', type=int, default=500, help='vídeos distintos no catálogo')
+    parser.add_argument('--zipf', type=float, default=1.0, help='expoente da distribuição de popularidade')
+    parser.add_argument('--extract-ms', type=float, default=20.0, help='custo simulado de uma extração (ms)')
+    parser.add_argument('--l1-entries', type=int, default=64, help='entradas no L1 de cada worker')
+    parser.add_argument('--history', default=None, help='arquivo JSONL onde registrar o resultado')
+    args = parser.parse_args(argv)
+
+    rows = []
+    with tempfile.TemporaryDirectory(prefix='bench_cache_') as tmp, StandInRedis() as redis:
+        for backend in args.backends.split(','):
+            for workers in [int(w) for w in args.workers.split(',')]:
+                if backend == 'memory':
+                    url = 'memory://'
+                elif backend == 'sqlite':
+                    url = f'sqlite:///{os.path.join(tmp, f"cache_{workers}.db")}'
+                elif backend == 'redis':
+                    url = redis.url
+                    redis.flush()
+                else:
+                    raise SystemExit(f'Backend desconhecido: {backend}')
+
+                result = run(url, workers, args.requests, args.catalog, args.zipf, args.extract_ms, args.l1_entries)
+                result['backend'] = backend
+                rows.append(result)
+                print(f"{backend} workers={workers}: hit_rate={result['hit_rate']} extrações={result['extractions']}")
+
+    print()
+    print_table(rows, ['backend', 'workers', 'requests', 'hit_rate', 'l1_hits', 'l2_hits', 'extractions', 'avg_ms', 'elapsed_s'])
+
+    if args.history:
+        append_history(args.history, 'cache', rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+# benchmarks/bench_coldstart.py
+
+"""
+Custo de cold start de cada entry point, medido em subprocessos novos.
+
+Para cada entry point e cada execução, um interpretador limpo importa o módulo e responde
+à primeira requisição de health check pelo test client do Flask. São medidos:
+
+  import_ms          - tempo de import do entry point (subárvore do -X importtime)
+  first_response_ms  - do início do processo até a resposta do health check
+  rss_import_mb      - pico de RSS logo após o import
+  rss_response_mb    - pico de RSS após a primeira resposta
+
+Os valores (mediana das execuções) são comparados com benchmarks/baselines/coldstart.json
+e o processo sai com código 1 se algum ficar mais de --threshold acima do baseline.
+
+Uso:
+  python -m benchmarks.bench_coldstart --runs 10
+  python -m benchmarks.bench_coldstart --save-baseline
+  python -m benchmarks.bench_coldstart --history benchmarks/results/coldstart.jsonl
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, Any, List
+
+from .common import ROOT_DIR, print_table, append_history
+from .import_profile import IMPORTTIME_LINE, entry_subtree, parse_importtime
+
+BASELINE_PATH = os.path.join(ROOT_DIR, 'benchmarks', 'baselines', 'coldstart.json')
+
+# Entry point -> rota de health check
+ENTRY_POINTS = {
+    'api.index': '/api/health',
+    'main_serverless': '/api/health',
+    'main': '/api/health',
+}
+
+METRICS = ['import_ms', 'first_response_ms', 'rss_import_mb', 'rss_response_mb']
+
+# Executado no subprocesso: importa o entry point e faz a primeira requisição
+CHILD_SCRIPT = '''
+import json, resource, sys, time
+started = time.perf_counter()
+import {module} as entry
+imported = time.perf_counter()
+rss_import = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+response = entry.app.test_client().get({path!r})
+answered = time.perf_counter()
+rss_response = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+print('COLDSTART ' + json.dumps({{
+    'status': response.status_code,
+    'import_wall_ms': (imported - started) * 1000,
+    'response_ms': (answered - imported) * 1000,
+    'rss_import_mb': rss_import / scale,
+    'rss_response_mb': rss_response / scale,
+}}), flush=True)
+'''
+
+
+def measure_once(module: str, path: str) -> Dict[str, Any]:
+    """Um cold start completo em um subprocesso novo"""
+    env = os.environ.copy()
+    env.pop('ENABLE_DATABASE', None)
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, '-X', 'importtime', '-c', CHILD_SCRIPT.format(module=module, path=path)],
+        cwd=ROOT_DIR, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+    )
+
+    # A primeira resposta é contada quando o filho a reporta, não quando ele termina
+    # (threads de fundo e atexit ficam fora da medida)
+    result = None
+    for line in proc.stdout:
+        if line.startswith('COLDSTART '):
+            result = json.loads(line[len('COLDSTART '):])
+            result['first_response_ms'] = (time.perf_counter() - started) * 1000
+            break
+    proc.stdout.close()
+    stderr = proc.stderr.read()
+    proc.wait()
+
+    if result is None:
+        messages = [l for l in stderr.strip().splitlines() if not IMPORTTIME_LINE.match(l)]
+        raise RuntimeError(f"{module} falhou: {(messages or ['sem saída'])[-1]}")
+    if result['status'] != 200:
+        raise RuntimeError(f"{module}: {path} retornou {result['status']}")
+
+    subtree = entry_subtree(parse_importtime(stderr), module)
+    result['import_ms'] = subtree[0]['cumulative_us'] / 1000 if subtree else result['import_wall_ms']
+    result['modules'] = len(subtree)
+    return result
+
+
+def measure(module: str, path: str, runs: int) -> Dict[str, Any]:
+    samples = [measure_once(module, path) for _ in range(runs)]
+    row = {'entry': module, 'runs': runs, 'modules': samples[-1]['modules']}
+    for metric in METRICS:
+        values = [s[metric] for s in samples]
+        row[metric] = round(statistics.median(values), 1)
+        row[f'{metric}_min'] = round(min(values), 1)
+    return row
+
+
+def load_baselines(path: str) -> Dict[str, Any]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f).get('entry_points', {})
+
+
+def save_baselines(path: str, rows: List[Dict[str, Any]]):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'note': 'Medianas de cold start por entry point; regenere com --save-baseline na máquina que roda o gate.',
+            'entry_points': {row['entry']: {metric: row[metric] for metric in METRICS} for row in rows},
+        }, f, indent=2, ensure_ascii=False)
+        f.write('\n')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark de cold start dos entry points')
+    parser.add_argument('--entry', default=','.join(ENTRY_POINTS), help='entry points separados por vírgula')
+    parser.add_argument('--runs', type=int, default=7, help='cold starts por entry point')
+    parser.add_argument('--threshold', type=float, default=0.25, help='regressão máxima tolerada (0.25 = 25%%)')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='arquivo de baseline')
+    parser.add_argument('--save-baseline', action='store_true', help='grava os resultados como novo baseline')
+    parser.add_argument('--history', default=None, help='arquivo JSONL onde registrar o resultado')
+    args = parser.parse_args(argv)
+
+    baselines = load_baselines(args.baseline)
+    rows = []
+    regressions = []
+
+    for module in args.entry.split(','):
+        row = measure(module, ENTRY_POINTS.get(module, '/api/health'), args.runs)
+        baseline = baselines.get(module, {})
+        changes = []
+        for metric in METRICS:
+            if baseline.get(metric):
+                change = row[metric] / baseline[metric] - 1
+                changes.append(f'{metric.rsplit("_", 1)[0]}{change:+.0%}')
+                if change > args.threshold:
+                    regressions.append(f'{module}.{metric}')
+        row['vs_baseline'] = ' '.join(changes)
+        rows.append(row)
+
+    print_table(rows, ['entry', 'runs', 'modules'] + METRICS + ['vs_baseline'])
+
+    if args.history:
+        append_history(args.history, 'coldstart', rows)
+
+    if args.save_baseline:
+        merged = dict(baselines)
+        merged.update({row['entry']: {metric: row[metric] for metric in METRICS} for row in rows})
+        save_baselines(args.baseline, [dict(values, entry=entry) for entry, values in merged.items()])
+        print(f"\nBaseline salvo em {os.path.relpath(args.baseline, ROOT_DIR)}")
+        return 0
+
+    if regressions:
+        print(f"\n{len(regressions)} métrica(s) acima do limite de {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+
+    print(f"\nNenhuma regressão acima de {args.threshold:.0%}.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
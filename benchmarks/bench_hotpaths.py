@@ -0,0 +1,169 @@
+# benchmarks/bench_hotpaths.py
+
+"""
+Micro-benchmarks dos caminhos quentes executados em toda requisição, com gate de regressão.
+
+  format_list  - build_format_list de src/routes/youtube.py sobre info_dicts com 100+ formatos
+  html_parse   - parse_video_info_html do api/index.py sobre páginas de watch de ~1MB
+  serverless   - ServerlessYouTubeExtractor._format_video_info sobre os mesmos info_dicts
+
+Cada benchmark é calibrado (como no pytest-benchmark) para que uma rodada dure pelo menos
+--min-time segundos; a estatística escolhida em --stat (mínimo por padrão, a menos sensível a
+ruído da máquina) é comparada com o baseline salvo em benchmarks/baselines/hotpaths.json.
+O processo sai com código 1 se algum benchmark ficar mais de --threshold (fração) mais
+lento que o baseline.
+
+Uso:
+  python -m benchmarks.bench_hotpaths                  # compara com o baseline
+  python -m benchmarks.bench_hotpaths --save-baseline  # grava novos baselines
+"""
+
+import argparse
+import copy
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Callable, Dict, Any, List, Tuple
+
+from .common import ROOT_DIR, load_api_index, print_table, append_history
+from .fixtures import DEFAULT_VIDEO_IDS, make_info_dict, make_watch_page
+
+BASELINE_PATH = os.path.join(ROOT_DIR, 'benchmarks', 'baselines', 'hotpaths.json')
+
+
+def collect_benchmarks() -> List[Tuple[str, Callable[[], Any]]]:
+    """Monta a lista (nome, função sem argumentos) com os dados já carregados"""
+    from src.routes.youtube import build_format_list
+    from src.utils.serverless_extractor import ServerlessYouTubeExtractor
+
+    api_index = load_api_index()
+    extractor = ServerlessYouTubeExtractor()
+    benchmarks = []
+
+    for video_id in DEFAULT_VIDEO_IDS[:3]:
+        info = make_info_dict(video_id)
+        formats = info['formats']
+        benchmarks.append((f'format_list[{video_id}]', lambda formats=formats: build_format_list(formats)))
+        benchmarks.append((f'serverless_format[{video_id}]',
+                           lambda info=info: extractor._format_video_info(copy.copy(info))))
+
+    for video_id in DEFAULT_VIDEO_IDS[:2]:
+        page = make_watch_page(video_id, size_kb=900)
+        benchmarks.append((f'html_parse[{video_id}]',
+                           lambda page=page, video_id=video_id: api_index.parse_video_info_html(page, video_id)))
+
+    # Página degradada (sem ytInitialPlayerResponse): percorre todos os padrões da cascata
+    degraded = make_watch_page(DEFAULT_VIDEO_IDS[0], size_kb=16, with_player_data=False)
+    benchmarks.append(('html_parse_degraded',
+                       lambda: api_index.parse_video_info_html(degraded, DEFAULT_VIDEO_IDS[0])))
+
+    return benchmarks
+
+
+def measure(func: Callable[[], Any], min_time: float, rounds: int) -> Dict[str, Any]:
+    """Calibra o número de iterações por rodada e mede `rounds` rodadas"""
+    func()  # aquecimento (compila regex, popula caches)
+
+    iterations = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time or iterations >= 1 << 20:
+            break
+        iterations *= 2 if elapsed < min_time / 4 else max(2, int(min_time / max(elapsed, 1e-9)))
+
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        samples.append((time.perf_counter() - started) / iterations)
+
+    return {
+        'iterations': iterations,
+        'rounds': rounds,
+        'min_us': round(min(samples) * 1e6, 2),
+        'median_us': round(statistics.median(samples) * 1e6, 2),
+        'mean_us': round(statistics.fmean(samples) * 1e6, 2),
+        'stddev_us': round(statistics.pstdev(samples) * 1e6, 2),
+    }
+
+
+def load_baselines(path: str) -> Dict[str, Any]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f).get('benchmarks', {})
+
+
+def save_baselines(path: str, results: Dict[str, Dict[str, Any]]):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'note': 'Tempos por iteração em microssegundos; regenere com --save-baseline na máquina que roda o gate.',
+            'benchmarks': {name: {'median_us': r['median_us'], 'min_us': r['min_us']} for name, r in sorted(results.items())},
+        }, f, indent=2, ensure_ascii=False)
+        f.write('\n')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Micro-benchmarks dos caminhos quentes com gate de regressão')
+    parser.add_argument('--filter', default='', help='executa só benchmarks cujo nome contém este texto')
+    parser.add_argument('--rounds', type=int, default=7, help='rodadas por benchmark')
+    parser.add_argument('--min-time', type=float, default=0.05, help='duração mínima de cada rodada (s)')
+    parser.add_argument('--stat', choices=['min', 'median'], default='min', help='estatística comparada com o baseline')
+    parser.add_argument('--threshold', type=float, default=0.25, help='regressão máxima tolerada (0.25 = 25%%)')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='arquivo de baseline')
+    parser.add_argument('--save-baseline', action='store_true', help='grava os resultados como novo baseline')
+    parser.add_argument('--history', default=None, help='arquivo JSONL onde registrar o resultado')
+    args = parser.parse_args(argv)
+
+    baselines = load_baselines(args.baseline)
+    results = {}
+    rows = []
+    regressions = []
+
+    for name, func in collect_benchmarks():
+        if args.filter and args.filter not in name:
+            continue
+        result = measure(func, args.min_time, args.rounds)
+        results[name] = result
+
+        row = dict(result, name=name)
+        baseline = baselines.get(name)
+        stat = f'{args.stat}_us'
+        if baseline and baseline.get(stat):
+            change = result[stat] / baseline[stat] - 1
+            row['baseline_us'] = baseline[stat]
+            row['change'] = f'{change:+.1%}'
+            if change > args.threshold:
+                row['change'] += ' REGRESSÃO'
+                regressions.append(name)
+        rows.append(row)
+
+    print_table(rows, ['name', 'iterations', 'min_us', 'median_us', 'stddev_us', 'baseline_us', 'change'])
+
+    if args.history:
+        append_history(args.history, 'hotpaths', rows)
+
+    if args.save_baseline:
+        merged = {name: {'median_us': b['median_us'], 'min_us': b.get('min_us', b['median_us'])} for name, b in baselines.items()}
+        merged.update(results)
+        save_baselines(args.baseline, merged)
+        print(f"\nBaseline salvo em {os.path.relpath(args.baseline, ROOT_DIR)}")
+        return 0
+
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) acima do limite de {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+
+    print(f"\nNenhuma regressão acima de {args.threshold:.0%}.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
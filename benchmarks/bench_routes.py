@@ -0,0 +1,149 @@
+# benchmarks/bench_routes.py
+
+"""
+Benchmark offline das rotas de informação e download.
+
+Sobe o servidor local que substitui o YouTube e mede, sob concorrência configurável:
+  html      - get_video_info_from_html do api/index.py (regex sobre a página de watch)
+  fallback  - get_video_info_with_fallback do api/index.py (oEmbed -> HTML -> mínimo)
+  formats   - POST /api/info de src/routes/youtube.py (loops de seleção de formatos)
+  download  - POST /api/download de src/routes/youtube.py (download + streaming do generate())
+
+Uso:
+  python -m benchmarks.bench_routes --scenario all --concurrency 1,4,16 --requests 200
+"""
+
+import argparse
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .common import ROOT_DIR, RESULTS_DIR, load_api_index, summarize, current_rss_mb, peak_rss_mb, print_table, append_history
+from .fixtures import DEFAULT_VIDEO_IDS
+from .stand_in_youtube import StandInYouTube, install_stand_in_ytdlp
+
+SCENARIOS = ['html', 'fallback', 'formats', 'download']
+
+
+def create_youtube_app():
+    """App Flask mínima só com o blueprint do YouTube (sem banco de dados)"""
+    from flask import Flask
+    from src.routes.youtube import youtube_bp
+
+    app = Flask(__name__)
+    app.register_blueprint(youtube_bp, url_prefix='/api')
+    return app
+
+
+def build_operations(api_index, app):
+    """Uma função por cenário; cada chamada executa uma requisição completa"""
+    client = app.test_client()
+
+    def watch_url(video_id):
+        return f'https://www.youtube.com/watch?v={video_id}'
+
+    def run_html(video_id):
+        if not api_index.get_video_info_from_html(video_id):
+            raise RuntimeError('get_video_info_from_html retornou None')
+
+    def run_fallback(video_id):
+        api_index.get_video_info_with_fallback(watch_url(video_id))
+
+    def run_formats(video_id):
+        response = client.post('/api/info', json={'url': watch_url(video_id)})
+        if response.status_code != 200:
+            raise RuntimeError(f'/api/info retornou {response.status_code}')
+
+    def run_download(video_id):
+        response = client.post('/api/download', json={'url': watch_url(video_id), 'format_id': '18'})
+        if response.status_code != 200:
+            raise RuntimeError(f'/api/download retornou {response.status_code}')
+        # Consome o corpo inteiro para exercitar o generate()
+        for _ in response.response:
+            pass
+        response.close()
+
+    return {'html': run_html, 'fallback': run_fallback, 'formats': run_formats, 'download': run_download}
+
+
+def run_scenario(operation, concurrency, total_requests, video_ids, warmup):
+    """Executa a operação sob a concorrência indicada e coleta latências"""
+    rng = random.Random(42)
+    targets = [rng.choice(video_ids) for _ in range(total_requests)]
+
+    for video_id in targets[:warmup]:
+        operation(video_id)
+
+    latencies = []
+    errors = 0
+
+    def timed(video_id):
+        started = time.perf_counter()
+        operation(video_id)
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(timed, video_id) for video_id in targets]:
+            try:
+                latencies.append(future.result())
+            except Exception as e:
+                errors += 1
+                if errors <= 3:
+                    print(f"  erro: {e}")
+    elapsed = time.perf_counter() - started
+
+    return summarize(latencies, elapsed, errors)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark offline das rotas do YouTube Downloader')
+    parser.add_argument('--scenario', default='all', help=f'um de {SCENARIOS} ou "all" (separados por vírgula)')
+    parser.add_argument('--concurrency', default='1,4,16', help='níveis de concorrência separados por vírgula')
+    parser.add_argument('--requests', type=int, default=100, help='requisições por nível de concorrência')
+    parser.add_argument('--warmup', type=int, default=5, help='requisições de aquecimento descartadas')
+    parser.add_argument('--videos', type=int, default=len(DEFAULT_VIDEO_IDS), help='quantidade de vídeos distintos')
+    parser.add_argument('--media-size', type=int, default=4 * 1024 * 1024, help='tamanho da mídia servida (bytes)')
+    parser.add_argument('--upstream-latency', type=float, default=0.0, help='latência artificial do upstream (ms)')
+    parser.add_argument('--oembed-status', type=int, default=200, help='status do oEmbed (ex.: 403 força o scraping)')
+    parser.add_argument('--history', default=None,
+                        help=f'arquivo JSONL onde registrar o resultado (ex.: {os.path.relpath(RESULTS_DIR, ROOT_DIR)}/routes.jsonl)')
+    args = parser.parse_args(argv)
+
+    scenarios = SCENARIOS if args.scenario == 'all' else args.scenario.split(',')
+    levels = [int(c) for c in args.concurrency.split(',')]
+    video_ids = DEFAULT_VIDEO_IDS[:max(1, args.videos)]
+
+    with StandInYouTube(media_size=args.media_size, latency_ms=args.upstream_latency,
+                        oembed_status=args.oembed_status) as stand_in:
+        install_stand_in_ytdlp(stand_in.base_url)
+        api_index = load_api_index(stand_in.base_url)
+        operations = build_operations(api_index, create_youtube_app())
+
+        rows = []
+        for scenario in scenarios:
+            for concurrency in levels:
+                result = run_scenario(operations[scenario], concurrency, args.requests, video_ids, args.warmup)
+                result.update({
+                    'scenario': scenario,
+                    'concurrency': concurrency,
+                    'rss_mb': round(current_rss_mb(), 1),
+                    'peak_rss_mb': round(peak_rss_mb(), 1),
+                })
+                rows.append(result)
+                print(f"{scenario} c={concurrency}: p50={result['p50_ms']}ms p95={result['p95_ms']}ms "
+                      f"p99={result['p99_ms']}ms {result['throughput_rps']} req/s")
+
+    print()
+    print_table(rows, ['scenario', 'concurrency', 'requests', 'errors', 'p50_ms', 'p95_ms', 'p99_ms',
+                       'throughput_rps', 'rss_mb', 'peak_rss_mb'])
+    print(f"\nRequisições ao upstream local: {stand_in.request_counts}")
+
+    if args.history:
+        append_history(args.history, 'routes', rows)
+        print(f"Resultado registrado em {args.history}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+# benchmarks/common.py
+
+"""Funções compartilhadas pelos benchmarks: percentis, memória e histórico de resultados"""
+
+import importlib.util
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from typing import Dict, Any, List, Optional
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT_DIR, 'benchmarks', 'results')
+
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+
+def load_api_index(base_url: Optional[str] = None):
+    """Importa o api/index.py (entry point da Vercel), opcionalmente apontando o YouTube para o stand-in local"""
+    if base_url:
+        os.environ['YOUTUBE_BASE_URL'] = base_url
+    spec = importlib.util.spec_from_file_location('api_index', os.path.join(ROOT_DIR, 'api', 'index.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Percentil por interpolação linear (mesma definição do numpy)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100.0
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def current_rss_mb() -> float:
+    """RSS atual do processo em MB (usa /proc quando disponível)"""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    """Pico de RSS do processo em MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss é em KB no Linux e em bytes no macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def summarize(latencies: List[float], elapsed: float, errors: int = 0) -> Dict[str, Any]:
+    """Resume latências (em segundos) em p50/p95/p99 (ms) e throughput"""
+    total = len(latencies) + errors
+    return {
+        'requests': total,
+        'errors': errors,
+        'error_rate': round(errors / total, 4) if total else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'max_ms': round(max(latencies) * 1000, 3) if latencies else 0.0,
+        'throughput_rps': round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+    }
+
+
+def print_table(rows: List[Dict[str, Any]], columns: List[str]):
+    """Imprime resultados como tabela alinhada"""
+    widths = {c: max(len(c), *(len(str(r.get(c, ''))) for r in rows)) for c in columns}
+    print('  '.join(c.ljust(widths[c]) for c in columns))
+    print('  '.join('-' * widths[c] for c in columns))
+    for row in rows:
+        print('  '.join(str(row.get(c, '')).ljust(widths[c]) for c in columns))
+
+
+def git_revision() -> Optional[str]:
+    """Commit atual, para associar resultados ao código medido"""
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def append_history(path: str, suite: str, results: List[Dict[str, Any]]):
+    """Acrescenta uma execução ao histórico JSONL para acompanhar regressões ao longo do tempo"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    record = {
+        'suite': suite,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'results': results,
+    }
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record, ensure_ascii=False) + '\n')
@@ -0,0 +1,370 @@
+# benchmarks/fixtures.py
+
+"""
+Gera dados de teste determinísticos com o formato das respostas reais do YouTube:
+info_dict do yt-dlp (com 100+ formatos), páginas de watch grandes e JSON do oEmbed.
+
+Os dados são sintetizados a partir da tabela de itags real do YouTube para que os
+benchmarks rodem sem rede e produzam sempre o mesmo resultado.
+"""
+
+import json
+import random
+import time
+import zlib
+from typing import Dict, Any, List
+
+# (itag, ext, height, fps, vcodec, acodec, tbr) - tabela de formatos DASH/progressivos do YouTube
+VIDEO_ITAGS = [
+    ('18', 'mp4', 360, 30, 'avc1.42001E', 'mp4a.40.2', 568.0),
+    ('22', 'mp4', 720, 30, 'avc1.64001F', 'mp4a.40.2', 1472.0),
+    ('160', 'mp4', 144, 30, 'avc1.4d400c', 'none', 108.0),
+    ('133', 'mp4', 240, 30, 'avc1.4d4015', 'none', 242.0),
+    ('134', 'mp4', 360, 30, 'avc1.4d401e', 'none', 411.0),
+    ('135', 'mp4', 480, 30, 'avc1.4d401f', 'none', 743.0),
+    ('136', 'mp4', 720, 30, 'avc1.4d401f', 'none', 1332.0),
+    ('298', 'mp4', 720, 60, 'avc1.4d4020', 'none', 2170.0),
+    ('137', 'mp4', 1080, 30, 'avc1.640028', 'none', 2890.0),
+    ('299', 'mp4', 1080, 60, 'avc1.64002a', 'none', 4430.0),
+    ('264', 'mp4', 1440, 30, 'avc1.640032', 'none', 8920.0),
+    ('266', 'mp4', 2160, 30, 'avc1.640033', 'none', 17540.0),
+    ('278', 'webm', 144, 30, 'vp9', 'none', 95.0),
+    ('242', 'webm', 240, 30, 'vp9', 'none', 183.0),
+    ('243', 'webm', 360, 30, 'vp9', 'none', 332.0),
+    ('244', 'webm', 480, 30, 'vp9', 'none', 604.0),
+    ('247', 'webm', 720, 30, 'vp9', 'none', 1179.0),
+    ('302', 'webm', 720, 60, 'vp9', 'none', 1923.0),
+    ('248', 'webm', 1080, 30, 'vp9', 'none', 2161.0),
+    ('303', 'webm', 1080, 60, 'vp9', 'none', 3215.0),
+    ('271', 'webm', 1440, 30, 'vp9', 'none', 6783.0),
+    ('308', 'webm', 1440, 60, 'vp9', 'none', 9856.0),
+    ('313', 'webm', 2160, 30, 'vp9', 'none', 13421.0),
+    ('315', 'webm', 2160, 60, 'vp9', 'none', 19843.0),
+    ('394', 'mp4', 144, 30, 'av01.0.00M.08', 'none', 81.0),
+    ('395', 'mp4', 240, 30, 'av01.0.00M.08', 'none', 158.0),
+    ('396', 'mp4', 360, 30, 'av01.0.01M.08', 'none', 291.0),
+    ('397', 'mp4', 480, 30, 'av01.0.04M.08', 'none', 527.0),
+    ('398', 'mp4', 720, 60, 'av01.0.08M.08', 'none', 1611.0),
+    ('399', 'mp4', 1080, 60, 'av01.0.09M.08', 'none', 2857.0),
+    ('400', 'mp4', 1440, 60, 'av01.0.12M.08', 'none', 8212.0),
+    ('401', 'mp4', 2160, 60, 'av01.0.13M.08', 'none', 16230.0),
+]
+
+# (itag, ext, acodec, abr)
+AUDIO_ITAGS = [
+    ('139', 'm4a', 'mp4a.40.5', 48.0),
+    ('140', 'm4a', 'mp4a.40.2', 129.5),
+    ('249', 'webm', 'opus', 53.0),
+    ('250', 'webm', 'opus', 68.0),
+    ('251', 'webm', 'opus', 134.0),
+]
+
+# Formatos HLS (vídeo + áudio muxados)
+HLS_ITAGS = [
+    ('91', 144, 'avc1.4D400C', 'mp4a.40.5', 260.0),
+    ('92', 240, 'avc1.4D4015', 'mp4a.40.5', 407.0),
+    ('93', 360, 'avc1.4D401E', 'mp4a.40.2', 861.0),
+    ('94', 480, 'avc1.4D401F', 'mp4a.40.2', 1317.0),
+    ('95', 720, 'avc1.4D401F', 'mp4a.40.2', 2497.0),
+    ('96', 1080, 'avc1.640028', 'mp4a.40.2', 4811.0),
+    ('300', 720, 'avc1.4D4020', 'mp4a.40.2', 3937.0),
+    ('301', 1080, 'avc1.64002A', 'mp4a.40.2', 6527.0),
+]
+
+AUDIO_LANGUAGES = ['en', 'pt-BR', 'es', 'fr', 'de', 'it', 'ja', 'ko', 'hi', 'id', 'ru', 'pl']
+
+CAPTION_LANGUAGES = [
+    'af', 'ak', 'sq', 'am', 'ar', 'hy', 'as', 'ay', 'az', 'bn', 'eu', 'be', 'bho', 'bs', 'bg',
+    'my', 'ca', 'ceb', 'zh-Hans', 'zh-Hant', 'co', 'hr', 'cs', 'da', 'dv', 'nl', 'en', 'eo',
+    'et', 'ee', 'fil', 'fi', 'fr', 'gl', 'lg', 'ka', 'de', 'el', 'gn', 'gu', 'ht', 'ha', 'haw',
+    'iw', 'hi', 'hmn', 'hu', 'is', 'ig', 'id', 'ga', 'it', 'ja', 'jv', 'kn', 'kk', 'km', 'rw',
+    'ko', 'kri', 'ku', 'ky', 'lo', 'la', 'lv', 'ln', 'lt', 'lb', 'mk', 'mg', 'ms', 'ml', 'mt',
+    'mi', 'mr', 'mn', 'ne', 'nso', 'no', 'ny', 'or', 'om', 'ps', 'fa', 'pl', 'pt', 'pa', 'qu',
+    'ro', 'ru', 'sm', 'sa', 'gd', 'sr', 'sn', 'sd', 'si', 'sk', 'sl', 'so', 'st', 'es', 'su',
+]
+
+DEFAULT_VIDEO_IDS = [
+    'dQw4w9WgXcQ', 'jNQXAC9IVRw', '9bZkp7q19f0', 'kJQP7kiw5Fk', 'OPf0YbXqDm0',
+    'RgKAFK5djSk', 'fJ9rUzIMcZQ', 'CevxZvSJLk8', 'hT_nvWreIhg', 'YQHsXMglC9A',
+]
+
+
+def _rng(video_id: str) -> random.Random:
+    """Gerador aleatório determinístico por vídeo"""
+    return random.Random(zlib.crc32(video_id.encode('utf-8')))
+
+
+def _googlevideo_url(base_url: str, video_id: str, format_id: str, rng: random.Random) -> str:
+    """
+    Monta uma URL de mídia com os mesmos parâmetros de uma URL real do googlevideo. O `expire`
+    fica 6 h ou mais no futuro (a única parte não determinística), para que o StreamURLCache
+    aceite as URLs e os caminhos de passthrough e merge em streaming sejam exercitados
+    """
+    params = {
+        'expire': str(int(time.time()) + 6 * 3600 + rng.randint(0, 21600)),
+        'ei': ''.join(rng.choice('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789') for _ in range(20)),
+        'ip': '203.0.113.%d' % rng.randint(1, 254),
+        'id': 'o-' + ''.join(rng.choice('abcdefghijklmnopqrstuvwxyz0123456789') for _ in range(44)),
+        'itag': format_id.split('-')[0],
+        'source': 'youtube',
+        'requiressl': 'yes',
+        'mime': 'video%2Fmp4',
+        'dur': '%.3f' % rng.uniform(60, 3600),
+        'lmt': str(1700000000000000 + rng.randint(0, 10 ** 12)),
+        'sparams': 'expire%2Cei%2Cip%2Cid%2Citag%2Csource%2Crequiressl%2Cmime%2Cdur%2Clmt',
+        'sig': ''.join(rng.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_-=') for _ in range(90)),
+    }
+    query = '&'.join(f'{k}={v}' for k, v in params.items())
+    return f'{base_url}/media/{video_id}/{format_id}?{query}'
+
+
+def _fragments(rng: random.Random, duration: int) -> List[Dict[str, Any]]:
+    """Lista de fragmentos como a que o yt-dlp anexa a formatos HLS"""
+    return [
+        {'url': f'sq/{i}/lmt/{rng.randint(10 ** 15, 10 ** 16)}', 'duration': 5.0}
+        for i in range(max(1, duration // 5))
+    ]
+
+
+def make_info_dict(video_id: str, base_url: str = 'https://rr1---sn-stand-in.googlevideo.com',
+                   media_size: int = 0) -> Dict[str, Any]:
+    """Gera um info_dict do yt-dlp com 100+ formatos para o vídeo informado"""
+    rng = _rng(video_id)
+    duration = rng.randint(120, 1800)
+    formats = []
+
+    def size_for(tbr):
+        # Usa o tamanho fixo da mídia servida quando o stand-in local é o upstream
+        return media_size or int(tbr * 1000 / 8 * duration)
+
+    for format_id, ext, height, fps, vcodec, acodec, tbr in VIDEO_ITAGS:
+        width = int(height * 16 / 9)
+        has_audio = acodec != 'none'
+        formats.append({
+            'format_id': format_id,
+            'format_note': f'{height}p' + (str(fps) if fps > 30 else ''),
+            'ext': ext,
+            'protocol': 'https',
+            'acodec': acodec,
+            'vcodec': vcodec,
+            'url': _googlevideo_url(base_url, video_id, format_id, rng),
+            'width': width,
+            'height': height,
+            'fps': fps,
+            'tbr': tbr,
+            'vbr': None if has_audio else tbr,
+            'abr': 96.0 if has_audio else None,
+            'asr': 44100 if has_audio else None,
+            'audio_channels': 2 if has_audio else None,
+            'filesize': size_for(tbr) if rng.random() > 0.2 else None,
+            'filesize_approx': size_for(tbr),
+            'container': f'{ext}_dash',
+            'dynamic_range': 'SDR',
+            'quality': float(height // 100),
+            'has_drm': False,
+            'source_preference': -1,
+            'language': None,
+            'resolution': f'{width}x{height}',
+            'aspect_ratio': 1.78,
+            'video_ext': ext,
+            'audio_ext': 'none' if not has_audio else ext,
+            'format': f'{format_id} - {width}x{height} ({height}p)',
+            'http_headers': {
+                'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+                'Accept-Language': 'en-us,en;q=0.5',
+                'Sec-Fetch-Mode': 'navigate',
+            },
+            'downloader_options': {'http_chunk_size': 10485760},
+        })
+
+    for language in AUDIO_LANGUAGES:
+        for format_id, ext, acodec, abr in AUDIO_ITAGS:
+            suffix = '' if language == 'en' else f'-{AUDIO_LANGUAGES.index(language)}'
+            formats.append({
+                'format_id': format_id + suffix,
+                'format_note': f'{language} - {"medium" if abr > 100 else "low"}',
+                'ext': ext,
+                'protocol': 'https',
+                'acodec': acodec,
+                'vcodec': 'none',
+                'url': _googlevideo_url(base_url, video_id, format_id + suffix, rng),
+                'abr': abr,
+                'tbr': abr,
+                'asr': 48000 if acodec == 'opus' else 44100,
+                'audio_channels': 2,
+                'filesize': size_for(abr),
+                'container': f'{ext}_dash',
+                'language': language,
+                'language_preference': 10 if language == 'en' else -1,
+                'resolution': 'audio only',
+                'video_ext': 'none',
+                'audio_ext': ext,
+                'format': f'{format_id + suffix} - audio only ({language})',
+                'http_headers': {'User-Agent': 'Mozilla/5.0'},
+            })
+
+    for format_id, height, vcodec, acodec, tbr in HLS_ITAGS:
+        formats.append({
+            'format_id': f'{format_id}',
+            'format_note': f'{height}p HLS',
+            'ext': 'mp4',
+            'protocol': 'm3u8_native',
+            'acodec': acodec,
+            'vcodec': vcodec,
+            'url': f'{base_url}/api/manifest/hls_playlist/id/{video_id}/itag/{format_id}/index.m3u8',
+            'manifest_url': f'{base_url}/api/manifest/hls_variant/id/{video_id}/file/index.m3u8',
+            'width': int(height * 16 / 9),
+            'height': height,
+            'fps': 30,
+            'tbr': tbr,
+            'fragments': _fragments(rng, duration),
+            'resolution': f'{int(height * 16 / 9)}x{height}',
+            'format': f'{format_id} - HLS {height}p',
+        })
+
+    for i in range(4):
+        formats.insert(0, {
+            'format_id': f'sb{i}',
+            'format_note': 'storyboard',
+            'ext': 'mhtml',
+            'protocol': 'mhtml',
+            'acodec': 'none',
+            'vcodec': 'none',
+            'url': f'{base_url}/sb/{video_id}/storyboard3_L{i}/M$M.jpg',
+            'width': 48 * (i + 1),
+            'height': 27 * (i + 1),
+            'fragments': _fragments(rng, duration)[:20],
+        })
+
+    description = ' '.join(
+        rng.choice(['música', 'oficial', 'clipe', 'ao vivo', 'remaster', 'lyrics', 'vídeo', 'HD', '4K', 'tutorial'])
+        for _ in range(600)
+    )
+
+    return {
+        'id': video_id,
+        'title': f'Vídeo de benchmark {video_id} (Official Video)',
+        'fulltitle': f'Vídeo de benchmark {video_id} (Official Video)',
+        'description': description,
+        'uploader': f'Canal {video_id[:4]}',
+        'uploader_id': f'@canal{video_id[:4].lower()}',
+        'channel_id': 'UC' + video_id * 2,
+        'duration': duration,
+        'view_count': rng.randint(1_000, 2_000_000_000),
+        'like_count': rng.randint(100, 10_000_000),
+        'upload_date': '20%02d%02d%02d' % (rng.randint(10, 24), rng.randint(1, 12), rng.randint(1, 28)),
+        'webpage_url': f'https://www.youtube.com/watch?v={video_id}',
+        'thumbnail': f'https://i.ytimg.com/vi/{video_id}/maxresdefault.jpg',
+        'thumbnails': [
+            {'url': f'https://i.ytimg.com/vi/{video_id}/{i}.jpg', 'preference': -i, 'id': str(i),
+             'width': 120 + i * 10, 'height': 90 + i * 6}
+            for i in range(42)
+        ],
+        'tags': [f'tag{i}' for i in range(40)],
+        'categories': ['Music'],
+        'chapters': [
+            {'start_time': i * 60.0, 'end_time': (i + 1) * 60.0, 'title': f'Capítulo {i}'}
+            for i in range(duration // 60)
+        ],
+        'automatic_captions': {
+            language: [
+                {'ext': ext, 'url': f'https://www.youtube.com/api/timedtext?v={video_id}&lang={language}&fmt={ext}', 'name': language}
+                for ext in ('json3', 'srv1', 'srv2', 'srv3', 'ttml', 'vtt')
+            ]
+            for language in CAPTION_LANGUAGES
+        },
+        'subtitles': {},
+        'formats': formats,
+        'extractor': 'youtube',
+        'extractor_key': 'Youtube',
+        'ext': 'mp4',
+    }
+
+
+def make_oembed(video_id: str) -> Dict[str, Any]:
+    """Resposta do endpoint oEmbed do YouTube"""
+    info = make_info_dict(video_id)
+    return {
+        'title': info['title'],
+        'author_name': info['uploader'],
+        'author_url': f'https://www.youtube.com/{info["uploader_id"]}',
+        'type': 'video',
+        'height': 113,
+        'width': 200,
+        'version': '1.0',
+        'provider_name': 'YouTube',
+        'provider_url': 'https://www.youtube.com/',
+        'thumbnail_height': 360,
+        'thumbnail_width': 480,
+        'thumbnail_url': f'https://i.ytimg.com/vi/{video_id}/hqdefault.jpg',
+        'html': f'<iframe width="200" height="113" src="https://www.youtube.com/embed/{video_id}?feature=oembed"></iframe>',
+    }
+
+
+def make_watch_page(video_id: str, size_kb: int = 900, with_player_data: bool = True) -> str:
+    """
+    Gera uma página de watch do tamanho de uma página real (~1MB), com os dados no meio dela.
+
+    Com with_player_data=False a página simula a versão degradada (consentimento/bloqueio),
+    sem ytInitialPlayerResponse, o que força a cascata de regex até os últimos padrões.
+    """
+    info = make_info_dict(video_id)
+    rng = _rng(video_id)
+
+    # Ruído de scripts/JSON que antecede o ytInitialPlayerResponse numa página real
+    filler_chunk = json.dumps({
+        'responseContext': {'serviceTrackingParams': [
+            {'service': 'GFEEDBACK', 'params': [{'key': 'logged_in', 'value': '0'}, {'key': 'e', 'value': ','.join(str(rng.randint(10 ** 7, 10 ** 8)) for _ in range(40))}]},
+        ]},
+        'playabilityStatus': {'status': 'OK', 'playableInEmbed': True},
+        'trackingParams': ''.join(rng.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789') for _ in range(200)),
+    }, ensure_ascii=False, separators=(',', ':'))
+
+    player_response = json.dumps({
+        'videoDetails': {
+            'videoId': video_id,
+            'title': info['title'],
+            'lengthSeconds': str(info['duration']),
+            'channelId': info['channel_id'],
+            'shortDescription': info['description'][:1500],
+            'viewCount': str(info['view_count']),
+            'author': info['uploader'],
+            'isPrivate': False,
+        },
+        'microformat': {'playerMicroformatRenderer': {
+            'description': {'simpleText': info['description'][:1500]},
+            'ownerChannelName': info['uploader'],
+        }},
+    }, ensure_ascii=False, separators=(',', ':'))
+
+    initial_data = json.dumps({
+        'contents': {'twoColumnWatchNextResults': {'results': {'results': {'contents': [
+            {'videoSecondaryInfoRenderer': {'owner': {'videoOwnerRenderer': {'title': {'runs': [{'text': info['uploader']}]}}}}},
+        ]}}}},
+        'ownerText': {'runs': [{'text': info['uploader']}]},
+    }, ensure_ascii=False, separators=(',', ':'))
+
+    head = (
+        '<!DOCTYPE html><html style="font-size: 10px;font-family: Roboto, Arial, sans-serif;" lang="en">'
+        f'<head><title>{info["title"]} - YouTube</title>'
+        f'<meta name="title" content="{info["title"]}">'
+        f'<link rel="canonical" href="https://www.youtube.com/watch?v={video_id}">'
+        '</head><body>'
+    )
+    half = max(0, (size_kb * 1024 - len(head) - len(player_response) - len(initial_data)) // 2)
+    filler_before = ('<script nonce="x">var ytcfg=' + filler_chunk + ';</script>') * (half // (len(filler_chunk) + 40) + 1)
+    filler_after = ('<script nonce="x">window.ytplayer=' + filler_chunk + ';</script>') * (half // (len(filler_chunk) + 40) + 1)
+
+    player_data = (
+        f'<script nonce="x">var ytInitialPlayerResponse = {player_response};</script>'
+        f'<script nonce="x">var ytInitialData = {initial_data};</script>'
+    ) if with_player_data else ''
+
+    return (
+        head
+        + filler_before
+        + player_data
+        + filler_after
+        + '</body></html>'
+    )
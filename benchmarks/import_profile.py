@@ -0,0 +1,155 @@
+# benchmarks/import_profile.py
+
+"""
+Perfil de tempo de import dos entry points, a partir de `python -X importtime`.
+
+Cada entry point é importado em um subprocesso limpo, --runs vezes; para cada módulo fica
+o menor tempo observado (o menos afetado por ruído). O relatório lista o tempo total, os
+imports diretos mais caros e os módulos com maior tempo próprio.
+
+Uso:
+  python -m benchmarks.import_profile
+  python -m benchmarks.import_profile --entry api.index --runs 10 --top 20
+  python -m benchmarks.import_profile --markdown benchmarks/reports/import_profile.md
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+from typing import Dict, Any, List, Optional
+
+from .common import ROOT_DIR, print_table
+
+# Entry points de produção: Vercel, Flask serverless e servidor completo
+ENTRY_POINTS = ['api.index', 'main_serverless', 'main']
+
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """Converte a saída de -X importtime em registros (módulo, profundidade, tempos em µs)"""
+    records = []
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            records.append({
+                'module': name,
+                'depth': len(indent) // 2,
+                'self_us': int(self_us),
+                'cumulative_us': int(cumulative_us),
+            })
+    return records
+
+
+def entry_subtree(records: List[Dict[str, Any]], module: str) -> List[Dict[str, Any]]:
+    """
+    Registros importados por `module` (inclusive ele), sem os imports da inicialização do Python.
+
+    O -X importtime imprime os filhos antes do pai, então a subárvore são as linhas
+    imediatamente anteriores à do módulo com profundidade maior que a dele.
+    """
+    for index in range(len(records) - 1, -1, -1):
+        if records[index]['module'] == module:
+            entry = records[index]
+            subtree = [entry]
+            for record in reversed(records[:index]):
+                if record['depth'] <= entry['depth']:
+                    break
+                subtree.append(record)
+            return subtree
+    return []
+
+
+def run_importtime(module: str, env: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """Importa `module` em um subprocesso com -X importtime"""
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT_DIR, capture_output=True, text=True, env=env or os.environ.copy(),
+    )
+    records = entry_subtree(parse_importtime(proc.stderr), module)
+    error = None
+    if proc.returncode != 0:
+        messages = [line for line in proc.stderr.strip().splitlines() if not IMPORTTIME_LINE.match(line)]
+        error = (messages or ['erro desconhecido'])[-1]
+    return {'records': records, 'total_us': records[0]['cumulative_us'] if records else None, 'error': error}
+
+
+def profile(module: str, runs: int = 5, env: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """Perfil consolidado de várias execuções (menor tempo por módulo)"""
+    best: Dict[str, Dict[str, Any]] = {}
+    totals = []
+    error = None
+    for _ in range(runs):
+        result = run_importtime(module, env)
+        error = error or result['error']
+        if result['total_us'] is not None:
+            totals.append(result['total_us'])
+        for record in result['records']:
+            current = best.get(record['module'])
+            if current is None or record['cumulative_us'] < current['cumulative_us']:
+                best[record['module']] = record
+
+    # Imports diretos do entry point (profundidade 1 relativa a ele)
+    entry_depth = best[module]['depth'] if module in best else 0
+    direct = [r for r in best.values() if r['depth'] == entry_depth + 1]
+    return {
+        'module': module,
+        'total_ms': round(min(totals) / 1000, 1) if totals else None,
+        'modules': len(best),
+        'direct': sorted(direct, key=lambda r: -r['cumulative_us']),
+        'self': sorted(best.values(), key=lambda r: -r['self_us']),
+        'error': error,
+    }
+
+
+def to_markdown(profiles: List[Dict[str, Any]], top: int) -> str:
+    lines = ['# Perfil de import dos entry points', '',
+             f'Gerado com `python -m benchmarks.import_profile` (Python {sys.version.split()[0]}). '
+             'Tempos em ms, menor valor entre as execuções.', '',
+             '| Entry point | Import total (ms) | Módulos carregados |', '|---|---|---|']
+    for p in profiles:
+        total = p['total_ms'] if p['total_ms'] is not None else f"falhou: {p['error']}"
+        lines.append(f"| `{p['module']}` | {total} | {p['modules']} |")
+
+    for p in profiles:
+        lines += ['', f"## `{p['module']}`", '', '| Import direto | Acumulado (ms) |', '|---|---|']
+        for r in p['direct'][:top]:
+            lines.append(f"| `{r['module']}` | {r['cumulative_us'] / 1000:.1f} |")
+        lines += ['', '| Maior tempo próprio | Próprio (ms) |', '|---|---|']
+        for r in p['self'][:top]:
+            lines.append(f"| `{r['module']}` | {r['self_us'] / 1000:.1f} |")
+    lines.append('')
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Perfil de tempo de import dos entry points')
+    parser.add_argument('--entry', default=','.join(ENTRY_POINTS), help='módulos separados por vírgula')
+    parser.add_argument('--runs', type=int, default=5, help='execuções por entry point')
+    parser.add_argument('--top', type=int, default=12, help='quantidade de módulos listados')
+    parser.add_argument('--markdown', default=None, help='grava o relatório em Markdown neste arquivo')
+    args = parser.parse_args(argv)
+
+    profiles = []
+    for module in args.entry.split(','):
+        result = profile(module, args.runs)
+        profiles.append(result)
+
+        print(f"\n{module}: {result['total_ms']} ms, {result['modules']} módulos"
+              + (f" (erro: {result['error']})" if result['error'] else ''))
+        print_table([{'import': r['module'], 'cumulative_ms': round(r['cumulative_us'] / 1000, 1),
+                      'self_ms': round(r['self_us'] / 1000, 1)} for r in result['direct'][:args.top]],
+                    ['import', 'cumulative_ms', 'self_ms'])
+
+    if args.markdown:
+        os.makedirs(os.path.dirname(os.path.abspath(args.markdown)), exist_ok=True)
+        with open(args.markdown, 'w', encoding='utf-8') as f:
+            f.write(to_markdown(profiles, args.top))
+        print(f"\nRelatório gravado em {args.markdown}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,349 @@
+# benchmarks/load_test.py
+
+"""
+Gerador de carga reproduzível para dimensionar workers do main.py.
+
+Reproduz um tráfego misto contra o app Flask (90% /api/info, 10% /api/download por padrão),
+com rajadas de URLs duplicadas e clientes lentos, em degraus de taxa de chegada (open loop).
+O app roda em processo atrás de um servidor WSGI com N workers fixos, como um gunicorn com
+threads, e o upstream é o stand-in local do YouTube, então nada sai para a rede.
+
+Por degrau são reportados: throughput atingido, latência p50/p95/p99 por tipo, taxa de erro,
+tempo de fila (aceite do socket até o handler começar) e ocupação dos workers. O primeiro
+degrau em que o throughput fica abaixo de 90% da taxa oferecida ou o p95 estoura o SLO é o
+ponto de saturação, e a recomendação de workers sai da lei de Little.
+
+Uso:
+  python -m benchmarks.load_test --workers 4 --rates 5,10,20,40 --duration 15
+  python -m benchmarks.load_test --target http://127.0.0.1:5000 --rates 2,4,8   # servidor externo
+"""
+
+import argparse
+import http.client
+import json
+import math
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
+from urllib.parse import urlparse
+
+from .bench_routes import create_youtube_app
+from .common import summarize, percentile, print_table, append_history
+from .fixtures import DEFAULT_VIDEO_IDS
+from .stand_in_youtube import StandInYouTube, install_stand_in_ytdlp
+
+_accept_info = threading.local()
+
+
+class ServerStats:
+    """Métricas coletadas do lado do servidor: fila e ocupação dos workers"""
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.lock = threading.Lock()
+        self.busy = 0
+        self.queue_delays: List[float] = []
+        self.busy_samples: List[int] = []
+
+    def reset(self):
+        with self.lock:
+            self.queue_delays = []
+            self.busy_samples = []
+
+    def sample(self):
+        with self.lock:
+            self.busy_samples.append(self.busy)
+
+
+class InstrumentedApp:
+    """Middleware WSGI que mede o tempo de fila e quantos workers estão ocupados"""
+
+    def __init__(self, app, stats: ServerStats):
+        self.app = app
+        self.stats = stats
+
+    def __call__(self, environ, start_response):
+        accepted_at = environ.get('loadtest.accepted_at')
+        with self.stats.lock:
+            self.stats.busy += 1
+            if accepted_at is not None:
+                self.stats.queue_delays.append(time.perf_counter() - accepted_at)
+
+        try:
+            result = self.app(environ, start_response)
+        except Exception:
+            self._release()
+            raise
+        return _ReleasingIterable(result, self._release)
+
+    def _release(self):
+        with self.stats.lock:
+            self.stats.busy -= 1
+
+
+class _ReleasingIterable:
+    """Mantém o worker ocupado enquanto o corpo (ex.: streaming do download) é enviado"""
+
+    def __init__(self, iterable, release):
+        self.iterable = iterable
+        self.release = release
+
+    def __iter__(self):
+        return iter(self.iterable)
+
+    def close(self):
+        try:
+            if hasattr(self.iterable, 'close'):
+                self.iterable.close()
+        finally:
+            self.release()
+
+
+def make_pooled_server(host: str, port: int, app, workers: int):
+    """Servidor WSGI com um pool fixo de workers; conexões excedentes esperam na fila"""
+    from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+    class Handler(WSGIRequestHandler):
+        def make_environ(self):
+            environ = super().make_environ()
+            environ['loadtest.accepted_at'] = getattr(_accept_info, 'accepted_at', None)
+            return environ
+
+        def log_request(self, *args, **kwargs):
+            pass
+
+    class PooledWSGIServer(BaseWSGIServer):
+        def __init__(self):
+            super().__init__(host, port, app, handler=Handler)
+            self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='worker')
+
+        def process_request(self, request, client_address):
+            self.pool.submit(self._process, request, client_address, time.perf_counter())
+
+        def _process(self, request, client_address, accepted_at):
+            _accept_info.accepted_at = accepted_at
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+    return PooledWSGIServer()
+
+
+class TrafficMix:
+    """Gera a sequência reproduzível de requisições de um degrau"""
+
+    def __init__(self, seed: int, info_ratio: float, duplicate_burst_prob: float, burst_size: int,
+                 slow_client_ratio: float, video_ids: List[str], format_id: str):
+        self.rng = random.Random(seed)
+        self.info_ratio = info_ratio
+        self.duplicate_burst_prob = duplicate_burst_prob
+        self.burst_size = burst_size
+        self.slow_client_ratio = slow_client_ratio
+        self.video_ids = video_ids
+        self.format_id = format_id
+
+    def schedule(self, rate: float, duration: float) -> List[Dict[str, Any]]:
+        """Chegadas de Poisson; algumas chegadas viram rajadas da mesma URL"""
+        requests_plan = []
+        at = 0.0
+        while True:
+            at += self.rng.expovariate(rate)
+            if at >= duration:
+                break
+            kind = 'info' if self.rng.random() < self.info_ratio else 'download'
+            video_id = self.rng.choice(self.video_ids)
+            slow = kind == 'download' and self.rng.random() < self.slow_client_ratio
+            copies = self.burst_size if self.rng.random() < self.duplicate_burst_prob else 1
+            for i in range(copies):
+                requests_plan.append({'at': at + i * 0.001, 'kind': kind, 'video_id': video_id,
+                                      'slow': slow, 'burst': copies > 1})
+        return requests_plan
+
+
+def send_request(base_url: str, item: Dict[str, Any], format_id: str, slow_read_delay: float,
+                 timeout: float) -> Dict[str, Any]:
+    """Executa uma requisição e mede latência até o último byte"""
+    parsed = urlparse(base_url)
+    url = f"https://www.youtube.com/watch?v={item['video_id']}"
+    if item['kind'] == 'info':
+        path, payload = '/api/info', {'url': url}
+    else:
+        path, payload = '/api/download', {'url': url, 'format_id': format_id}
+
+    started = time.perf_counter()
+    conn = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=timeout)
+    try:
+        conn.request('POST', path, body=json.dumps(payload), headers={'Content-Type': 'application/json'})
+        response = conn.getresponse()
+        received = 0
+        while True:
+            chunk = response.read(64 * 1024)
+            if not chunk:
+                break
+            received += len(chunk)
+            if item['slow']:
+                time.sleep(slow_read_delay)
+        ok = response.status == 200
+        return {'kind': item['kind'], 'ok': ok, 'status': response.status, 'bytes': received,
+                'latency': time.perf_counter() - started}
+    except Exception as e:
+        return {'kind': item['kind'], 'ok': False, 'status': type(e).__name__, 'bytes': 0,
+                'latency': time.perf_counter() - started}
+    finally:
+        conn.close()
+
+
+def run_step(base_url: str, rate: float, duration: float, mix: TrafficMix, args,
+             stats: Optional[ServerStats]) -> Dict[str, Any]:
+    """Roda um degrau de taxa fixa e resume os resultados"""
+    plan = mix.schedule(rate, duration)
+    results: List[Dict[str, Any]] = []
+    results_lock = threading.Lock()
+    if stats:
+        stats.reset()
+
+    stop_sampling = threading.Event()
+
+    def sampler():
+        while not stop_sampling.wait(0.05):
+            stats.sample()
+
+    if stats:
+        threading.Thread(target=sampler, daemon=True).start()
+
+    def fire(item):
+        result = send_request(base_url, item, args.format_id, args.slow_read_delay, args.timeout)
+        with results_lock:
+            results.append(result)
+
+    started = time.perf_counter()
+    threads = []
+    for item in plan:
+        delay = item['at'] - (time.perf_counter() - started)
+        if delay > 0:
+            time.sleep(delay)
+        thread = threading.Thread(target=fire, args=(item,), daemon=True)
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join(args.timeout + 5)
+    elapsed = time.perf_counter() - started
+    stop_sampling.set()
+
+    ok = [r for r in results if r['ok']]
+    row = summarize([r['latency'] for r in ok], elapsed, len(results) - len(ok))
+    row.update({
+        'offered_rps': round(len(plan) / duration, 2),
+        'info_p95_ms': round(percentile([r['latency'] for r in ok if r['kind'] == 'info'], 95) * 1000, 1),
+        'download_p95_ms': round(percentile([r['latency'] for r in ok if r['kind'] == 'download'], 95) * 1000, 1),
+        'mean_service_s': sum(r['latency'] for r in ok) / len(ok) if ok else 0.0,
+        'statuses': _count_statuses(results),
+    })
+
+    if stats:
+        with stats.lock:
+            delays = list(stats.queue_delays)
+            busy = list(stats.busy_samples) or [0]
+        row.update({
+            'queue_p50_ms': round(percentile(delays, 50) * 1000, 1),
+            'queue_p95_ms': round(percentile(delays, 95) * 1000, 1),
+            'occupancy_mean': round(sum(busy) / len(busy) / stats.workers, 2),
+            'occupancy_max': round(max(busy) / stats.workers, 2),
+        })
+    return row
+
+
+def _count_statuses(results: List[Dict[str, Any]]) -> Dict[str, int]:
+    counts: Dict[str, int] = {}
+    for r in results:
+        counts[str(r['status'])] = counts.get(str(r['status']), 0) + 1
+    return counts
+
+
+def recommend_workers(rows: List[Dict[str, Any]], target_utilization: float) -> Optional[int]:
+    """Lei de Little: workers = taxa de pico sustentável x tempo médio de serviço / utilização alvo"""
+    sustained = [r for r in rows if not r.get('saturated')]
+    if not sustained:
+        return None
+    peak = max(sustained, key=lambda r: r['throughput_rps'])
+    return max(1, math.ceil(peak['offered_rps'] * peak['mean_service_s'] / target_utilization))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Teste de carga com tráfego misto de info/download')
+    parser.add_argument('--target', default=None, help='URL de um servidor já rodando (padrão: app em processo)')
+    parser.add_argument('--workers', type=int, default=4, help='workers do servidor em processo')
+    parser.add_argument('--rates', default='2,5,10,20,40', help='taxas de chegada (req/s) por degrau')
+    parser.add_argument('--duration', type=float, default=10.0, help='duração de cada degrau (s)')
+    parser.add_argument('--info-ratio', type=float, default=0.9, help='fração de requisições /api/info')
+    parser.add_argument('--burst-prob', type=float, default=0.05, help='probabilidade de uma chegada virar rajada duplicada')
+    parser.add_argument('--burst-size', type=int, default=5, help='requisições idênticas por rajada')
+    parser.add_argument('--slow-client-ratio', type=float, default=0.2, help='fração dos downloads com cliente lento')
+    parser.add_argument('--slow-read-delay', type=float, default=0.02, help='pausa do cliente lento a cada 64KB (s)')
+    parser.add_argument('--format-id', default='18', help='formato pedido nos downloads')
+    parser.add_argument('--media-size', type=int, default=8 * 1024 * 1024, help='tamanho da mídia no stand-in (bytes)')
+    parser.add_argument('--upstream-latency', type=float, default=50.0, help='latência do upstream local (ms)')
+    parser.add_argument('--slo-ms', type=float, default=2000.0, help='p95 máximo aceitável antes de considerar saturado')
+    parser.add_argument('--target-utilization', type=float, default=0.7, help='utilização alvo dos workers na recomendação')
+    parser.add_argument('--timeout', type=float, default=60.0, help='timeout de cada requisição (s)')
+    parser.add_argument('--seed', type=int, default=1234, help='semente do gerador de tráfego')
+    parser.add_argument('--history', default=None, help='arquivo JSONL onde registrar o resultado')
+    args = parser.parse_args(argv)
+
+    rates = [float(r) for r in args.rates.split(',')]
+    mix = TrafficMix(args.seed, args.info_ratio, args.burst_prob, args.burst_size,
+                     args.slow_client_ratio, DEFAULT_VIDEO_IDS, args.format_id)
+
+    stand_in = server = stats = None
+    if args.target:
+        base_url = args.target.rstrip('/')
+    else:
+        stand_in = StandInYouTube(media_size=args.media_size, latency_ms=args.upstream_latency).start()
+        install_stand_in_ytdlp(stand_in.base_url)
+        stats = ServerStats(args.workers)
+        server = make_pooled_server('127.0.0.1', 0, InstrumentedApp(create_youtube_app(), stats), args.workers)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f'http://127.0.0.1:{server.server_address[1]}'
+
+    rows = []
+    try:
+        for rate in rates:
+            row = run_step(base_url, rate, args.duration, mix, args, stats)
+            row['rate'] = rate
+            row['saturated'] = row['throughput_rps'] < 0.9 * row['offered_rps'] or row['p95_ms'] > args.slo_ms
+            rows.append(row)
+            print(f"{rate:g} req/s: {row['throughput_rps']} req/s atingidos, p95={row['p95_ms']}ms, "
+                  f"erros={row['error_rate']:.1%}, fila p95={row.get('queue_p95_ms', '-')}ms, "
+                  f"ocupação={row.get('occupancy_mean', '-')}{' SATURADO' if row['saturated'] else ''}")
+    finally:
+        if server:
+            server.shutdown()
+        if stand_in:
+            stand_in.stop()
+
+    print()
+    print_table(rows, ['rate', 'offered_rps', 'throughput_rps', 'p50_ms', 'p95_ms', 'p99_ms', 'info_p95_ms',
+                       'download_p95_ms', 'error_rate', 'queue_p50_ms', 'queue_p95_ms', 'occupancy_mean',
+                       'occupancy_max', 'saturated'])
+
+    saturation = next((r['rate'] for r in rows if r['saturated']), None)
+    print()
+    if saturation is None:
+        print('Nenhum degrau saturou; aumente --rates para encontrar o limite.')
+    else:
+        print(f'Ponto de saturação: {saturation:g} req/s' + (f' com {args.workers} workers' if not args.target else ''))
+    workers = recommend_workers(rows, args.target_utilization)
+    if workers:
+        print(f'Workers recomendados para a maior taxa sustentada ({args.target_utilization:.0%} de utilização): {workers}')
+
+    if args.history:
+        append_history(args.history, 'load', [dict(r, workers=args.workers) for r in rows])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+# benchmarks/stand_in_redis.py
+
+"""
+Servidor local compatível com o protocolo RESP do Redis, para testar o RedisBackend sem Redis.
+
+Implementa o subconjunto usado pelo cache (PING, GET, SET com EX/PX/NX, DEL, PTTL, EXPIRE,
+SELECT, AUTH, FLUSHDB, DBSIZE). Também pode ser executado avulso:
+
+  python -m benchmarks.stand_in_redis --port 6379
+"""
+
+import argparse
+import socketserver
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+
+class StandInRedis:
+    """Servidor RESP em memória, multi-thread"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency_ms: float = 0.0):
+        self.latency_ms = latency_ms
+        self.command_counts: Dict[str, int] = {}
+        self._data: Dict[bytes, Tuple[bytes, Optional[float]]] = {}
+        self._lock = threading.Lock()
+
+        stand_in = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                while True:
+                    try:
+                        args = stand_in._read_command(self.rfile)
+                    except (ConnectionError, ValueError):
+                        return
+                    if args is None:
+                        return
+                    self.wfile.write(stand_in._dispatch(args))
+                    self.wfile.flush()
+
+        class Server(socketserver.ThreadingTCPServer):
+            daemon_threads = True
+            allow_reuse_address = True
+
+        self.server = Server((host, port), Handler)
+        self.host, self.port = self.server.server_address[:2]
+        self.url = f'redis://{self.host}:{self.port}/0'
+        self._thread = None
+
+    def start(self) -> 'StandInRedis':
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def flush(self):
+        """Apaga todas as chaves"""
+        with self._lock:
+            self._data.clear()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # Protocolo
+
+    @staticmethod
+    def _read_command(reader):
+        line = reader.readline()
+        if not line:
+            return None
+        if not line.startswith(b'*'):
+            # Comando inline (ex.: "PING\r\n" digitado no telnet)
+            return line.strip().split()
+        args = []
+        for _ in range(int(line[1:-2])):
+            header = reader.readline()
+            if not header.startswith(b'$'):
+                raise ValueError('Bulk string esperada')
+            length = int(header[1:-2])
+            args.append(reader.read(length + 2)[:-2])
+        return args
+
+    @staticmethod
+    def _bulk(value: Optional[bytes]) -> bytes:
+        if value is None:
+            return b'$-1\r\n'
+        return b'$%d\r\n%s\r\n' % (len(value), value)
+
+    def _live(self, key: bytes) -> Optional[Tuple[bytes, Optional[float]]]:
+        entry = self._data.get(key)
+        if entry and entry[1] is not None and entry[1] <= time.time():
+            del self._data[key]
+            return None
+        return entry
+
+    def _dispatch(self, args) -> bytes:
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000.0)
+        name = args[0].upper().decode()
+        with self._lock:
+            self.command_counts[name] = self.command_counts.get(name, 0) + 1
+            if name == 'PING':
+                return b'+PONG\r\n'
+            if name in ('SELECT', 'AUTH'):
+                return b'+OK\r\n'
+            if name == 'GET':
+                entry = self._live(args[1])
+                return self._bulk(entry[0] if entry else None)
+            if name == 'SET':
+                expires_at = None
+                options = [a.upper() for a in args[3:]]
+                if b'NX' in options and self._live(args[1]) is not None:
+                    return self._bulk(None)
+                for i, option in enumerate(options):
+                    if option == b'EX':
+                        expires_at = time.time() + int(args[4 + i])
+                    elif option == b'PX':
+                        expires_at = time.time() + int(args[4 + i]) / 1000.0
+                self._data[args[1]] = (args[2], expires_at)
+                return b'+OK\r\n'
+            if name == 'DEL':
+                removed = sum(1 for key in args[1:] if self._data.pop(key, None) is not None)
+                return b':%d\r\n' % removed
+            if name == 'PTTL':
+                entry = self._live(args[1])
+                if entry is None:
+                    return b':-2\r\n'
+                if entry[1] is None:
+                    return b':-1\r\n'
+                return b':%d\r\n' % int((entry[1] - time.time()) * 1000)
+            if name == 'EXPIRE':
+                entry = self._live(args[1])
+                if entry is None:
+                    return b':0\r\n'
+                self._data[args[1]] = (entry[0], time.time() + int(args[2]))
+                return b':1\r\n'
+            if name == 'DBSIZE':
+                return b':%d\r\n' % len(self._data)
+            if name == 'FLUSHDB':
+                self._data.clear()
+                return b'+OK\r\n'
+        return b'-ERR unknown command \'%s\'\r\n' % name.encode()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Servidor local compatível com Redis (RESP)')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=6379)
+    args = parser.parse_args(argv)
+
+    stand_in = StandInRedis(args.host, args.port)
+    print(f"Stand-in Redis ouvindo em {stand_in.url}")
+    try:
+        stand_in.server.serve_forever()
+    except KeyboardInterrupt:
+        stand_in.server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,306 @@
+# benchmarks/stand_in_youtube.py
+
+"""
+Servidor HTTP local que substitui o YouTube nos benchmarks offline.
+
+Serve páginas de watch, JSON do oEmbed, info_dicts do yt-dlp e arquivos de mídia
+(com suporte a Range), além de um substituto do yt_dlp.YoutubeDL que consome esse
+servidor em vez da rede.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List, Optional
+from urllib.parse import urlparse, parse_qs
+
+from .fixtures import make_info_dict, make_oembed, make_watch_page
+
+VIDEO_ID_PATTERN = re.compile(r'(?:v=|youtu\.be/|shorts/|embed/|/info/|/media/)([a-zA-Z0-9_-]{11})')
+
+
+class StandInYouTube:
+    """Servidor local com respostas pré-geradas do YouTube"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, media_size: int = 4 * 1024 * 1024,
+                 latency_ms: float = 0.0, oembed_status: int = 200, watch_status: int = 200,
+                 page_size_kb: int = 900, media_chunk_size: int = 256 * 1024):
+        self.media_size = media_size
+        self.latency_ms = latency_ms
+        self.oembed_status = oembed_status
+        self.watch_status = watch_status
+        self.page_size_kb = page_size_kb
+        self.media_chunk_size = media_chunk_size
+        self.request_counts: Dict[str, int] = {}
+        self._cache: Dict[Any, bytes] = {}
+        self._lock = threading.Lock()
+        # Bloco de mídia reutilizado para não alocar memória a cada requisição
+        self._media_block = bytes(range(256)) * (media_chunk_size // 256 + 1)
+
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                stand_in._handle(self)
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.base_url = f'http://{host}:{self.server.server_address[1]}'
+        self._thread = None
+
+    def start(self) -> 'StandInYouTube':
+        """Inicia o servidor em uma thread de fundo"""
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Encerra o servidor"""
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _cached(self, key, factory) -> bytes:
+        """Gera a resposta uma única vez e reaproveita os bytes"""
+        with self._lock:
+            if key not in self._cache:
+                self._cache[key] = factory()
+            return self._cache[key]
+
+    def _count(self, kind: str):
+        with self._lock:
+            self.request_counts[kind] = self.request_counts.get(kind, 0) + 1
+
+    def _send(self, handler, status: int, body: bytes, content_type: str):
+        handler.send_response(status)
+        handler.send_header('Content-Type', content_type)
+        handler.send_header('Content-Length', str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def _handle(self, handler):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000.0)
+
+        parsed = urlparse(handler.path)
+        query = parse_qs(parsed.query)
+
+        try:
+            if parsed.path == '/watch':
+                self._count('watch')
+                video_id = query.get('v', [''])[0]
+                if self.watch_status != 200:
+                    return self._send(handler, self.watch_status, b'', 'text/html')
+                body = self._cached(('watch', video_id), lambda: make_watch_page(video_id, self.page_size_kb).encode('utf-8'))
+                return self._send(handler, 200, body, 'text/html; charset=utf-8')
+
+            if parsed.path == '/oembed':
+                self._count('oembed')
+                match = VIDEO_ID_PATTERN.search(query.get('url', [''])[0])
+                if self.oembed_status != 200 or not match:
+                    return self._send(handler, self.oembed_status if match else 400, b'Forbidden', 'text/plain')
+                video_id = match.group(1)
+                body = self._cached(('oembed', video_id), lambda: json.dumps(make_oembed(video_id)).encode('utf-8'))
+                return self._send(handler, 200, body, 'application/json')
+
+            if parsed.path.startswith('/api/info/'):
+                self._count('info')
+                video_id = parsed.path.rsplit('/', 1)[-1]
+                body = self._cached(('info', video_id), lambda: json.dumps(
+                    make_info_dict(video_id, base_url=self.base_url, media_size=self.media_size)
+                ).encode('utf-8'))
+                return self._send(handler, 200, body, 'application/json')
+
+            if parsed.path.startswith('/media/'):
+                self._count('media')
+                return self._send_media(handler)
+
+            self._send(handler, 404, b'Not Found', 'text/plain')
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _send_media(self, handler):
+        """Serve mídia sintética, respeitando o header Range"""
+        start, end = 0, self.media_size - 1
+        status = 200
+        range_header = handler.headers.get('Range')
+        if range_header:
+            match = re.match(r'bytes=(\d*)-(\d*)', range_header)
+            if match:
+                if match.group(1):
+                    start = int(match.group(1))
+                    if match.group(2):
+                        end = min(int(match.group(2)), end)
+                elif match.group(2):
+                    start = max(0, self.media_size - int(match.group(2)))
+                status = 206
+
+        length = end - start + 1
+        handler.send_response(status)
+        handler.send_header('Content-Type', 'video/mp4')
+        handler.send_header('Content-Length', str(length))
+        handler.send_header('Accept-Ranges', 'bytes')
+        if status == 206:
+            handler.send_header('Content-Range', f'bytes {start}-{end}/{self.media_size}')
+        handler.end_headers()
+
+        remaining = length
+        block = memoryview(self._media_block)
+        while remaining > 0:
+            size = min(remaining, self.media_chunk_size)
+            handler.wfile.write(block[:size])
+            remaining -= size
+
+
+class StandInYoutubeDL:
+    """Substituto do yt_dlp.YoutubeDL que extrai e baixa do servidor local"""
+
+    base_url: Optional[str] = None
+
+    def __init__(self, params: Optional[Dict[str, Any]] = None, auto_init: bool = True):
+        self.params = params or {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def extract_info(self, url: str, download: bool = True, **kwargs) -> Dict[str, Any]:
+        match = VIDEO_ID_PATTERN.search(url)
+        if not match:
+            raise _download_error(f'ERROR: Unsupported URL: {url}')
+        with urllib.request.urlopen(f'{self.base_url}/api/info/{match.group(1)}') as response:
+            info = json.loads(response.read())
+        if download:
+            self.process_ie_result(info, download=True)
+        return info
+
+    def process_ie_result(self, info: Dict[str, Any], download: bool = True, **kwargs) -> Dict[str, Any]:
+        if download:
+            self._download(info)
+        return info
+
+    def download(self, urls: List[str]) -> int:
+        for url in urls:
+            self.extract_info(url, download=True)
+        return 0
+
+    def prepare_filename(self, info: Dict[str, Any], **kwargs) -> str:
+        outtmpl = self.params.get('outtmpl', '%(title)s [%(id)s].%(ext)s')
+        if isinstance(outtmpl, dict):
+            outtmpl = outtmpl.get('default')
+        return outtmpl % info
+
+    def _select_formats(self, info: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Interpreta o seletor de formato de forma simplificada (primeira alternativa que casar)"""
+        formats = [f for f in info.get('formats', []) if f.get('protocol') == 'https']
+        by_id = {f['format_id']: f for f in formats}
+        audio = sorted((f for f in formats if f.get('vcodec') == 'none'), key=lambda f: (f.get('ext') != 'm4a', -(f.get('abr') or 0)))
+        video = sorted((f for f in formats if f.get('vcodec') != 'none'), key=lambda f: -(f.get('height') or 0))
+        combined = [f for f in video if f.get('acodec') not in (None, 'none')]
+
+        for alternative in self.params.get('format', 'best').split('/'):
+            selected = []
+            for part in alternative.split('+'):
+                name = part.split('[')[0]
+                if name in by_id:
+                    selected.append(by_id[name])
+                elif name in ('bestaudio', 'ba') and audio:
+                    selected.append(audio[0])
+                elif name in ('bv', 'bestvideo') and video:
+                    selected.append(video[0])
+                elif name in ('best', 'b') and combined:
+                    selected.append(combined[0])
+            if selected and len(selected) == len(alternative.split('+')):
+                return selected
+        raise _download_error('ERROR: Requested format is not available')
+
+    def _download(self, info: Dict[str, Any]):
+        selected = self._select_formats(info)
+        merge_ext = self.params.get('merge_output_format') or 'mp4'
+        final_info = dict(info, ext=selected[0]['ext'] if len(selected) == 1 else merge_ext)
+        final_path = self.prepare_filename(final_info)
+        os.makedirs(os.path.dirname(final_path) or '.', exist_ok=True)
+
+        parts = []
+        for fmt in selected:
+            path = final_path if len(selected) == 1 else f'{os.path.splitext(final_path)[0]}.f{fmt["format_id"]}.{fmt["ext"]}'
+            self._fetch(fmt, path, dict(info, **fmt))
+            parts.append(path)
+
+        if len(parts) > 1:
+            self._run_pp_hooks('started', 'Merger', final_info)
+            with open(final_path, 'wb') as out:
+                for path in parts:
+                    with open(path, 'rb') as f:
+                        while True:
+                            chunk = f.read(1024 * 1024)
+                            if not chunk:
+                                break
+                            out.write(chunk)
+                    if not self.params.get('keepvideo'):
+                        os.remove(path)
+            self._run_pp_hooks('finished', 'Merger', dict(final_info, filepath=final_path))
+
+        for hook in self.params.get('post_hooks', []):
+            hook(final_path)
+
+    def _run_pp_hooks(self, status: str, postprocessor: str, info: Dict[str, Any]):
+        for hook in self.params.get('postprocessor_hooks', []):
+            hook({'status': status, 'postprocessor': postprocessor, 'info_dict': info})
+
+    def _fetch(self, fmt: Dict[str, Any], path: str, info: Dict[str, Any]):
+        """Baixa um formato chamando os progress_hooks como o yt-dlp faria"""
+        hooks = self.params.get('progress_hooks', [])
+        part_path = path + '.part'
+        started = time.time()
+        downloaded = 0
+        with urllib.request.urlopen(fmt['url']) as response, open(part_path, 'wb') as out:
+            total = int(response.headers.get('Content-Length') or 0)
+            while True:
+                chunk = response.read(256 * 1024)
+                if not chunk:
+                    break
+                out.write(chunk)
+                downloaded += len(chunk)
+                elapsed = max(time.time() - started, 1e-6)
+                speed = downloaded / elapsed
+                for hook in hooks:
+                    hook({
+                        'status': 'downloading', 'filename': path, 'tmpfilename': part_path,
+                        'downloaded_bytes': downloaded, 'total_bytes': total or None,
+                        'elapsed': elapsed, 'speed': speed,
+                        'eta': (total - downloaded) / speed if total and speed else None,
+                        'info_dict': info,
+                    })
+        os.replace(part_path, path)
+        for hook in hooks:
+            hook({'status': 'finished', 'filename': path, 'downloaded_bytes': downloaded,
+                  'total_bytes': downloaded, 'elapsed': time.time() - started, 'info_dict': info})
+
+
+def _download_error(message: str) -> Exception:
+    import yt_dlp
+    return yt_dlp.utils.DownloadError(message)
+
+
+def install_stand_in_ytdlp(base_url: str):
+    """Faz todo uso de yt_dlp.YoutubeDL no processo apontar para o servidor local"""
+    import yt_dlp
+    StandInYoutubeDL.base_url = base_url
+    yt_dlp.YoutubeDL = StandInYoutubeDL
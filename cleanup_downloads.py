@@ -1,38 +1,53 @@
 #!/usr/bin/env python3
 """
 Script para limpar arquivos de download corrompidos ou incompletos
+
+Faz manualmente uma varredura do mesmo janitor que roda em segundo plano no servidor
+(src/utils/disk_manager.py). Diretórios de servidores ainda em execução (owner.pid de um
+processo vivo) são pulados, assim como o cache de mídia, e só artefatos mais velhos que
+`--min-age` são removidos, para não apagar downloads em andamento.
 """
 
 import os
+import sys
 import glob
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.utils.disk_manager import DownloadJanitor, owner_alive
+
+# Idade mínima padrão dos artefatos removidos (a mesma do janitor do servidor)
+DEFAULT_MIN_AGE = int(os.environ.get('DOWNLOADS_ORPHAN_AGE', 1800))
 
-def cleanup_downloads():
-    """Remove arquivos temporários e corrompidos da pasta de downloads"""
-    downloads_dir = os.path.join('src', 'downloads')
-    
-    if not os.path.exists(downloads_dir):
+def cleanup_downloads(directories=None, min_age=DEFAULT_MIN_AGE):
+    """Remove arquivos temporários e corrompidos das pastas de downloads"""
+    if not directories:
+        # Diretórios criados pelo servidor (tempfile.mkdtemp) e a pasta legada src/downloads
+        directories = glob.glob(os.path.join(tempfile.gettempdir(), 'youtube_downloader_*'))
+        directories.append(os.path.join('src', 'downloads'))
+
+    directories = [d for d in directories if os.path.isdir(d)]
+    if not directories:
         print("Pasta de downloads não encontrada.")
         return
-    
-    # Padrões de arquivos para remover
-    patterns_to_remove = [
-        '*.part',      # Arquivos parciais
-        '*.temp.*',    # Arquivos temporários
-        '*.f[0-9]*.*', # Arquivos de formato específico (geralmente sem áudio)
-    ]
-    
+
     removed_files = []
-    
-    for pattern in patterns_to_remove:
-        files = glob.glob(os.path.join(downloads_dir, pattern))
-        for file_path in files:
-            try:
-                os.remove(file_path)
-                removed_files.append(os.path.basename(file_path))
-                print(f"Removido: {os.path.basename(file_path)}")
-            except Exception as e:
-                print(f"Erro ao remover {file_path}: {e}")
-    
+
+    for downloads_dir in directories:
+        if owner_alive(downloads_dir):
+            print(f"Pulado (servidor em execução): {downloads_dir}")
+            continue
+        # O cache de mídia tem LRU e TTL próprios e não é varrido
+        exclude = [os.path.join(downloads_dir, 'media_cache')]
+        if os.environ.get('MEDIA_CACHE_DIR'):
+            exclude.append(os.environ['MEDIA_CACHE_DIR'])
+        janitor = DownloadJanitor(downloads_dir, orphan_age=min_age, exclude=exclude)
+        for file_path in janitor.reap_once():
+            removed_files.append(file_path)
+            print(f"Removido: {file_path}")
+
     if removed_files:
         print(f"\nTotal de {len(removed_files)} arquivos removidos.")
         print("Agora tente baixar o vídeo novamente.")
@@ -40,4 +55,9 @@ def cleanup_downloads():
         print("Nenhum arquivo temporário encontrado para remover.")
 
 if __name__ == "__main__":
-    cleanup_downloads()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Remove artefatos de downloads falhos ou interrompidos')
+    parser.add_argument('directories', nargs='*', help='pastas de downloads (padrão: as do servidor e src/downloads)')
+    parser.add_argument('--min-age', type=float, default=DEFAULT_MIN_AGE,
+                        help=f'idade mínima (s) dos artefatos removidos (padrão: {DEFAULT_MIN_AGE})')
+    args = parser.parse_args()
+    cleanup_downloads(args.directories, args.min_age)
@@ -3,11 +3,15 @@ import sys
 # DON'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from flask import Flask, send_from_directory
+from flask import Flask, request
 from flask_cors import CORS
 from src.models.user import db
 from src.routes.user import user_bp
-from src.routes.youtube import youtube_bp
+from src.routes.youtube import youtube_bp, metadata_cache, extract_info_cached, prefetch_media
+from src.routes.stats import stats_bp
+from src.utils.download_history import download_history
+from src.utils.cache_warmer import CacheWarmer, parse_hour_window
+from src.utils.static_assets import StaticAssets
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
 app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
@@ -17,29 +21,45 @@ CORS(app)
 
 app.register_blueprint(user_bp, url_prefix='/api')
 app.register_blueprint(youtube_bp, url_prefix='/api')
+app.register_blueprint(stats_bp, url_prefix='/api')
 
 # uncomment if you need to use database
+# O SQLite cria o arquivo, mas não o diretório
+os.makedirs(os.path.join(os.path.dirname(__file__), 'database'), exist_ok=True)
 app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 db.init_app(app)
 with app.app_context():
     db.create_all()
 
+# Histórico de downloads gravado em lotes por uma thread de fundo
+download_history.batch_size = int(os.environ.get('DOWNLOAD_HISTORY_BATCH_SIZE', 200))
+download_history.flush_interval = float(os.environ.get('DOWNLOAD_HISTORY_FLUSH_INTERVAL', 2.0))
+download_history.init_app(app)
+
+# Pré-aquecimento dos caches com os vídeos mais populares, fora do horário de pico
+if os.environ.get('CACHE_WARMER_ENABLED', '0') == '1':
+    cache_warmer = CacheWarmer(
+        app,
+        download_history,
+        warm_metadata=lambda video_id: extract_info_cached(video_id, refresh=True),
+        metadata_expires_in=metadata_cache.expires_in,
+        prefetch=prefetch_media if os.environ.get('CACHE_WARMER_MEDIA', '0') == '1' else None,
+        interval=float(os.environ.get('CACHE_WARMER_INTERVAL', 600)),
+        top_n=int(os.environ.get('CACHE_WARMER_TOP_N', 20)),
+        off_peak_hours=parse_hour_window(os.environ.get('CACHE_WARMER_HOURS')),
+    ).start()
+
+# Arquivos estáticos pré-carregados (e pré-comprimidos) na inicialização
+static_assets = StaticAssets(app.static_folder)
+
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
 def serve(path):
-    static_folder_path = app.static_folder
-    if static_folder_path is None:
-            return "Static folder not configured", 404
-
-    if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
-        return send_from_directory(static_folder_path, path)
-    else:
-        index_path = os.path.join(static_folder_path, 'index.html')
-        if os.path.exists(index_path):
-            return send_from_directory(static_folder_path, 'index.html')
-        else:
-            return "index.html not found", 404
+    response = static_assets.serve(path, request)
+    if response is None:
+        return "index.html not found", 404
+    return response
 
 
 # Para desenvolvimento local
@@ -3,11 +3,10 @@ import sys
 # DON'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from flask import Flask, send_from_directory
+from flask import Flask, request
 from flask_cors import CORS
-from src.models.user import db
-from src.routes.user import user_bp
 from src.routes.youtube_serverless import youtube_bp
+from src.utils.static_assets import StaticAssets
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
 app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
@@ -15,31 +14,31 @@ app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
 # Configurar CORS
 CORS(app)
 
-app.register_blueprint(user_bp, url_prefix='/api')
 app.register_blueprint(youtube_bp, url_prefix='/api')
 
-# uncomment if you need to use database
-app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-db.init_app(app)
-with app.app_context():
-    db.create_all()
+# Nenhuma rota serverless usa o banco: SQLAlchemy e as rotas de usuário só são carregados
+# (e o db.create_all executado) quando ENABLE_DATABASE=1, evitando esse custo no cold start
+if os.environ.get('ENABLE_DATABASE', '0') == '1':
+    from src.models.user import db
+    from src.routes.user import user_bp
+
+    app.register_blueprint(user_bp, url_prefix='/api')
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+
+# Arquivos estáticos pré-carregados (e pré-comprimidos) na inicialização
+static_assets = StaticAssets(app.static_folder)
 
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
 def serve(path):
-    static_folder_path = app.static_folder
-    if static_folder_path is None:
-            return "Static folder not configured", 404
-
-    if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
-        return send_from_directory(static_folder_path, path)
-    else:
-        index_path = os.path.join(static_folder_path, 'index.html')
-        if os.path.exists(index_path):
-            return send_from_directory(static_folder_path, 'index.html')
-        else:
-            return "index.html not found", 404
+    response = static_assets.serve(path, request)
+    if response is None:
+        return "index.html not found", 404
+    return response
 
 # Health check endpoint for serverless
 @app.route('/health')
@@ -0,0 +1,39 @@
+from datetime import datetime
+from src.models.user import db
+
+class DownloadRecord(db.Model):
+    __tablename__ = 'download_record'
+    __table_args__ = (
+        # Consultas de estatísticas sempre filtram por período
+        db.Index('ix_download_record_kind_created', 'kind', 'created_at'),
+        db.Index('ix_download_record_video_created', 'video_id', 'created_at'),
+        db.Index('ix_download_record_status_created', 'status', 'created_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    video_id = db.Column(db.String(16), nullable=False, index=True)
+    format_id = db.Column(db.String(32), index=True)
+    kind = db.Column(db.String(16), nullable=False, default='download')  # 'info' ou 'download'
+    status = db.Column(db.String(16), nullable=False)  # 'success', 'error', 'rejected'
+    http_status = db.Column(db.Integer)
+    bytes_served = db.Column(db.BigInteger, nullable=False, default=0)
+    duration_ms = db.Column(db.Integer)
+    error = db.Column(db.String(255))
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+    def __repr__(self):
+        return f'<DownloadRecord {self.kind} {self.video_id} {self.status}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'video_id': self.video_id,
+            'format_id': self.format_id,
+            'kind': self.kind,
+            'status': self.status,
+            'http_status': self.http_status,
+            'bytes_served': self.bytes_served,
+            'duration_ms': self.duration_ms,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
@@ -0,0 +1,144 @@
+import json
+import sys
+from typing import Any, Dict, Iterable, Optional
+
+
+def _intern(value):
+    # Codecs, extensões e notas se repetem em milhares de entradas: uma cópia só de cada string
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class FormatRecord:
+    """
+    Formato de um vídeo com apenas os campos usados pela API, pelo seletor de formato e pela
+    estimativa de disco. Aceita `get()` e `[]` como o dict do yt-dlp, então as funções que
+    recebem formatos do yt-dlp funcionam sem mudança.
+    """
+
+    __slots__ = ('format_id', 'ext', 'height', 'width', 'fps', 'vcodec', 'acodec', 'format_note',
+                 'filesize', 'filesize_approx', 'tbr', 'abr')
+
+    def __init__(self, format_id=None, ext=None, height=None, width=None, fps=None, vcodec=None, acodec=None,
+                 format_note=None, filesize=None, filesize_approx=None, tbr=None, abr=None):
+        self.format_id = format_id
+        self.ext = _intern(ext)
+        self.height = height
+        self.width = width
+        self.fps = fps
+        self.vcodec = _intern(vcodec)
+        self.acodec = _intern(acodec)
+        self.format_note = _intern(format_note)
+        self.filesize = filesize
+        self.filesize_approx = filesize_approx
+        self.tbr = tbr
+        self.abr = abr
+
+    @classmethod
+    def from_format(cls, fmt: Dict[str, Any]) -> 'FormatRecord':
+        get = fmt.get
+        return cls(get('format_id'), get('ext'), get('height'), get('width'), get('fps'), get('vcodec'),
+                   get('acodec'), get('format_note'), get('filesize'), get('filesize_approx'), get('tbr'), get('abr'))
+
+    def get(self, key: str, default=None):
+        value = getattr(self, key, None) if key in self.__slots__ else None
+        return default if value is None else value
+
+    def __getitem__(self, key: str):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def to_list(self) -> list:
+        return [getattr(self, field) for field in self.__slots__]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def __repr__(self):
+        return f'<FormatRecord {self.format_id} {self.ext} {self.height}p>'
+
+
+class VideoInfo:
+    """
+    Metadados de um vídeo reduzidos ao que a API devolve (título, duração, canal, formatos...).
+
+    O info_dict completo do yt-dlp traz URLs assinadas, fragmentos, thumbnails e headers de
+    cada formato; é isso que ocupa a maior parte da memória quando milhares de vídeos ficam
+    em cache. Como o FormatRecord, responde a `get()` e `[]` no lugar do info_dict.
+    """
+
+    __slots__ = ('id', 'title', 'duration', 'uploader', 'view_count', 'description', 'upload_date',
+                 'thumbnail', 'webpage_url', 'formats')
+
+    # O /info mostra 200 caracteres; os metadados embutidos no arquivo usam até 1000
+    DESCRIPTION_LIMIT = 1000
+
+    def __init__(self, id: str = '', title: Optional[str] = None, duration: Optional[float] = None,
+                 uploader: Optional[str] = None, view_count: Optional[int] = None,
+                 description: Optional[str] = None, upload_date: Optional[str] = None,
+                 thumbnail: Optional[str] = None, webpage_url: Optional[str] = None,
+                 formats: Iterable[FormatRecord] = ()):
+        self.id = id
+        self.title = title
+        self.duration = duration
+        self.uploader = uploader
+        self.view_count = view_count
+        self.description = description[:self.DESCRIPTION_LIMIT] if description else description
+        self.upload_date = upload_date
+        self.thumbnail = thumbnail
+        self.webpage_url = webpage_url
+        self.formats = tuple(formats)
+
+    @classmethod
+    def from_info_dict(cls, info: Dict[str, Any], formats: Optional[Iterable[Dict[str, Any]]] = None) -> 'VideoInfo':
+        """
+        Converte o info_dict do yt-dlp (já compacto: retorna o próprio objeto).
+        `formats` restringe os formatos guardados quando o chamador só precisa de alguns.
+        """
+        if isinstance(info, cls):
+            return info
+        return cls(
+            id=info.get('id', ''),
+            title=info.get('title'),
+            duration=info.get('duration'),
+            uploader=info.get('uploader'),
+            view_count=info.get('view_count'),
+            description=info.get('description'),
+            upload_date=info.get('upload_date'),
+            thumbnail=info.get('thumbnail'),
+            webpage_url=info.get('webpage_url'),
+            formats=[FormatRecord.from_format(fmt) for fmt in (info.get('formats') or [] if formats is None else formats)],
+        )
+
+    def get(self, key: str, default=None):
+        value = getattr(self, key, None) if key in self.__slots__ else None
+        return default if value is None else value
+
+    def __getitem__(self, key: str):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {field: getattr(self, field) for field in self.__slots__ if field != 'formats'}
+        data['formats'] = [fmt.to_dict() for fmt in self.formats]
+        return data
+
+    # Serialização para o L2 do cache: formatos como listas posicionais (sem repetir as chaves)
+
+    def dumps(self) -> bytes:
+        data = {field: getattr(self, field) for field in self.__slots__ if field != 'formats'}
+        data['formats'] = [fmt.to_list() for fmt in self.formats]
+        return json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+    @classmethod
+    def loads(cls, data: bytes) -> 'VideoInfo':
+        fields = json.loads(data)
+        if not set(fields) <= set(cls.__slots__) or any(isinstance(f, dict) for f in fields.get('formats', [])):
+            # Entrada gravada como info_dict completo (antes do formato compacto)
+            return cls.from_info_dict(fields)
+        formats = [FormatRecord(*values) for values in fields.pop('formats', [])]
+        return cls(formats=formats, **fields)
+
+    def __repr__(self):
+        return f'<VideoInfo {self.id} formats={len(self.formats)}>'
@@ -0,0 +1,31 @@
+from flask import Blueprint, jsonify, request
+from src.utils.download_history import download_history
+
+stats_bp = Blueprint('stats', __name__)
+
+def _window():
+    """Lê o período (horas) e o limite da query string"""
+    hours = min(max(request.args.get('hours', 24, type=float), 0), 24 * 90)
+    limit = min(max(request.args.get('limit', 10, type=int), 1), 100)
+    return hours, limit
+
+@stats_bp.route('/stats/summary', methods=['GET'])
+def get_summary():
+    hours, _ = _window()
+    return jsonify(download_history.totals(hours))
+
+@stats_bp.route('/stats/top-videos', methods=['GET'])
+def get_top_videos():
+    hours, limit = _window()
+    kind = request.args.get('kind')
+    return jsonify(download_history.top_videos(hours, limit, kind))
+
+@stats_bp.route('/stats/usage', methods=['GET'])
+def get_usage():
+    hours, _ = _window()
+    return jsonify(download_history.hourly_usage(hours))
+
+@stats_bp.route('/stats/failures', methods=['GET'])
+def get_failures():
+    hours, _ = _window()
+    return jsonify(download_history.failure_rates(hours))
@@ -2,17 +2,41 @@
 
 import os
 import re
+import copy
+import time
+import json
+import uuid
 import yt_dlp
 import atexit
 import shutil
+import threading
 import mimetypes
+from concurrent.futures.process import BrokenProcessPool
 from flask import Blueprint, request, jsonify, send_from_directory, Response
+from src.utils.disk_manager import (DownloadJanitor, DiskAdmission, InsufficientDiskSpace, estimate_download_size,
+                                    write_owner_pid)
+from src.utils.download_jobs import DownloadJob, in_active_job
+from src.utils.client_disconnect import DisconnectWatcher
+from src.utils.download_progress import ProgressBoard, ProgressTracker, TERMINAL_STAGES
+from src.utils.artifact_policy import ArtifactPolicy
+from src.utils.clip_range import ClipRange
+from src.utils.download_history import download_history, elapsed_ms
+from src.utils.metadata_cache import MetadataCache, MediaCache
+from src.utils.cache_backends import cache_from_url, MemoryBackend, TieredCache
+from src.utils.stream_urls import StreamURLCache, is_forbidden_error
+from src.utils.extraction_pool import ExtractionPool
+from src.utils.media_proxy import (UpstreamForbidden, RangedUpstream, best_audio, fragmented_merge, first_output,
+                                   process_error, relay_process)
+from src.utils.http_cache import conditional_json
+from src.models.video_info import VideoInfo
 
 youtube_bp = Blueprint('youtube_bp', __name__)
 
 # Diretório temporário para processar downloads
 import tempfile
 downloads_dir = tempfile.mkdtemp(prefix='youtube_downloader_')
+# O cleanup_downloads.py pula diretórios cujo dono ainda está rodando
+write_owner_pid(downloads_dir)
 
 # Função para limpar arquivos temporários ao sair
 def cleanup_temp_files():
@@ -22,10 +46,643 @@ def cleanup_temp_files():
 # Registra a função de limpeza para ser executada ao sair
 atexit.register(cleanup_temp_files)
 
+# Diretório do cache de mídia (abaixo); mesmo dentro de downloads_dir, é gerido só pelo MediaCache
+media_cache_dir = os.environ.get('MEDIA_CACHE_DIR') or os.path.join(downloads_dir, 'media_cache')
+
+# Remove periodicamente artefatos de downloads falhos ou abortados (.part, .f137.mp4, .info.json, thumbnails).
+# O cache de mídia fica de fora: a remoção por mtime passaria por cima do LRU dele
+janitor = DownloadJanitor(
+    downloads_dir,
+    orphan_age=int(os.environ.get('DOWNLOADS_ORPHAN_AGE', 1800)),
+    stale_age=int(os.environ.get('DOWNLOADS_STALE_AGE', 6 * 3600)),
+    interval=int(os.environ.get('DOWNLOADS_JANITOR_INTERVAL', 300)),
+    exclude=[media_cache_dir],
+    in_use=in_active_job,
+).start()
+
+# Controle de admissão: downloads só começam se o tamanho estimado couber no disco
+disk_admission = DiskAdmission(
+    downloads_dir,
+    min_free_bytes=int(os.environ.get('DOWNLOADS_MIN_FREE_BYTES', 512 * 1024 * 1024)),
+    wait_timeout=float(os.environ.get('DOWNLOADS_ADMISSION_WAIT', 30)),
+)
+
+# Cache em dois níveis: L1 no processo e L2 compartilhado entre workers/hosts (CACHE_BACKEND_URL).
+# Guarda VideoInfo compactos em vez do info_dict completo do yt-dlp
+shared_cache = cache_from_url(
+    os.environ.get('CACHE_BACKEND_URL'),
+    l1_entries=int(os.environ.get('METADATA_CACHE_SIZE', 256)),
+    dumps=VideoInfo.dumps,
+    loads=VideoInfo.loads,
+)
+
+# Cache de metadados compartilhado por /info e /download (e alimentado pelo cache warmer).
+# Entre o TTL e o METADATA_CACHE_STALE_TTL a entrada é servida e atualizada em segundo plano
+metadata_cache = MetadataCache(
+    ttl=float(os.environ.get('METADATA_CACHE_TTL', 1800)),
+    stale_ttl=float(os.environ.get('METADATA_CACHE_STALE_TTL', 6 * 3600)),
+    cache=shared_cache,
+)
+
+# URLs de mídia resolvidas por (vídeo, formato): downloads repetidos pulam a extração enquanto
+# a URL assinada não vence (expire - STREAM_URL_EXPIRY_MARGIN). Só no L1: as URLs do googlevideo
+# valem para o IP de saída que as pediu (ip=/ipbits=) e dariam 403 em outros hosts
+stream_cache = StreamURLCache(
+    TieredCache(MemoryBackend(int(os.environ.get('STREAM_URL_CACHE_SIZE', 256))), None),
+    margin=float(os.environ.get('STREAM_URL_EXPIRY_MARGIN', 1800)),
+)
+
+# Formatos que já têm áudio (sem merge) são repassados do servidor de mídia ao cliente,
+# sem passar pelo disco, em blocos de PASSTHROUGH_CHUNK_SIZE bytes
+PASSTHROUGH_ENABLED = os.environ.get('PASSTHROUGH_ENABLED', '1') == '1'
+PASSTHROUGH_CHUNK_SIZE = int(os.environ.get('PASSTHROUGH_CHUNK_SIZE', 1024 * 1024))
+# O upstream é lido em requisições Range de até PASSTHROUGH_WINDOW_SIZE bytes (o http_chunk_size
+# do yt-dlp): GETs do arquivo inteiro têm a velocidade limitada pelo googlevideo
+PASSTHROUGH_WINDOW_SIZE = int(os.environ.get('PASSTHROUGH_WINDOW_SIZE', 10 * 1024 * 1024))
+
+# Merges de vídeo + áudio saem do ffmpeg como MP4 fragmentado direto para o cliente
+STREAMING_MERGE_ENABLED = os.environ.get('STREAMING_MERGE_ENABLED', '1') == '1'
+# Prazo (s) para o ffmpeg produzir o primeiro byte; depois dele o merge volta para o yt-dlp
+STREAMING_MERGE_FIRST_BYTE_TIMEOUT = float(os.environ.get('STREAMING_MERGE_FIRST_BYTE_TIMEOUT', 20))
+
+# Clipes (start/end no /download) cortados no tempo exato, recodificando o vídeo; por padrão
+# o corte cai no keyframe mais próximo e o stream é só copiado
+CLIP_FORCE_KEYFRAMES = os.environ.get('CLIP_FORCE_KEYFRAMES', '0') == '1'
+
+# Extrações de metadados em EXTRACTION_WORKERS processos (0 = no próprio processo, em threads):
+# a parte presa à CPU do yt-dlp deixa de disputar o GIL com as outras requisições
+EXTRACTION_OPTS = {
+    'quiet': True,
+    'no_warnings': True,
+}
+EXTRACTION_WORKERS = int(os.environ.get('EXTRACTION_WORKERS', 0))
+extraction_pool = ExtractionPool(EXTRACTION_WORKERS, EXTRACTION_OPTS) if EXTRACTION_WORKERS > 0 else None
+if extraction_pool is not None:
+    atexit.register(extraction_pool.shutdown)
+
+# Progresso dos downloads em andamento, lido pelo SSE de /download/<job_id>/events; com
+# CACHE_BACKEND_URL compartilhado, o stream funciona mesmo se cair em outro worker
+progress_board = ProgressBoard(shared_cache.l2)
+SSE_KEEPALIVE_INTERVAL = 15
+SSE_UNKNOWN_JOB_TIMEOUT = 30
+
+# Janela (s) em que navegadores e CDNs podem servir um /info/<id> expirado enquanto revalidam
+INFO_STALE_WHILE_REVALIDATE = float(os.environ.get('INFO_STALE_WHILE_REVALIDATE', 600))
+
+# Downloads abandonados pelo cliente só continuam (para o cache de mídia) se o formato
+# estiver entre os ABANDONED_KEEP_TOP_N mais baixados nas últimas ABANDONED_KEEP_HOURS horas
+ABANDONED_KEEP_TOP_N = int(os.environ.get('ABANDONED_KEEP_TOP_N', 20))
+ABANDONED_KEEP_HOURS = float(os.environ.get('ABANDONED_KEEP_HOURS', 24))
+
+# Mídias pré-baixadas para os formatos mais populares
+media_cache = MediaCache(
+    media_cache_dir,
+    max_bytes=int(os.environ.get('MEDIA_CACHE_MAX_BYTES', 2 * 1024 * 1024 * 1024)),
+    ttl=float(os.environ.get('MEDIA_CACHE_TTL', 6 * 3600)),
+)
+
 # Regex para validar diferentes formatos de URL do YouTube
 YOUTUBE_URL_PATTERN = re.compile(
     r'^(https?://)?(www\.)?(youtube\.com/watch\?v=|youtu\.be/|youtube\.com/shorts/|youtube\.com/embed/)([a-zA-Z0-9_-]{11})'
 )
+VIDEO_ID_PATTERN = re.compile(r'^[a-zA-Z0-9_-]{11}$')
+JOB_ID_PATTERN = re.compile(r'^[a-zA-Z0-9_-]{8,64}$')
+
+def extract_video_id(url):
+    """ID de 11 caracteres do vídeo a partir de uma URL já validada"""
+    match = YOUTUBE_URL_PATTERN.match(url or '')
+    return match.group(4) if match else None
+
+def build_format_list(formats):
+    """Filtra, remove duplicatas e ordena os formatos exibidos pelo /info"""
+    video_formats = []
+    
+    # Formatos prioritários com vídeo+áudio combinados
+    priority_formats = {
+        '22': '720p MP4 (com áudio)',
+        '18': '360p MP4 (com áudio)',
+        '136': '720p MP4',
+        '137': '1080p MP4', 
+        '299': '1080p60 MP4',
+        '298': '720p60 MP4',
+        '247': '720p WebM',
+        '248': '1080p WebM',
+        '303': '1080p60 WebM',
+        '302': '720p60 WebM'
+    }
+    
+    # Primeiro, procura por formatos que já têm vídeo+áudio
+    combined_formats = []
+    video_only_formats = []
+    
+    for fmt in formats:
+        vcodec = fmt.get('vcodec')
+        acodec = fmt.get('acodec')
+        height = fmt.get('height')
+        width = fmt.get('width')
+        ext = fmt.get('ext')
+        format_id = fmt.get('format_id')
+        format_note = fmt.get('format_note', '')
+        filesize = fmt.get('filesize')
+        fps = fmt.get('fps')
+    
+        # Formatos com vídeo E áudio (preferidos)
+        if (vcodec and vcodec != 'none' and 
+            acodec and acodec != 'none' and 
+            height and ext and format_id and height >= 360):
+    
+            quality_label = priority_formats.get(format_id, f"{height}p")
+            if fps and fps > 30:
+                quality_label += f" {int(fps)}fps"
+            quality_label += " (com áudio)"
+    
+            combined_formats.append({
+                'format_id': format_id,
+                'resolution': f"{height}p",
+                'quality_label': quality_label,
+                'ext': ext,
+                'height': height,
+                'width': width,
+                'vcodec': vcodec,
+                'acodec': acodec,
+                'format_note': format_note,
+                'filesize': filesize,
+                'fps': fps,
+                'has_audio': True
+            })
+    
+        # Formatos apenas com vídeo (como fallback)
+        elif (vcodec and vcodec != 'none' and 
+              (acodec == 'none' or acodec is None) and 
+              height and ext and format_id and height >= 720):
+    
+            quality_label = priority_formats.get(format_id, f"{height}p")
+            if fps and fps > 30:
+                quality_label += f" {int(fps)}fps"
+    
+            # Adiciona informação sobre codec
+            codec_info = ""
+            if 'avc1' in vcodec or 'h264' in vcodec:
+                codec_info = " (H.264)"
+            elif 'vp9' in vcodec:
+                codec_info = " (VP9)"
+            elif 'av01' in vcodec:
+                codec_info = " (AV1)"
+    
+            video_only_formats.append({
+                'format_id': format_id,
+                'resolution': f"{height}p",
+                'quality_label': quality_label + codec_info + " (sem áudio)",
+                'ext': ext,
+                'height': height,
+                'width': width,
+                'vcodec': vcodec,
+                'format_note': format_note,
+                'filesize': filesize,
+                'fps': fps,
+                'has_audio': False
+            })
+    
+    # Combina os formatos: primeiro os com áudio, depois os sem áudio
+    video_formats = combined_formats + video_only_formats
+    
+    # Remove duplicatas baseado em altura e extensão, mantendo o melhor codec
+    seen = {}
+    unique_formats = []
+    
+    for fmt in video_formats:
+        key = (fmt['height'], fmt['ext'])
+        if key not in seen:
+            seen[key] = fmt
+            unique_formats.append(fmt)
+        else:
+            # Se já existe, mantém o que tem melhor codec (prioriza h264/avc1 > vp9 > av1)
+            existing = seen[key]
+            current_vcodec = fmt['vcodec'].lower()
+            existing_vcodec = existing['vcodec'].lower()
+    
+            # Prioridade: H.264 > VP9 > AV1
+            if ('avc1' in current_vcodec or 'h264' in current_vcodec) and not ('avc1' in existing_vcodec or 'h264' in existing_vcodec):
+                seen[key] = fmt
+                # Remove o antigo e adiciona o novo
+                unique_formats = [f for f in unique_formats if not (f['height'] == fmt['height'] and f['ext'] == fmt['ext'])]
+                unique_formats.append(fmt)
+            elif 'vp9' in current_vcodec and not ('avc1' in existing_vcodec or 'h264' in existing_vcodec or 'vp9' in existing_vcodec):
+                seen[key] = fmt
+                # Remove o antigo e adiciona o novo
+                unique_formats = [f for f in unique_formats if not (f['height'] == fmt['height'] and f['ext'] == fmt['ext'])]
+                unique_formats.append(fmt)
+    
+    # Ordena por altura (maior primeiro) e depois por codec (H.264 primeiro)
+    def sort_key(fmt):
+        height = fmt['height']
+        vcodec = fmt['vcodec'].lower()
+        # Prioridade de codec: H.264=0, VP9=1, AV1=2, outros=3
+        codec_priority = 0 if ('avc1' in vcodec or 'h264' in vcodec) else (1 if 'vp9' in vcodec else (2 if 'av01' in vcodec else 3))
+        return (-height, codec_priority)
+    
+    unique_formats.sort(key=sort_key)
+    
+    # Filtra qualidades 360p e acima, priorizando formatos com áudio
+    high_quality_formats = [fmt for fmt in unique_formats if fmt['height'] >= 360]
+    
+    # Ordena para mostrar formatos com áudio primeiro
+    high_quality_formats.sort(key=lambda x: (not x.get('has_audio', False), -x['height']))
+    
+    return high_quality_formats
+
+def extract_info(video_id, url=None):
+    """Extração dos metadados pelo yt-dlp, sem cache, reduzida a um VideoInfo"""
+    url = url or f'https://www.youtube.com/watch?v={video_id}'
+    if extraction_pool is not None:
+        try:
+            video_info, formats = extraction_pool.extract(url)
+            stream_cache.store(video_id, formats)
+            return video_info
+        except BrokenProcessPool as e:
+            print(f"Pool de extração quebrado ({e}); extraindo {video_id} no próprio processo")
+    with yt_dlp.YoutubeDL(EXTRACTION_OPTS) as ydl:
+        info_dict = ydl.extract_info(url, download=False)
+    # As URLs assinadas só existem no info_dict completo: guardadas antes de compactar
+    stream_cache.store(video_id, info_dict.get('formats'))
+    return VideoInfo.from_info_dict(info_dict)
+
+def extract_info_cached(video_id, url=None, refresh=False):
+    """
+    Metadados do vídeo vindos do cache (stale-while-revalidate) ou de uma extração do yt-dlp.
+    Com refresh=True a extração sempre acontece e substitui a entrada (uma só por vídeo,
+    mesmo com várias requisições pedindo o refresh ao mesmo tempo).
+    """
+    if refresh:
+        return metadata_cache.refresh(video_id, lambda: extract_info(video_id, url))
+    return metadata_cache.get_or_load(video_id, lambda: extract_info(video_id, url))
+
+def resolve_format(info_dict, format_id):
+    """
+    Retorna (formato escolhido, seletor do yt-dlp, se o formato já tem áudio).
+    O formato escolhido é None quando format_id não existe para o vídeo.
+    """
+    selected_format = None
+    if format_id:
+        for fmt in info_dict.get('formats', []):
+            if fmt.get('format_id') == format_id:
+                selected_format = fmt
+                break
+
+    # Determina se o formato selecionado tem áudio
+    has_audio = False
+    if selected_format:
+        has_audio = selected_format.get('acodec') and selected_format.get('acodec') != 'none'
+
+    if format_id:
+        if has_audio:
+            # Formato já tem áudio, baixa diretamente
+            format_selector = format_id
+        else:
+            # Formato sem áudio, baixa vídeo + melhor áudio e combina
+            format_selector = f'{format_id}+bestaudio[ext=m4a]/bestaudio'
+    else:
+        # Se não especificou formato, usa o melhor com áudio
+        format_selector = 'best[height>=720][ext=mp4]/best[height>=480][ext=mp4]/best'
+
+    return selected_format, format_selector, has_audio
+
+def build_download_opts(job, format_selector, has_audio, tracker=None):
+    """Configuração do yt-dlp para baixar no diretório do job (e publicar o progresso no tracker)"""
+    opts = {
+        'format': format_selector,
+        'outtmpl': job.outtmpl,
+        'noplaylist': True,
+        'quiet': False,
+        'no_warnings': False,
+        'extractflat': False,
+        'ignoreerrors': False,
+        
+        # Otimizações de velocidade
+        'concurrent_fragment_downloads': 4,  # Download paralelo de fragmentos
+        'retries': 3,
+        'fragment_retries': 3,
+        'http_chunk_size': 10485760,  # 10MB chunks para melhor velocidade
+        
+        # Sidecars (.info.json, thumbnail) ficam a cargo da ArtifactPolicy
+        'writesubtitles': False,
+        'writeautomaticsub': False,
+        
+        # Configurações de merge para garantir compatibilidade
+        'merge_output_format': 'mp4',  # Força saída em MP4
+        'keepvideo': not has_audio,  # Mantém os streams do merge para o cache de componentes (o job é removido depois)
+        
+        # Post-processadores para garantir qualidade
+        'postprocessors': [{
+            'key': 'FFmpegVideoConvertor',
+            'preferedformat': 'mp4',
+        }] if not has_audio else [],
+        
+        # O caminho final vem do próprio yt-dlp, depois do merge e das conversões
+        'post_hooks': [job.post_hook],
+        'postprocessor_hooks': [job.postprocessor_hook],
+        # Cancelamento (ex.: cliente desconectou) interrompe o download no próximo bloco
+        'progress_hooks': [job.progress_hook],
+    }
+    if tracker is not None:
+        opts['progress_hooks'].append(tracker.progress_hook)
+        opts['postprocessor_hooks'].append(tracker.postprocessor_hook)
+    return opts
+
+def stream_info_dict(info_dict, stream_formats):
+    """info_dict mínimo para o yt-dlp baixar direto das URLs em cache (process_ie_result)"""
+    info = VideoInfo.from_info_dict(info_dict).to_dict()
+    info.update({
+        'extractor': 'youtube',
+        'extractor_key': 'Youtube',
+        'original_url': info.get('webpage_url'),
+        # O yt-dlp altera os dicts dos formatos; a cópia protege as entradas do cache
+        'formats': copy.deepcopy(stream_formats),
+    })
+    return info
+
+def run_download(ydl, video_id, url, info_dict, format_id=None):
+    """
+    Baixa com o yt-dlp já configurado. Com as URLs do vídeo no stream_cache, a extração é
+    pulada; um 403 (URL revogada antes do expire) invalida o cache e a extração completa
+    acontece, realimentando o cache para os próximos downloads.
+    """
+    stream_formats = stream_cache.formats(video_id)
+    if stream_formats and (not format_id or stream_cache.get(video_id, format_id)):
+        try:
+            ydl.process_ie_result(stream_info_dict(info_dict, stream_formats), download=True)
+            return
+        except yt_dlp.utils.DownloadError as e:
+            if is_forbidden_error(e):
+                print(f"URL de mídia em cache recusada para {video_id}; extraindo de novo")
+                stream_cache.invalidate(video_id)
+            elif 'requested format is not available' not in str(e).lower():
+                raise
+    full_info = ydl.extract_info(url, download=True)
+    stream_cache.store(video_id, (full_info or {}).get('formats'))
+
+def wanted_by_media_cache(video_id, format_id):
+    """
+    True se (vídeo, formato) está entre os mais baixados recentemente: um download abandonado
+    pelo cliente vale ser concluído para o cache de mídia em vez de descartado.
+    """
+    if not download_history.enabled:
+        return False
+    try:
+        with download_history.app.app_context():
+            popular = download_history.top_formats(ABANDONED_KEEP_HOURS, ABANDONED_KEEP_TOP_N)
+    except Exception as e:
+        print(f"Erro ao consultar formatos populares: {e}")
+        return False
+    return any(item['video_id'] == video_id and item['format_id'] == format_id for item in popular)
+
+def prefetch_media(video_id, format_id=None):
+    """Baixa (vídeo, formato) para o cache de mídia; usado pelo pré-aquecimento fora do pico"""
+    if media_cache.get(video_id, format_id):
+        return False
+
+    info_dict = extract_info_cached(video_id)
+    selected_format, format_selector, has_audio = resolve_format(info_dict, format_id)
+    if format_id and not selected_format:
+        return False
+
+    # Pré-download nunca espera na fila de disco: se não cabe agora, fica para a próxima rodada
+    estimated_size = estimate_download_size(info_dict, selected_format, merge_audio=bool(format_id) and not has_audio)
+    reservation = disk_admission.reserve(estimated_size, timeout=0)
+    job = DownloadJob(downloads_dir)
+    try:
+        with yt_dlp.YoutubeDL(build_download_opts(job, format_selector, has_audio)) as ydl:
+            run_download(ydl, video_id, info_dict.get('webpage_url') or f'https://www.youtube.com/watch?v={video_id}',
+                         info_dict, format_id)
+        if not job.final_path or not os.path.exists(job.final_path):
+            return False
+        cache_components(job, video_id)
+        media_cache.put(video_id, format_id, job.final_path)
+        return True
+    finally:
+        job.cleanup()
+        reservation.release()
+
+def attachment_filename(title, extension):
+    """Nome de arquivo seguro para o Content-Disposition"""
+    safe_filename = re.sub(r'[^\w\-_\.]', '_', title or 'video')
+    safe_filename = safe_filename[:100]  # Limita o tamanho do nome
+    return f"{safe_filename}.{extension}"
+
+def file_response(path, title, on_close):
+    """Resposta de streaming do arquivo; `on_close(bytes_enviados)` roda ao fim ou na desconexão"""
+    file_size = os.path.getsize(path)
+    
+    # Limpa o nome do arquivo para ser seguro para download
+    download_filename = attachment_filename(title, os.path.basename(path).split('.')[-1])
+    
+    # Determina o tipo MIME correto
+    mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    
+    def generate():
+        sent = 0
+        try:
+            with open(path, 'rb') as f:
+                while True:
+                    chunk = f.read(8192)  # Lê em chunks de 8KB
+                    if not chunk:
+                        break
+                    sent += len(chunk)
+                    yield chunk
+        finally:
+            on_close(sent)
+    
+    # Cria resposta de streaming com headers apropriados
+    return Response(
+        generate(),
+        mimetype=mimetype,
+        headers={
+            'Content-Disposition': f'attachment; filename="{download_filename}"',
+            'Content-Length': str(file_size),
+            'Content-Type': mimetype,
+            'Cache-Control': 'no-cache, no-store, must-revalidate',
+            'Pragma': 'no-cache',
+            'Expires': '0'
+        }
+    )
+
+def resolve_stream(video_id, url, format_id):
+    """URL de mídia do formato (entrada do stream_cache), extraindo de novo se não estiver em cache"""
+    stream = stream_cache.get(video_id, format_id)
+    if stream is None:
+        # O VideoInfo em cache não guarda URLs: uma extração nova realimenta o stream_cache
+        extract_info_cached(video_id, url, refresh=True)
+        stream = stream_cache.get(video_id, format_id)
+    return stream
+
+def cache_components(job, video_id):
+    """
+    Move os streams separados de um merge do yt-dlp para o cache de componentes. É só
+    otimização: uma falha aqui é registrada e o download já concluído segue normalmente
+    """
+    try:
+        components = job.components()
+    except OSError as e:
+        print(f"Erro ao listar os componentes do job de {video_id}: {e}")
+        return
+    for component_id, path in components.items():
+        try:
+            media_cache.put_component(video_id, component_id, path)
+        except Exception as e:
+            print(f"Erro ao guardar o componente {component_id} de {video_id} no cache: {e}")
+
+def fill_audio_component(video_id, url, info_dict, audio_format):
+    """Baixa o stream de áudio para o cache de componentes; caminho em cache ou None se não couber ou falhar"""
+    audio_id = audio_format['format_id']
+    try:
+        reservation = disk_admission.reserve(estimate_download_size(info_dict, audio_format), timeout=0)
+    except InsufficientDiskSpace:
+        return None
+    job = DownloadJob(downloads_dir)
+    try:
+        with yt_dlp.YoutubeDL(build_download_opts(job, audio_id, True)) as ydl:
+            run_download(ydl, video_id, url, info_dict, audio_id)
+        if not job.final_path or not os.path.exists(job.final_path):
+            return None
+        return media_cache.put_component(video_id, audio_id, job.final_path)
+    except yt_dlp.utils.DownloadError as e:
+        print(f"Erro ao baixar o áudio de {video_id} para o cache de componentes: {e}")
+        return None
+    finally:
+        job.cleanup()
+        reservation.release()
+
+# Áudios sendo baixados em segundo plano para o cache de componentes, por (vídeo, formato)
+component_fills = set()
+component_fills_lock = threading.Lock()
+
+def schedule_audio_fill(video_id, url, info_dict, audio_format):
+    """
+    Baixa o stream de áudio para o cache de componentes numa thread (uma só por vídeo e
+    formato): o áudio é pequeno perto do vídeo e serve a todas as resoluções, então as
+    próximas leem do disco. Chamado só depois que o merge em streaming já começou a
+    responder, para não competir com ele nem repetir um áudio que o fallback pelo yt-dlp
+    baixaria de qualquer forma (e guardaria com `cache_components`).
+    """
+    key = (video_id, audio_format['format_id'])
+    with component_fills_lock:
+        if key in component_fills:
+            return
+        component_fills.add(key)
+
+    def fill():
+        try:
+            fill_audio_component(video_id, url, info_dict, audio_format)
+        except Exception as e:
+            print(f"Erro inesperado ao guardar o áudio de {video_id}: {e}")
+        finally:
+            with component_fills_lock:
+                component_fills.discard(key)
+
+    threading.Thread(target=fill, daemon=True).start()
+
+def passthrough_response(video_id, url, format_id, title, on_close):
+    """
+    Repassa a mídia de um formato único direto do servidor de mídia, com o Range do cliente,
+    sem gravar nada em disco. Retorna None se o formato não tem URL direta (ex.: DASH
+    fragmentado) ou se o servidor de mídia recusar a URL mesmo depois de resolvida de novo,
+    e o download segue pelo caminho normal do yt-dlp.
+    """
+    stream = resolve_stream(video_id, url, format_id)
+    if stream is None:
+        return None
+
+    range_header = request.headers.get('Range')
+    try:
+        upstream = RangedUpstream(stream, range_header, PASSTHROUGH_WINDOW_SIZE)
+    except UpstreamForbidden:
+        # URL revogada antes do expire: descarta as URLs do vídeo e resolve de novo uma vez
+        stream_cache.invalidate(video_id)
+        extract_info_cached(video_id, url, refresh=True)
+        stream = stream_cache.get(video_id, format_id)
+        if stream is None:
+            return None
+        try:
+            upstream = RangedUpstream(stream, range_header, PASSTHROUGH_WINDOW_SIZE)
+        except UpstreamForbidden:
+            print(f"Servidor de mídia recusou {video_id}/{format_id} de novo; baixando pelo yt-dlp")
+            stream_cache.invalidate(video_id)
+            return None
+
+    extension = stream.get('ext') or 'mp4'
+    mimetype = mimetypes.guess_type(f'media.{extension}')[0] or 'application/octet-stream'
+    headers = dict(upstream.headers)
+    headers.update({
+        'Content-Disposition': f'attachment; filename="{attachment_filename(title, extension)}"',
+        'Cache-Control': 'no-cache, no-store, must-revalidate',
+        'Pragma': 'no-cache',
+        'Expires': '0'
+    })
+    expected = int(upstream.headers.get('Content-Length') or 0)
+    status = upstream.status
+    return Response(
+        upstream.relay(PASSTHROUGH_CHUNK_SIZE, lambda sent: on_close(sent, expected, status)),
+        status=status,
+        mimetype=mimetype,
+        headers=headers,
+        direct_passthrough=True,
+    )
+
+def streaming_merge_response(video_id, url, info_dict, format_id, title, on_close):
+    """
+    Junta vídeo e melhor áudio com o ffmpeg escrevendo MP4 fragmentado num pipe que vai
+    direto para o cliente: os bytes começam a sair durante o mux, sem cópia temporária.
+    Componentes já no cache de mídia (ex.: o áudio, comum a todas as resoluções) são lidos
+    do disco; só o que falta vem do upstream. Retorna None (e o download segue pelo yt-dlp)
+    sem ffmpeg, sem URLs diretas ou se o ffmpeg falhar (ou travar) antes do primeiro byte.
+    """
+    if not shutil.which('ffmpeg'):
+        return None
+    audio_format = best_audio(info_dict.get('formats', []))
+    if audio_format is None:
+        return None
+
+    video_path = media_cache.get_component(video_id, format_id)
+    audio_path = media_cache.get_component(video_id, audio_format['format_id'])
+    video = {'url': video_path} if video_path else resolve_stream(video_id, url, format_id)
+    audio = {'url': audio_path} if audio_path else resolve_stream(video_id, url, audio_format['format_id'])
+    if video is None or audio is None:
+        return None
+
+    process = fragmented_merge(video, audio)
+    # O primeiro bloco (ftyp + moov vazio) só sai se as duas entradas abriram
+    first_chunk = first_output(process, PASSTHROUGH_CHUNK_SIZE, STREAMING_MERGE_FIRST_BYTE_TIMEOUT)
+    if not first_chunk:
+        error = process_error(process) or f'sem saída em {STREAMING_MERGE_FIRST_BYTE_TIMEOUT:g} s'
+        print(f"Merge em streaming de {video_id} falhou: {error}")
+        if '403' in error:
+            stream_cache.invalidate(video_id)
+        return None
+
+    if not audio_path:
+        # O merge já está respondendo: agora vale guardar o áudio para as outras resoluções
+        schedule_audio_fill(video_id, url, info_dict, audio_format)
+
+    return Response(
+        relay_process(process, PASSTHROUGH_CHUNK_SIZE, on_close, first_chunk),
+        mimetype='video/mp4',
+        headers={
+            'Content-Disposition': f'attachment; filename="{attachment_filename(title, "mp4")}"',
+            'Cache-Control': 'no-cache, no-store, must-revalidate',
+            'Pragma': 'no-cache',
+            'Expires': '0'
+        },
+        direct_passthrough=True,
+    )
+
+@youtube_bp.route('/health', methods=['GET'])
+def health_check():
+    """Health check endpoint"""
+    return jsonify({
+        'status': 'healthy',
+        'service': 'youtube-downloader',
+        'version': '1.0.0'
+    }), 200
 
 @youtube_bp.route('/info', methods=['POST'])
 def get_video_info():
@@ -43,161 +700,44 @@ def get_video_info():
         print(f"URL inválida recebida no /info: {url}")  # Debug log
         return jsonify({'error': 'URL do YouTube inválida. Verifique o formato.'}), 400
 
+    return video_info_response(extract_video_id(url), url)
+
+@youtube_bp.route('/info/<video_id>', methods=['GET'])
+def get_video_info_cacheable(video_id):
+    """Cacheable variant of /info: ETag, Cache-Control and 304 on If-None-Match"""
+    if not VIDEO_ID_PATTERN.match(video_id):
+        return jsonify({'error': 'ID de vídeo inválido.'}), 400
+    return video_info_response(video_id, conditional=True)
+
+def video_info_payload(info_dict):
+    """Corpo JSON de /info a partir do info_dict do yt-dlp"""
+    return {
+        'title': info_dict.get('title', 'Título não disponível'),
+        'duration': info_dict.get('duration', 0),
+        'uploader': info_dict.get('uploader', 'Desconhecido'),
+        'view_count': info_dict.get('view_count', 0),
+        'description': info_dict.get('description', '')[:200] + '...' if info_dict.get('description') else '',
+        'formats': build_format_list(info_dict.get('formats', []))[:10]  # Limita a 10 formatos para não sobrecarregar
+    }
+
+def video_info_response(video_id, url=None, conditional=False):
+    """
+    Resposta de /info. Com conditional=True, o max-age acompanha o tempo que a entrada
+    ainda tem no cache de metadados, para que navegadores e CDNs não guardem a resposta
+    por mais tempo que o próprio servidor.
+    """
+    started = time.perf_counter()
     try:
-        ydl_opts = {
-            'quiet': True,
-            'no_warnings': True,
-        }
+        info_dict = extract_info_cached(video_id, url)
+        payload = video_info_payload(info_dict)
+        download_history.record(video_id, 'info', 'success', http_status=200, duration_ms=elapsed_ms(started))
 
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info_dict = ydl.extract_info(url, download=False)
-            
-            # Extrai formatos de vídeo disponíveis
-            formats = info_dict.get('formats', [])
-            video_formats = []
-            
-            # Formatos prioritários com vídeo+áudio combinados
-            priority_formats = {
-                '22': '720p MP4 (com áudio)',
-                '18': '360p MP4 (com áudio)',
-                '136': '720p MP4',
-                '137': '1080p MP4', 
-                '299': '1080p60 MP4',
-                '298': '720p60 MP4',
-                '247': '720p WebM',
-                '248': '1080p WebM',
-                '303': '1080p60 WebM',
-                '302': '720p60 WebM'
-            }
-            
-            # Primeiro, procura por formatos que já têm vídeo+áudio
-            combined_formats = []
-            video_only_formats = []
-            
-            for fmt in formats:
-                vcodec = fmt.get('vcodec')
-                acodec = fmt.get('acodec')
-                height = fmt.get('height')
-                width = fmt.get('width')
-                ext = fmt.get('ext')
-                format_id = fmt.get('format_id')
-                format_note = fmt.get('format_note', '')
-                filesize = fmt.get('filesize')
-                fps = fmt.get('fps')
-                
-                # Formatos com vídeo E áudio (preferidos)
-                if (vcodec and vcodec != 'none' and 
-                    acodec and acodec != 'none' and 
-                    height and ext and format_id and height >= 360):
-                    
-                    quality_label = priority_formats.get(format_id, f"{height}p")
-                    if fps and fps > 30:
-                        quality_label += f" {int(fps)}fps"
-                    quality_label += " (com áudio)"
-                    
-                    combined_formats.append({
-                        'format_id': format_id,
-                        'resolution': f"{height}p",
-                        'quality_label': quality_label,
-                        'ext': ext,
-                        'height': height,
-                        'width': width,
-                        'vcodec': vcodec,
-                        'acodec': acodec,
-                        'format_note': format_note,
-                        'filesize': filesize,
-                        'fps': fps,
-                        'has_audio': True
-                    })
-                
-                # Formatos apenas com vídeo (como fallback)
-                elif (vcodec and vcodec != 'none' and 
-                      (acodec == 'none' or acodec is None) and 
-                      height and ext and format_id and height >= 720):
-                    
-                    quality_label = priority_formats.get(format_id, f"{height}p")
-                    if fps and fps > 30:
-                        quality_label += f" {int(fps)}fps"
-                    
-                    # Adiciona informação sobre codec
-                    codec_info = ""
-                    if 'avc1' in vcodec or 'h264' in vcodec:
-                        codec_info = " (H.264)"
-                    elif 'vp9' in vcodec:
-                        codec_info = " (VP9)"
-                    elif 'av01' in vcodec:
-                        codec_info = " (AV1)"
-                    
-                    video_only_formats.append({
-                        'format_id': format_id,
-                        'resolution': f"{height}p",
-                        'quality_label': quality_label + codec_info + " (sem áudio)",
-                        'ext': ext,
-                        'height': height,
-                        'width': width,
-                        'vcodec': vcodec,
-                        'format_note': format_note,
-                        'filesize': filesize,
-                        'fps': fps,
-                        'has_audio': False
-                    })
-            
-            # Combina os formatos: primeiro os com áudio, depois os sem áudio
-            video_formats = combined_formats + video_only_formats
-            
-            # Remove duplicatas baseado em altura e extensão, mantendo o melhor codec
-            seen = {}
-            unique_formats = []
-            
-            for fmt in video_formats:
-                key = (fmt['height'], fmt['ext'])
-                if key not in seen:
-                    seen[key] = fmt
-                    unique_formats.append(fmt)
-                else:
-                    # Se já existe, mantém o que tem melhor codec (prioriza h264/avc1 > vp9 > av1)
-                    existing = seen[key]
-                    current_vcodec = fmt['vcodec'].lower()
-                    existing_vcodec = existing['vcodec'].lower()
-                    
-                    # Prioridade: H.264 > VP9 > AV1
-                    if ('avc1' in current_vcodec or 'h264' in current_vcodec) and not ('avc1' in existing_vcodec or 'h264' in existing_vcodec):
-                        seen[key] = fmt
-                        # Remove o antigo e adiciona o novo
-                        unique_formats = [f for f in unique_formats if not (f['height'] == fmt['height'] and f['ext'] == fmt['ext'])]
-                        unique_formats.append(fmt)
-                    elif 'vp9' in current_vcodec and not ('avc1' in existing_vcodec or 'h264' in existing_vcodec or 'vp9' in existing_vcodec):
-                        seen[key] = fmt
-                        # Remove o antigo e adiciona o novo
-                        unique_formats = [f for f in unique_formats if not (f['height'] == fmt['height'] and f['ext'] == fmt['ext'])]
-                        unique_formats.append(fmt)
-            
-            # Ordena por altura (maior primeiro) e depois por codec (H.264 primeiro)
-            def sort_key(fmt):
-                height = fmt['height']
-                vcodec = fmt['vcodec'].lower()
-                # Prioridade de codec: H.264=0, VP9=1, AV1=2, outros=3
-                codec_priority = 0 if ('avc1' in vcodec or 'h264' in vcodec) else (1 if 'vp9' in vcodec else (2 if 'av01' in vcodec else 3))
-                return (-height, codec_priority)
-            
-            unique_formats.sort(key=sort_key)
-            
-            # Filtra qualidades 360p e acima, priorizando formatos com áudio
-            high_quality_formats = [fmt for fmt in unique_formats if fmt['height'] >= 360]
-            
-            # Ordena para mostrar formatos com áudio primeiro
-            high_quality_formats.sort(key=lambda x: (not x.get('has_audio', False), -x['height']))
-            
-            return jsonify({
-                'title': info_dict.get('title', 'Título não disponível'),
-                'duration': info_dict.get('duration', 0),
-                'uploader': info_dict.get('uploader', 'Desconhecido'),
-                'view_count': info_dict.get('view_count', 0),
-                'description': info_dict.get('description', '')[:200] + '...' if info_dict.get('description') else '',
-                'formats': high_quality_formats[:10]  # Limita a 10 formatos para não sobrecarregar
-            }), 200
+        if conditional:
+            return conditional_json(payload, metadata_cache.expires_in(video_id), INFO_STALE_WHILE_REVALIDATE)
+        return jsonify(payload), 200
 
     except yt_dlp.utils.DownloadError as e:
+        download_history.record(video_id, 'info', 'error', duration_ms=elapsed_ms(started), error=str(e))
         error_message = str(e).lower()
         if 'private video' in error_message:
             return jsonify({'error': 'Este vídeo é privado e não pode ser acessado.'}), 403
@@ -206,6 +746,7 @@ def get_video_info():
         return jsonify({'error': 'Não foi possível obter informações do vídeo.'}), 500
     
     except Exception as e:
+        download_history.record(video_id, 'info', 'error', http_status=500, duration_ms=elapsed_ms(started), error=str(e))
         print(f"Erro inesperado ao obter info: {e}")
         return jsonify({'error': 'Erro interno do servidor.'}), 500
 
@@ -218,6 +759,8 @@ def download_video():
     data = request.get_json()
     url = data.get('url')
     format_id = data.get('format_id')
+    # Artefatos extras (info.json, thumbnail, metadados embutidos) só quando pedidos
+    artifacts = ArtifactPolicy.from_request(data)
 
     if not url:
         return jsonify({'error': 'URL não fornecida.'}), 400
@@ -226,193 +769,167 @@ def download_video():
         print(f"URL inválida recebida no /download: {url}")  # Debug log
         return jsonify({'error': 'URL do YouTube inválida. Verifique o formato.'}), 400
 
+    # Trecho opcional (start/end em segundos ou HH:MM:SS): só ele é buscado e processado
     try:
-        # Primeiro, extrai informações do vídeo para validar o formato
-        ydl_opts = {
-            'quiet': True,
-            'no_warnings': True,
-        }
+        clip = ClipRange.from_request(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info_dict = ydl.extract_info(url, download=False)
-            formats = info_dict.get('formats', [])
-            
-            # Informações do vídeo (logs removidos para limpeza)
-            
-            # Verifica se o formato solicitado existe
-            selected_format = None
-            if format_id:
-                for fmt in formats:
-                    if fmt.get('format_id') == format_id:
-                        selected_format = fmt
-                        break
-                
-                if not selected_format:
-                    # Lista formatos disponíveis para debug
-                    available_ids = [f.get('format_id') for f in formats if f.get('format_id')]
-                    return jsonify({
-                        'error': f'Formato {format_id} não disponível para este vídeo.',
-                        'available_formats': available_ids
-                    }), 400
-                
-                # Formato encontrado (logs removidos para limpeza)
-            else:
-                # Se não especificou formato, usa o melhor disponível
-                format_selector = 'bv[height>=1080]/bv[height>=720]/bv'
-            
-            # Determina se o formato selecionado tem áudio
-            has_audio = False
-            if selected_format:
-                has_audio = selected_format.get('acodec') and selected_format.get('acodec') != 'none'
-            
-            # Configuração para download otimizada
-            if format_id:
-                if has_audio:
-                    # Formato já tem áudio, baixa diretamente
-                    format_selector = format_id
-                else:
-                    # Formato sem áudio, baixa vídeo + melhor áudio e combina
-                    format_selector = f'{format_id}+bestaudio[ext=m4a]/bestaudio'
-            else:
-                # Se não especificou formato, usa o melhor com áudio
-                format_selector = 'best[height>=720][ext=mp4]/best[height>=480][ext=mp4]/best'
+    # ID do job escolhido pelo cliente, para acompanhar o progresso em /download/<job_id>/events.
+    # É só a chave do progresso: o diretório de trabalho sempre tem um nome gerado no servidor
+    job_id = data.get('job_id') or uuid.uuid4().hex
+    if not JOB_ID_PATTERN.match(job_id):
+        return jsonify({'error': 'job_id inválido (use 8 a 64 letras, números, "-" ou "_").'}), 400
+    tracker = ProgressTracker(progress_board, job_id)
+    if not tracker.reserve():
+        return jsonify({'error': 'job_id já está em uso.'}), 409
+
+    video_id = extract_video_id(url)
+    started = time.perf_counter()
+    reservation = None
+    job = None
+    try:
+        # Primeiro, obtém as informações do vídeo (do cache, se houver) para validar o formato
+        info_dict = extract_info_cached(video_id, url)
+        formats = info_dict.get('formats', [])
+        
+        # Verifica se o formato solicitado existe
+        selected_format, format_selector, has_audio = resolve_format(info_dict, format_id)
+        if format_id and not selected_format:
+            # Lista formatos disponíveis para debug
+            available_ids = [f.get('format_id') for f in formats if f.get('format_id')]
+            tracker.failed(f'Formato {format_id} não disponível')
+            return jsonify({
+                'error': f'Formato {format_id} não disponível para este vídeo.',
+                'available_formats': available_ids
+            }), 400
+        if clip is not None:
+            try:
+                clip.validate(info_dict.get('duration'))
+            except ValueError as e:
+                tracker.failed(str(e))
+                return jsonify({'error': str(e)}), 400
+        
+        def record_download(sent, path_size):
+            # Streaming interrompido pelo cliente conta como 'aborted'
+            download_history.record(video_id, 'download', 'success' if sent >= path_size else 'aborted',
+                                    format_id, http_status=200, bytes_served=sent,
+                                    duration_ms=elapsed_ms(started))
+        
+        # Arquivo pré-baixado pelo cache warmer: serve direto, sem passar pelo upstream
+        cached_path = media_cache.get(video_id, format_id) if not artifacts.requested and clip is None else None
+        if cached_path:
+            cached_size = os.path.getsize(cached_path)
+            tracker.ready(cached_size)
+            return file_response(cached_path, info_dict.get('title'), lambda sent: record_download(sent, cached_size))
+        
+        # Formato que já tem áudio: repassa o upstream direto, sem disco nem yt-dlp
+        if PASSTHROUGH_ENABLED and format_id and has_audio and not artifacts.requested and clip is None:
+            def on_passthrough_close(sent, expected, status):
+                download_history.record(video_id, 'download', 'success' if sent >= expected else 'aborted',
+                                        format_id, http_status=status, bytes_served=sent,
+                                        duration_ms=elapsed_ms(started))
             
-            download_opts = {
-                'format': format_selector,
-                'outtmpl': os.path.join(downloads_dir, '%(title)s.%(ext)s'),
-                'noplaylist': True,
-                'quiet': False,
-                'no_warnings': False,
-                'extractflat': False,
-                'ignoreerrors': False,
-                
-                # Otimizações de velocidade
-                'concurrent_fragment_downloads': 4,  # Download paralelo de fragmentos
-                'retries': 3,
-                'fragment_retries': 3,
-                'http_chunk_size': 10485760,  # 10MB chunks para melhor velocidade
-                
-                # Preserva metadados
-                'writeinfojson': True,  # Salva metadados
-                'writethumbnail': True,  # Salva thumbnail
-                'writesubtitles': False,
-                'writeautomaticsub': False,
-                
-                # Configurações de merge para garantir compatibilidade
-                'merge_output_format': 'mp4',  # Força saída em MP4
-                'keepvideo': False,  # Remove arquivos temporários após merge
-                
-                # Post-processadores para garantir qualidade
-                'postprocessors': [{
-                    'key': 'FFmpegVideoConvertor',
-                    'preferedformat': 'mp4',
-                }] if not has_audio else [],
-            }
+            proxied = passthrough_response(video_id, url, format_id, info_dict.get('title'), on_passthrough_close)
+            if proxied is not None:
+                tracker.ready(int(proxied.headers.get('Content-Length') or 0) or None)
+                return proxied
+        
+        # Formato só de vídeo: merge com o áudio em MP4 fragmentado, transmitido durante o mux
+        if STREAMING_MERGE_ENABLED and format_id and not has_audio and not artifacts.requested and clip is None:
+            def on_merge_close(sent, returncode):
+                outcome = 'success' if returncode == 0 else ('aborted' if returncode < 0 else 'error')
+                download_history.record(video_id, 'download', outcome, format_id, http_status=200,
+                                        bytes_served=sent, duration_ms=elapsed_ms(started),
+                                        error=f'ffmpeg saiu com código {returncode}' if outcome == 'error' else None)
             
-            # Inicia o download com configurações específicas
+            merged = streaming_merge_response(video_id, url, info_dict, format_id, info_dict.get('title'), on_merge_close)
+            if merged is not None:
+                tracker.ready()
+                return merged
+        
+        # Reserva espaço em disco para o tamanho estimado (aguarda na fila ou rejeita)
+        estimated_size = estimate_download_size(info_dict, selected_format, merge_audio=bool(format_id) and not has_audio)
+        if clip is not None:
+            estimated_size = int(estimated_size * clip.fraction(info_dict.get('duration')))
+        try:
+            reservation = disk_admission.reserve(estimated_size)
+        except InsufficientDiskSpace as e:
+            print(f"Download rejeitado por falta de espaço: {e}")
+            download_history.record(video_id, 'download', 'rejected', format_id, http_status=507,
+                                    duration_ms=elapsed_ms(started), error=str(e))
+            tracker.failed('Servidor sem espaço em disco')
+            return jsonify({'error': 'Servidor sem espaço em disco para este download. Tente novamente mais tarde.'}), 507, {'Retry-After': '60'}
+        
+        # Cada download roda em um diretório próprio, com nome de arquivo baseado no ID do vídeo
+        job = DownloadJob(downloads_dir)
+        
+        download_opts = build_download_opts(job, format_selector, has_audio, tracker)
+        artifacts.apply(download_opts, info_dict, merging=bool(format_id) and not has_audio)
+        if clip is not None:
+            clip.apply(download_opts, force_keyframes=CLIP_FORCE_KEYFRAMES)
+        
+        # Se o cliente for embora durante o download ou o merge, o trabalho é interrompido,
+        # a menos que o resultado ainda sirva ao cache de mídia
+        def on_disconnect():
+            if not artifacts.requested and clip is None and wanted_by_media_cache(video_id, format_id):
+                print(f"Cliente desconectou; download de {video_id} continua para o cache de mídia")
+                return
+            job.cancel('cliente desconectou')
+        
+        # Inicia o download com configurações específicas
+        with DisconnectWatcher(request.environ, on_disconnect) as watcher:
             with yt_dlp.YoutubeDL(download_opts) as download_ydl:
-                download_ydl.download([url])
-                # Prepara o nome do arquivo final como o yt-dlp o salvaria
-                final_filename = download_ydl.prepare_filename(info_dict)
+                run_download(download_ydl, video_id, url, info_dict, format_id)
+        
+        # Verifica se o arquivo foi criado
+        final_filename = job.final_path
+        if final_filename and os.path.exists(final_filename) and clip is None:
+            # Streams separados do merge ficam no cache de componentes para outras resoluções
+            cache_components(job, video_id)
+        if watcher.disconnected and final_filename and os.path.exists(final_filename):
+            # Ninguém vai ler a resposta: o arquivo vai direto para o cache de mídia (clipes não)
+            if clip is None:
+                media_cache.put(video_id, format_id, final_filename)
+            job.cleanup()
+            reservation.release()
+            download_history.record(video_id, 'download', 'aborted', format_id, http_status=499,
+                                    duration_ms=elapsed_ms(started), error='Cliente desconectou')
+            tracker.failed('Cliente desconectou', cancelled=True)
+            return jsonify({'error': 'Cliente desconectou.'}), 499
+        if final_filename and os.path.exists(final_filename):
+            file_size = os.path.getsize(final_filename)
+            
+            def on_close(sent):
+                # Remove o diretório do job após o streaming
+                job.cleanup()
+                reservation.release()
+                record_download(sent, file_size)
             
-            # Verifica se o arquivo foi criado
-            if os.path.exists(final_filename):
-                file_size = os.path.getsize(final_filename)
-                
-                # Limpa o nome do arquivo para ser seguro para download
-                safe_filename = re.sub(r'[^\w\-_\.]', '_', info_dict.get('title', 'video'))
-                safe_filename = safe_filename[:100]  # Limita o tamanho do nome
-                file_extension = os.path.basename(final_filename).split('.')[-1]
-                download_filename = f"{safe_filename}.{file_extension}"
-                
-                # Configurações específicas para ngrok e downloads grandes
-                
-                # Determina o tipo MIME correto
-                mimetype = mimetypes.guess_type(final_filename)[0] or 'application/octet-stream'
-                
-                def generate():
-                    try:
-                        with open(final_filename, 'rb') as f:
-                            while True:
-                                chunk = f.read(8192)  # Lê em chunks de 8KB
-                                if not chunk:
-                                    break
-                                yield chunk
-                    finally:
-                        # Remove o arquivo após o streaming
-                        try:
-                            if os.path.exists(final_filename):
-                                os.remove(final_filename)
-                        except:
-                            pass
-                
-                # Cria resposta de streaming com headers apropriados
-                response = Response(
-                    generate(),
-                    mimetype=mimetype,
-                    headers={
-                        'Content-Disposition': f'attachment; filename="{download_filename}"',
-                        'Content-Length': str(file_size),
-                        'Content-Type': mimetype,
-                        'Cache-Control': 'no-cache, no-store, must-revalidate',
-                        'Pragma': 'no-cache',
-                        'Expires': '0'
-                    }
-                )
-                
-                return response
-            else:
-                # Verifica se existem arquivos no diretório de downloads
-                files_in_dir = [f for f in os.listdir(downloads_dir) if os.path.isfile(os.path.join(downloads_dir, f))]
-                if files_in_dir:
-                    # Pega o arquivo mais recente (provavelmente o que acabou de ser baixado)
-                    latest_file = max([os.path.join(downloads_dir, f) for f in files_in_dir], key=os.path.getctime)
-                    file_size = os.path.getsize(latest_file)
-                    
-                    # Limpa o nome do arquivo para ser seguro para download
-                    safe_filename = re.sub(r'[^\w\-_\.]', '_', info_dict.get('title', 'video'))
-                    safe_filename = safe_filename[:100]  # Limita o tamanho do nome
-                    file_extension = os.path.basename(latest_file).split('.')[-1]
-                    download_filename = f"{safe_filename}.{file_extension}"
-                    
-                    # Usa o mesmo método de streaming para consistência
-                    
-                    mimetype = mimetypes.guess_type(latest_file)[0] or 'application/octet-stream'
-                    
-                    def generate():
-                        try:
-                            with open(latest_file, 'rb') as f:
-                                while True:
-                                    chunk = f.read(8192)  # Lê em chunks de 8KB
-                                    if not chunk:
-                                        break
-                                    yield chunk
-                        finally:
-                            # Remove o arquivo após o streaming
-                            try:
-                                if os.path.exists(latest_file):
-                                    os.remove(latest_file)
-                            except:
-                                pass
-                    
-                    response = Response(
-                        generate(),
-                        mimetype=mimetype,
-                        headers={
-                            'Content-Disposition': f'attachment; filename="{download_filename}"',
-                            'Content-Length': str(file_size),
-                            'Content-Type': mimetype,
-                            'Cache-Control': 'no-cache, no-store, must-revalidate',
-                            'Pragma': 'no-cache',
-                            'Expires': '0'
-                        }
-                    )
-                    
-                    return response
-                else:
-                    return jsonify({'error': 'Falha ao baixar o arquivo. Nenhum arquivo foi criado.'}), 500
+            tracker.ready(file_size)
+            title = info_dict.get('title', 'video') + (clip.suffix if clip is not None else '')
+            return file_response(final_filename, title, on_close)
+        else:
+            job.cleanup()
+            reservation.release()
+            download_history.record(video_id, 'download', 'error', format_id, http_status=500,
+                                    duration_ms=elapsed_ms(started), error='Nenhum arquivo foi criado')
+            tracker.failed('Nenhum arquivo foi criado')
+            return jsonify({'error': 'Falha ao baixar o arquivo. Nenhum arquivo foi criado.'}), 500
 
-    except yt_dlp.utils.DownloadError as e:
+    except (yt_dlp.utils.DownloadError, yt_dlp.utils.DownloadCancelled) as e:
+        if job:
+            job.cleanup()
+        if reservation:
+            reservation.release()
+        if job and job.cancelled:
+            # Download ou ffmpeg interrompidos de propósito (o erro do yt-dlp é consequência)
+            download_history.record(video_id, 'download', 'cancelled', format_id, http_status=499,
+                                    duration_ms=elapsed_ms(started), error=job.cancel_reason)
+            tracker.failed(job.cancel_reason, cancelled=True)
+            return jsonify({'error': f'Download cancelado: {job.cancel_reason}.'}), 499
+        download_history.record(video_id, 'download', 'error', format_id, duration_ms=elapsed_ms(started), error=str(e))
+        tracker.failed('Falha no download')
         # Trata erros específicos do yt-dlp de forma amigável
         error_message = str(e).lower()
         if 'private video' in error_message:
@@ -425,9 +942,54 @@ def download_video():
         return jsonify({'error': f'Falha no download. Verifique a URL e tente novamente.'}), 500
     
     except Exception as e:
+        if job:
+            job.cleanup()
+        if reservation:
+            reservation.release()
+        download_history.record(video_id, 'download', 'error', format_id, http_status=500,
+                                duration_ms=elapsed_ms(started), error=str(e))
+        tracker.failed('Erro interno do servidor')
         # Captura qualquer outro erro inesperado no servidor e retorna um JSON
         # Isso impede que o Flask envie a página de erro HTML
         print(f"Erro inesperado no servidor: {e}") # Loga o erro real no console do servidor
         return jsonify({'error': 'Ocorreu um erro interno no servidor. Tente novamente mais tarde.'}), 500
 
+@youtube_bp.route('/download/<job_id>/events', methods=['GET'])
+def download_events(job_id):
+    """Server-Sent Events stream with the progress of a download job"""
+    if not JOB_ID_PATTERN.match(job_id):
+        return jsonify({'error': 'job_id inválido.'}), 400
+
+    def sse(event, state):
+        return f"id: {state['seq']}\nevent: {event}\ndata: {json.dumps(state)}\n\n"
+
+    # O EventSource reenvia o último id recebido ao reconectar
+    try:
+        last_seq = int(request.headers.get('Last-Event-ID', -1))
+    except ValueError:
+        last_seq = -1
+
+    def stream():
+        seq = last_seq
+        yield 'retry: 2000\n\n'
+        waited = 0.0
+        while True:
+            state = progress_board.wait(job_id, seq, timeout=SSE_KEEPALIVE_INTERVAL)
+            if state is None:
+                # O cliente pode abrir o stream antes do POST /download chegar ao servidor
+                waited += SSE_KEEPALIVE_INTERVAL
+                if progress_board.get(job_id) is None and waited >= SSE_UNKNOWN_JOB_TIMEOUT:
+                    yield 'event: error\ndata: {"error": "Job não encontrado."}\n\n'
+                    return
+                yield ': keep-alive\n\n'
+                continue
+            seq = state['seq']
+            yield sse('progress', state)
+            if state['stage'] in TERMINAL_STAGES:
+                yield sse('end', state)
+                return
 
+    return Response(stream(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',  # Sem buffer em proxies nginx
+    })
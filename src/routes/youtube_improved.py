@@ -8,6 +8,7 @@ import mimetypes
 import tempfile
 from flask import Blueprint, request, jsonify, Response
 from src.utils.youtube_extractor import AntiDetectionYouTubeExtractor
+from src.utils.artifact_policy import ArtifactPolicy
 
 youtube_improved_bp = Blueprint('youtube_improved_bp', __name__)
 
@@ -236,7 +237,8 @@ def download_video_improved():
         final_filename = extractor.download_with_anti_detection(
             url=url,
             format_id=format_id,
-            output_dir=downloads_dir
+            output_dir=downloads_dir,
+            artifacts=ArtifactPolicy.from_request(data)
         )
         
         # Verifica se o arquivo foi criado
@@ -4,6 +4,10 @@ import os
 import re
 from flask import Blueprint, request, jsonify
 from ..utils.serverless_extractor import ServerlessYouTubeExtractor
+from ..utils.http_cache import conditional_json
+from ..utils.metadata_cache import MetadataCache
+from ..utils.circuit_breaker import breakers
+from ..utils.strategy_ranking import ranking
 
 youtube_bp = Blueprint('youtube_serverless_bp', __name__)
 
@@ -11,6 +15,29 @@ youtube_bp = Blueprint('youtube_serverless_bp', __name__)
 YOUTUBE_URL_PATTERN = re.compile(
     r'^(https?://)?(www\.)?(youtube\.com/watch\?v=|youtu\.be/|youtube\.com/shorts/|youtube\.com/embed/)([a-zA-Z0-9_-]{11})'
 )
+VIDEO_ID_PATTERN = re.compile(r'^[a-zA-Z0-9_-]{11}$')
+
+# Cache HTTP de GET /info/<id> (s): respostas completas, degradadas e janela de revalidação
+INFO_MAX_AGE = int(os.environ.get('INFO_MAX_AGE', 300))
+INFO_DEGRADED_MAX_AGE = int(os.environ.get('INFO_DEGRADED_MAX_AGE', 60))
+INFO_STALE_WHILE_REVALIDATE = int(os.environ.get('INFO_STALE_WHILE_REVALIDATE', 600))
+
+# Cache em memória da instância com stale-while-revalidate: entradas velhas são servidas na
+# hora enquanto a cadeia de extração (yt-dlp -> oEmbed -> HTML) roda de novo em segundo plano
+info_cache = MetadataCache(
+    ttl=float(os.environ.get('METADATA_CACHE_TTL', 1800)),
+    stale_ttl=float(os.environ.get('METADATA_CACHE_STALE_TTL', 6 * 3600)),
+    max_entries=int(os.environ.get('METADATA_CACHE_SIZE', 256)),
+)
+
+def get_video_info_cached(video_id, url=None):
+    """Informações do vídeo pelo cache; respostas degradadas ficam frescas por menos tempo"""
+    url = url or f'https://www.youtube.com/watch?v={video_id}'
+    return info_cache.get_or_load(
+        video_id,
+        lambda: ServerlessYouTubeExtractor().get_video_info_with_fallback(url),
+        ttl_for=lambda info: INFO_DEGRADED_MAX_AGE if info.get('warning') else None,
+    )
 
 @youtube_bp.route('/info', methods=['POST'])
 def get_video_info():
@@ -28,8 +55,7 @@ def get_video_info():
         return jsonify({'error': 'URL do YouTube inválida. Verifique o formato.'}), 400
 
     try:
-        extractor = ServerlessYouTubeExtractor()
-        video_info = extractor.get_video_info_with_fallback(url)
+        video_info = get_video_info_cached(ServerlessYouTubeExtractor().extract_video_id(url), url)
         
         return jsonify(video_info), 200
 
@@ -37,6 +63,21 @@ def get_video_info():
         print(f"Erro ao obter informações do vídeo: {e}")
         return jsonify({'error': 'Erro interno do servidor.'}), 500
 
+@youtube_bp.route('/info/<video_id>', methods=['GET'])
+def get_video_info_cacheable(video_id):
+    """Cacheable variant of /info for browsers and edge caches (ETag + 304)"""
+    if not VIDEO_ID_PATTERN.match(video_id):
+        return jsonify({'error': 'ID de vídeo inválido.'}), 400
+
+    try:
+        video_info = get_video_info_cached(video_id)
+        max_age = INFO_DEGRADED_MAX_AGE if video_info.get('warning') else INFO_MAX_AGE
+        return conditional_json(video_info, max_age, INFO_STALE_WHILE_REVALIDATE)
+
+    except Exception as e:
+        print(f"Erro ao obter informações do vídeo: {e}")
+        return jsonify({'error': 'Erro interno do servidor.'}), 500
+
 @youtube_bp.route('/download', methods=['POST'])
 def download_video():
     """Download video optimized for serverless environments"""
@@ -54,11 +95,9 @@ def download_video():
         return jsonify({'error': 'URL do YouTube inválida. Verifique o formato.'}), 400
 
     try:
-        extractor = ServerlessYouTubeExtractor()
-        
         # Para ambientes serverless, retornamos apenas o link direto
         # O download real seria feito pelo cliente
-        video_info = extractor.get_video_info_with_fallback(url)
+        video_info = get_video_info_cached(ServerlessYouTubeExtractor().extract_video_id(url), url)
         
         if not video_info.get('success'):
             return jsonify({'error': 'Não foi possível obter informações do vídeo.'}), 500
@@ -87,3 +126,13 @@ def health_check():
         'service': 'youtube-downloader-serverless',
         'version': '1.0.0'
     }), 200
+
+@youtube_bp.route('/breakers', methods=['GET'])
+def breaker_status():
+    """Circuit breaker state of each upstream strategy, for monitoring"""
+    return jsonify(breakers.snapshot()), 200
+
+@youtube_bp.route('/strategies', methods=['GET'])
+def strategy_stats():
+    """Rolling success rate and latency of each info strategy, used to order the fallback chain"""
+    return jsonify(ranking.snapshot()), 200
@@ -0,0 +1,84 @@
+# src/utils/artifact_policy.py
+
+from typing import Dict, Any, Optional
+
+
+def _flag(value: Any) -> bool:
+    """Interpreta booleanos vindos do JSON da requisição ("true", 1, True...)"""
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'yes', 'sim')
+    return bool(value)
+
+
+class ArtifactPolicy:
+    """
+    Define quais artefatos extras um download gera além do arquivo de mídia.
+
+    Por padrão nada é gerado: .info.json e thumbnail custam requisições HTTP e escritas em
+    disco que nunca chegam ao cliente. Quem quiser os metadados pode pedi-los embutidos no
+    próprio container, o que não gera arquivos extras.
+    """
+
+    def __init__(self, write_info_json: bool = False, write_thumbnail: bool = False,
+                 embed_metadata: bool = False, embed_thumbnail: bool = False):
+        self.write_info_json = write_info_json
+        self.write_thumbnail = write_thumbnail
+        self.embed_metadata = embed_metadata
+        self.embed_thumbnail = embed_thumbnail
+
+    @classmethod
+    def from_request(cls, data: Optional[Dict[str, Any]]) -> 'ArtifactPolicy':
+        """Lê a política do corpo JSON da requisição (todas as opções são opt-in)"""
+        data = data or {}
+        return cls(
+            write_info_json=_flag(data.get('write_info_json')),
+            write_thumbnail=_flag(data.get('write_thumbnail')),
+            embed_metadata=_flag(data.get('embed_metadata')),
+            embed_thumbnail=_flag(data.get('embed_thumbnail')),
+        )
+
+    @property
+    def requested(self) -> bool:
+        """Indica se algum artefato extra foi pedido (o arquivo final deixa de ser o padrão)"""
+        return self.write_info_json or self.write_thumbnail or self.embed_metadata or self.embed_thumbnail
+
+    def apply(self, opts: Dict[str, Any], info_dict: Optional[Dict[str, Any]] = None,
+              merging: bool = False) -> Dict[str, Any]:
+        """Ajusta as opções do yt-dlp conforme a política"""
+        opts['writeinfojson'] = self.write_info_json
+        # O EmbedThumbnail precisa da thumbnail em disco; ele mesmo a apaga depois de embutir
+        opts['writethumbnail'] = self.write_thumbnail or self.embed_thumbnail
+
+        postprocessors = list(opts.get('postprocessors') or [])
+
+        if self.embed_metadata:
+            if merging and info_dict:
+                # Em merges os metadados vão na mesma execução do ffmpeg que junta vídeo e áudio
+                postprocessor_args = dict(opts.get('postprocessor_args') or {})
+                postprocessor_args['merger+ffmpeg_o'] = self.metadata_args(info_dict)
+                opts['postprocessor_args'] = postprocessor_args
+            else:
+                # Sem merge, o FFmpegMetadata faz um remux com cópia dos streams (sem recodificar)
+                postprocessors.append({'key': 'FFmpegMetadata', 'add_metadata': True, 'add_chapters': True})
+
+        if self.embed_thumbnail:
+            postprocessors.append({'key': 'EmbedThumbnail', 'already_have_thumbnail': self.write_thumbnail})
+
+        opts['postprocessors'] = postprocessors
+        return opts
+
+    @staticmethod
+    def metadata_args(info_dict: Dict[str, Any]) -> list:
+        """Argumentos -metadata do ffmpeg com os campos principais do vídeo"""
+        fields = {
+            'title': info_dict.get('title'),
+            'artist': info_dict.get('uploader'),
+            'date': info_dict.get('upload_date'),
+            'comment': info_dict.get('webpage_url'),
+            'description': (info_dict.get('description') or '')[:1000] or None,
+        }
+        args = []
+        for key, value in fields.items():
+            if value:
+                args.extend(['-metadata', f'{key}={value}'])
+        return args
@@ -0,0 +1,378 @@
+# src/utils/cache_backends.py
+
+import json
+import os
+import queue
+import socket
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+
+class CacheBackend:
+    """
+    Interface dos backends de cache: valores opacos com expiração absoluta (epoch).
+
+    `get` retorna (valor, expira_em) ou None. Backends compartilhados guardam bytes;
+    o MemoryBackend guarda os objetos Python como estão.
+    """
+
+    shared = False  # True quando o conteúdo é visto por outros processos/hosts
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: float):
+        raise NotImplementedError
+
+    def add(self, key: str, value: Any, ttl: float) -> bool:
+        """Grava só se a chave não existe (ou expirou); False se já existia. Atômico nos backends concretos"""
+        if self.get(key) is not None:
+            return False
+        self.set(key, value, ttl)
+        return True
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+
+class MemoryBackend(CacheBackend):
+    """Cache LRU em memória do processo"""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[str, Tuple[Any, float]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, value: Any, ttl: float):
+        with self._lock:
+            self._entries[key] = (value, time.time() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def add(self, key: str, value: Any, ttl: float) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > time.time():
+                return False
+            self._entries[key] = (value, time.time() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return True
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteBackend(CacheBackend):
+    """
+    Cache em arquivo SQLite (modo WAL), compartilhado pelos workers do mesmo host.
+
+    Cada thread usa a própria conexão; entradas expiradas são removidas a cada
+    `purge_every` gravações.
+    """
+
+    shared = True
+
+    def __init__(self, path: str, purge_every: int = 500):
+        self.path = path
+        self.purge_every = purge_every
+        self._writes = 0
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._connection().execute(
+            'CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)'
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        row = self._connection().execute(
+            'SELECT value, expires_at FROM cache WHERE key = ? AND expires_at > ?', (key, time.time())
+        ).fetchone()
+        return (bytes(row[0]), row[1]) if row else None
+
+    def set(self, key: str, value: bytes, ttl: float):
+        conn = self._connection()
+        conn.execute('INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)',
+                     (key, value, time.time() + ttl))
+        self._writes += 1
+        if self._writes % self.purge_every == 0:
+            conn.execute('DELETE FROM cache WHERE expires_at <= ?', (time.time(),))
+
+    def add(self, key: str, value: bytes, ttl: float) -> bool:
+        conn = self._connection()
+        now = time.time()
+        conn.execute('DELETE FROM cache WHERE key = ? AND expires_at <= ?', (key, now))
+        try:
+            # INSERT sem OR REPLACE: a chave primária decide entre workers concorrentes
+            conn.execute('INSERT INTO cache (key, value, expires_at) VALUES (?, ?, ?)', (key, value, now + ttl))
+        except sqlite3.IntegrityError:
+            return False
+        return True
+
+    def delete(self, key: str):
+        self._connection().execute('DELETE FROM cache WHERE key = ?', (key,))
+
+
+class RedisError(Exception):
+    """Erro retornado pelo servidor Redis"""
+
+
+class RedisBackend(CacheBackend):
+    """
+    Adaptador mínimo do protocolo RESP do Redis (GET/SET PX NX/DEL/PTTL), sem dependências.
+
+    Se o servidor cair, o backend fica em modo degradado por `retry_after` segundos
+    (gets retornam None e sets são ignorados) em vez de propagar erros para as rotas.
+    """
+
+    shared = True
+
+    def __init__(self, host: str = 'localhost', port: int = 6379, db: int = 0, password: Optional[str] = None,
+                 timeout: float = 1.0, pool_size: int = 8, retry_after: float = 5.0, prefix: str = 'ytdl:'):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self.prefix = prefix
+        self._pool: 'queue.LifoQueue' = queue.LifoQueue(maxsize=pool_size)
+        self._down_until = 0.0
+
+    # Protocolo
+
+    @staticmethod
+    def _encode(*args) -> bytes:
+        parts = [b'*%d\r\n' % len(args)]
+        for arg in args:
+            if not isinstance(arg, bytes):
+                arg = str(arg).encode('utf-8')
+            parts.append(b'$%d\r\n%s\r\n' % (len(arg), arg))
+        return b''.join(parts)
+
+    @classmethod
+    def _read_reply(cls, reader):
+        line = reader.readline()
+        if not line:
+            raise ConnectionError('Conexão com o Redis encerrada')
+        kind, payload = line[:1], line[1:-2]
+        if kind == b'+':
+            return payload.decode()
+        if kind == b'-':
+            raise RedisError(payload.decode())
+        if kind == b':':
+            return int(payload)
+        if kind == b'$':
+            length = int(payload)
+            if length < 0:
+                return None
+            data = reader.read(length + 2)
+            return data[:-2]
+        if kind == b'*':
+            length = int(payload)
+            return None if length < 0 else [cls._read_reply(reader) for _ in range(length)]
+        raise RedisError(f'Resposta RESP inválida: {line!r}')
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        conn = (sock, sock.makefile('rb'))
+        if self.password:
+            self._execute(conn, 'AUTH', self.password)
+        if self.db:
+            self._execute(conn, 'SELECT', self.db)
+        return conn
+
+    def _execute(self, conn, *args):
+        sock, reader = conn
+        sock.sendall(self._encode(*args))
+        return self._read_reply(reader)
+
+    def pipeline(self, *commands):
+        """Envia vários comandos em um único round-trip e retorna as respostas na ordem"""
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        try:
+            sock, reader = conn
+            sock.sendall(b''.join(self._encode(*command) for command in commands))
+            replies = []
+            for _ in commands:
+                # Lê todas as respostas mesmo se alguma for erro, para a conexão voltar limpa ao pool
+                try:
+                    replies.append(self._read_reply(reader))
+                except RedisError as e:
+                    replies.append(e)
+        except (OSError, ConnectionError):
+            conn[0].close()
+            raise
+        try:
+            self._pool.put_nowait(conn)
+        except queue.Full:
+            conn[0].close()
+        for reply in replies:
+            if isinstance(reply, RedisError):
+                raise reply
+        return replies
+
+    def command(self, *args):
+        """Executa um comando usando uma conexão do pool"""
+        return self.pipeline(args)[0]
+
+    def _safe(self, *commands):
+        if time.monotonic() < self._down_until:
+            return None
+        try:
+            return self.pipeline(*commands)
+        except (OSError, ConnectionError) as e:
+            self._down_until = time.monotonic() + self.retry_after
+            print(f"Redis indisponível em {self.host}:{self.port} ({e}); usando só o cache local por {self.retry_after}s")
+            return None
+        except RedisError as e:
+            print(f"Erro do Redis: {e}")
+            return None
+
+    # Interface CacheBackend
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        key = self.prefix + key
+        # GET e PTTL no mesmo round-trip
+        replies = self._safe(('GET', key), ('PTTL', key))
+        if not replies or replies[0] is None:
+            return None
+        value, pttl = replies
+        return value, time.time() + (pttl / 1000.0 if pttl and pttl > 0 else 3600)
+
+    def set(self, key: str, value: bytes, ttl: float):
+        self._safe(('SET', self.prefix + key, value, 'PX', max(1, int(ttl * 1000))))
+
+    def add(self, key: str, value: bytes, ttl: float) -> bool:
+        replies = self._safe(('SET', self.prefix + key, value, 'PX', max(1, int(ttl * 1000)), 'NX'))
+        if replies is None:
+            return True  # Redis indisponível: sem como conferir entre workers
+        return replies[0] is not None
+
+    def delete(self, key: str):
+        self._safe(('DEL', self.prefix + key))
+
+
+class TieredCache:
+    """
+    Cache em dois níveis: L1 em memória do processo e L2 compartilhado (SQLite ou Redis).
+
+    Leituras tentam o L1 e depois o L2 (promovendo o valor para o L1 com a validade
+    restante); gravações vão para os dois níveis. Valores são serializados em JSON
+    apenas para o L2.
+    """
+
+    def __init__(self, l1: Optional[MemoryBackend] = None, l2: Optional[CacheBackend] = None,
+                 dumps: Callable[[Any], bytes] = None, loads: Callable[[bytes], Any] = None):
+        self.l1 = l1 or MemoryBackend()
+        self.l2 = l2
+        self.dumps = dumps or (lambda value: json.dumps(value, separators=(',', ':'), default=str).encode('utf-8'))
+        self.loads = loads or (lambda data: json.loads(data))
+        self.l1_hits = 0
+        self.l2_hits = 0
+        self.misses = 0
+
+    def get_entry(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Retorna (valor, expira_em) ou None"""
+        entry = self.l1.get(key)
+        if entry is not None:
+            self.l1_hits += 1
+            return entry
+
+        if self.l2 is not None:
+            entry = self.l2.get(key)
+            if entry is not None:
+                value = self.loads(entry[0])
+                remaining = entry[1] - time.time()
+                if remaining > 0:
+                    self.l1.set(key, value, remaining)
+                self.l2_hits += 1
+                return value, entry[1]
+
+        self.misses += 1
+        return None
+
+    def get(self, key: str) -> Any:
+        entry = self.get_entry(key)
+        return entry[0] if entry else None
+
+    def set(self, key: str, value: Any, ttl: float):
+        self.l1.set(key, value, ttl)
+        if self.l2 is not None:
+            self.l2.set(key, self.dumps(value), ttl)
+
+    def delete(self, key: str):
+        self.l1.delete(key)
+        if self.l2 is not None:
+            self.l2.delete(key)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.l1_hits + self.l2_hits + self.misses
+        hits = self.l1_hits + self.l2_hits
+        return {
+            'backend': type(self.l2).__name__ if self.l2 is not None else 'MemoryBackend',
+            'l1_entries': len(self.l1),
+            'l1_hits': self.l1_hits,
+            'l2_hits': self.l2_hits,
+            'misses': self.misses,
+            'hit_rate': round(hits / total, 4) if total else 0.0,
+        }
+
+
+def backend_from_url(url: Optional[str]) -> Optional[CacheBackend]:
+    """
+    Cria o backend L2 a partir de uma URL:
+      memory:// (ou vazio)          - sem L2, só o cache do processo
+      sqlite:////caminho/cache.db   - arquivo SQLite compartilhado pelos workers do host
+      redis://[:senha@]host:6379/0  - servidor Redis (ou compatível) compartilhado pela frota
+    """
+    if not url or url.startswith('memory:'):
+        return None
+    parsed = urlparse(url)
+    if parsed.scheme == 'sqlite':
+        path = url[len('sqlite:///'):] if url.startswith('sqlite:///') else parsed.path
+        return SQLiteBackend(path or 'cache.db')
+    if parsed.scheme == 'redis':
+        db = int(parsed.path.lstrip('/') or 0)
+        return RedisBackend(parsed.hostname or 'localhost', parsed.port or 6379, db=db, password=parsed.password)
+    raise ValueError(f'Backend de cache não suportado: {url}')
+
+
+def cache_from_url(url: Optional[str], l1_entries: int = 256, dumps: Callable[[Any], bytes] = None,
+                   loads: Callable[[bytes], Any] = None) -> TieredCache:
+    """TieredCache com L1 em memória e L2 definido pela URL (dumps/loads: serialização do L2)"""
+    return TieredCache(MemoryBackend(l1_entries), backend_from_url(url), dumps=dumps, loads=loads)
@@ -0,0 +1,118 @@
+# src/utils/cache_warmer.py
+
+import threading
+from datetime import datetime
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+
+def parse_hour_window(value: Optional[str]) -> Optional[Tuple[int, int]]:
+    """Converte "2-6" em (2, 6); janelas que atravessam a meia-noite ("22-4") são aceitas"""
+    if not value:
+        return None
+    start, _, end = value.partition('-')
+    return int(start) % 24, int(end or start) % 24
+
+
+class CacheWarmer:
+    """
+    Pré-aquece os caches com os vídeos mais populares do histórico, fora do horário de pico.
+
+    A cada `interval` segundos, se estiver em horário de baixa, re-extrai os metadados dos
+    `top_n` vídeos mais requisitados (quando estão ausentes ou perto de expirar) e, se
+    `prefetch` for informado, baixa os formatos mais populares para o cache de mídia.
+    """
+
+    def __init__(self, app, history, warm_metadata: Callable[[str], Any], metadata_expires_in: Callable[[str], float],
+                 prefetch: Optional[Callable[[str, Optional[str]], Any]] = None, interval: float = 600,
+                 top_n: int = 20, lookback_hours: float = 24, off_peak_hours: Optional[Tuple[int, int]] = None,
+                 off_peak_ratio: float = 0.3, refresh_margin: float = 600):
+        self.app = app
+        self.history = history
+        self.warm_metadata = warm_metadata              # Extrai e grava no cache de metadados
+        self.metadata_expires_in = metadata_expires_in  # Segundos até a entrada do cache expirar
+        self.prefetch = prefetch                        # Baixa (vídeo, formato) para o cache de mídia
+        self.interval = interval
+        self.top_n = top_n
+        self.lookback_hours = lookback_hours
+        self.off_peak_hours = off_peak_hours    # Janela fixa; sem ela, a baixa é inferida do histórico
+        self.off_peak_ratio = off_peak_ratio    # Hora "de baixa": média abaixo desta fração do pico
+        self.refresh_margin = refresh_margin
+        self.last_run: Dict[str, Any] = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def is_off_peak(self, now: Optional[datetime] = None) -> bool:
+        """Verifica se a hora atual está na janela de baixa demanda"""
+        now = now or datetime.utcnow()
+        if self.off_peak_hours:
+            start, end = self.off_peak_hours
+            if start <= end:
+                return start <= now.hour < end
+            return now.hour >= start or now.hour < end
+
+        # Perfil por hora do dia dos últimos 7 dias
+        profile: Dict[int, List[int]] = {}
+        for bucket in self.history.hourly_usage(hours=24 * 7):
+            hour = int(bucket['hour'][11:13])
+            profile.setdefault(hour, []).append(bucket['requests'])
+        if not profile:
+            return True
+        averages = {hour: sum(counts) / 7 for hour, counts in profile.items()}
+        return averages.get(now.hour, 0) <= self.off_peak_ratio * max(averages.values())
+
+    def run_once(self, force: bool = False) -> Dict[str, Any]:
+        """Executa uma rodada de pré-aquecimento e retorna um resumo"""
+        summary = {'started_at': datetime.utcnow().isoformat(), 'warmed': [], 'prefetched': [], 'errors': 0}
+        with self.app.app_context():
+            if not force and not self.is_off_peak():
+                summary['skipped'] = 'horário de pico'
+                self.last_run = summary
+                return summary
+            videos = self.history.top_videos(self.lookback_hours, self.top_n)
+            formats = self.history.top_formats(self.lookback_hours, self.top_n) if self.prefetch else []
+
+        for video in videos:
+            if self._stop.is_set():
+                break
+            video_id = video['video_id']
+            if self.metadata_expires_in(video_id) > self.refresh_margin:
+                continue
+            try:
+                self.warm_metadata(video_id)
+                summary['warmed'].append(video_id)
+            except Exception as e:
+                summary['errors'] += 1
+                print(f"Erro ao pré-aquecer metadados de {video_id}: {e}")
+
+        for item in formats:
+            if self._stop.is_set():
+                break
+            try:
+                if self.prefetch(item['video_id'], item['format_id']):
+                    summary['prefetched'].append(f"{item['video_id']}:{item['format_id'] or 'default'}")
+            except Exception as e:
+                summary['errors'] += 1
+                print(f"Erro ao pré-baixar {item['video_id']} ({item['format_id']}): {e}")
+
+        self.last_run = summary
+        return summary
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                summary = self.run_once()
+                if summary['warmed'] or summary['prefetched']:
+                    print(f"Cache warmer: {len(summary['warmed'])} metadados, {len(summary['prefetched'])} mídias")
+            except Exception as e:
+                print(f"Erro no cache warmer: {e}")
+
+    def start(self) -> 'CacheWarmer':
+        """Inicia o pré-aquecimento periódico em uma thread de fundo"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='cache-warmer', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,170 @@
+# src/utils/circuit_breaker.py
+
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpen(Exception):
+    """A estratégia está com o circuito aberto: a chamada foi pulada sem tocar o upstream"""
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker de uma estratégia de extração (yt-dlp, oEmbed, scraping...).
+
+    Fechado, conta sucessos e falhas numa janela de `window` segundos; com pelo menos
+    `min_requests` chamadas e taxa de falha >= `failure_rate`, abre. Aberto, recusa as chamadas
+    na hora (CircuitOpen) por `open_seconds`; depois fica meio-aberto e deixa passar até
+    `probes` chamadas de teste: um sucesso fecha o circuito, uma falha o abre de novo.
+    """
+
+    def __init__(self, name: str, window: float = 60, min_requests: int = 5, failure_rate: float = 0.5,
+                 open_seconds: float = 30, probes: int = 1):
+        self.name = name
+        self.window = window
+        self.min_requests = min_requests
+        self.failure_rate = failure_rate
+        self.open_seconds = open_seconds
+        self.probes = probes
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._results = deque()  # (timestamp, sucesso)
+        self._lock = threading.Lock()
+        self.rejected = 0
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state(time.monotonic())
+
+    def _current_state(self, now: float) -> str:
+        # Chamado com o lock: o circuito aberto vira meio-aberto quando o tempo de espera passa
+        if self._state == OPEN and now - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._probes_in_flight = 0
+        return self._state
+
+    def _prune(self, now: float):
+        while self._results and now - self._results[0][0] > self.window:
+            self._results.popleft()
+
+    def allow(self) -> bool:
+        """True se a chamada pode ir ao upstream (no meio-aberto, reserva uma das sondas)"""
+        with self._lock:
+            state = self._current_state(time.monotonic())
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and self._probes_in_flight < self.probes:
+                self._probes_in_flight += 1
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            now = time.monotonic()
+            if self._current_state(now) == HALF_OPEN:
+                # A sonda passou: o upstream voltou, a janela recomeça do zero
+                self._state = CLOSED
+                self._results.clear()
+            self._results.append((now, True))
+            self._prune(now)
+
+    def record_failure(self):
+        with self._lock:
+            now = time.monotonic()
+            state = self._current_state(now)
+            self._results.append((now, False))
+            self._prune(now)
+            if state == HALF_OPEN:
+                self._open(now)
+                return
+            failures = sum(1 for _, ok in self._results if not ok)
+            if state == CLOSED and len(self._results) >= self.min_requests and \
+                    failures / len(self._results) >= self.failure_rate:
+                self._open(now)
+
+    def _open(self, now: float):
+        self._state = OPEN
+        self._opened_at = now
+        self._probes_in_flight = 0
+        self.times_opened += 1
+        print(f"Circuito '{self.name}' aberto por {self.open_seconds:g} s")
+
+    def call(self, fn: Callable[[], Any], is_failure: Optional[Callable[[Any], bool]] = None,
+             counts: Optional[Callable[[Exception], bool]] = None) -> Any:
+        """
+        Executa `fn` pelo circuito. Exceções contam como falha (salvo se `counts(exc)` for
+        False, ex.: vídeo privado não é culpa da estratégia) e são relançadas; resultados com
+        `is_failure(resultado)` verdadeiro também contam como falha, mas são retornados.
+        """
+        if not self.allow():
+            raise CircuitOpen(f"Circuito '{self.name}' aberto")
+        try:
+            result = fn()
+        except Exception as e:
+            if counts is None or counts(e):
+                self.record_failure()
+            else:
+                self.record_success()
+            raise
+        if is_failure is not None and is_failure(result):
+            self.record_failure()
+        else:
+            self.record_success()
+        return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            now = time.monotonic()
+            state = self._current_state(now)
+            self._prune(now)
+            failures = sum(1 for _, ok in self._results if not ok)
+            return {
+                'state': state,
+                'requests': len(self._results),
+                'failures': failures,
+                'failure_rate': round(failures / len(self._results), 3) if self._results else 0.0,
+                'retry_in': round(max(0.0, self.open_seconds - (now - self._opened_at)), 1) if state == OPEN else 0.0,
+                'rejected': self.rejected,
+                'times_opened': self.times_opened,
+            }
+
+
+class CircuitBreakerRegistry:
+    """Um circuito por estratégia, criado no primeiro uso com a mesma configuração"""
+
+    def __init__(self, **settings):
+        self.settings = settings
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(name)
+            if breaker is None:
+                breaker = self._breakers[name] = CircuitBreaker(name, **self.settings)
+            return breaker
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return {breaker.name: breaker.snapshot() for breaker in breakers}
+
+
+# Circuitos do processo, compartilhados pelo ServerlessYouTubeExtractor e pelo api/index.py
+breakers = CircuitBreakerRegistry(
+    window=float(os.environ.get('BREAKER_WINDOW', 60)),
+    min_requests=int(os.environ.get('BREAKER_MIN_REQUESTS', 5)),
+    failure_rate=float(os.environ.get('BREAKER_FAILURE_RATE', 0.5)),
+    open_seconds=float(os.environ.get('BREAKER_OPEN_SECONDS', 30)),
+)
@@ -0,0 +1,68 @@
+# src/utils/client_disconnect.py
+
+import socket
+import threading
+from typing import Callable, Optional
+
+
+def client_socket(environ) -> Optional[socket.socket]:
+    """Socket da conexão do cliente, quando o servidor WSGI o expõe (werkzeug, gunicorn)"""
+    for key in ('werkzeug.socket', 'gunicorn.socket'):
+        sock = environ.get(key)
+        if isinstance(sock, socket.socket):
+            return sock
+    return None
+
+
+def is_disconnected(sock: socket.socket) -> bool:
+    """
+    Verifica sem consumir dados se o cliente fechou a conexão: um recv com MSG_PEEK que
+    retorna vazio é o FIN do cliente; sem dados pendentes a leitura daria EAGAIN.
+    """
+    try:
+        return sock.recv(1, socket.MSG_PEEK | socket.MSG_DONTWAIT) == b''
+    except (BlockingIOError, InterruptedError):
+        return False
+    except OSError:
+        return True
+
+
+class DisconnectWatcher:
+    """
+    Thread que acompanha a conexão do cliente enquanto o servidor trabalha antes de responder
+    (ex.: o yt-dlp baixando e o ffmpeg juntando vídeo e áudio) e chama `on_disconnect` uma vez
+    se o cliente for embora. Sem socket acessível (outros servidores WSGI), não faz nada.
+    """
+
+    def __init__(self, environ, on_disconnect: Callable[[], None], interval: float = 0.5):
+        self.sock = client_socket(environ)
+        self.on_disconnect = on_disconnect
+        self.interval = interval
+        self.disconnected = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> 'DisconnectWatcher':
+        if self.sock is not None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            if is_disconnected(self.sock):
+                self.disconnected = True
+                try:
+                    self.on_disconnect()
+                except Exception as e:
+                    print(f"Erro ao tratar desconexão do cliente: {e}")
+                return
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
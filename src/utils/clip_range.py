@@ -0,0 +1,88 @@
+# src/utils/clip_range.py
+
+import math
+import re
+from typing import Any, Dict, Optional
+
+from yt_dlp.utils import download_range_func
+
+_TIMESTAMP_PATTERN = re.compile(r'^(?:(\d+):)?(\d{1,2}):(\d{1,2}(?:\.\d+)?)$')
+
+
+def parse_timestamp(value: Any) -> Optional[float]:
+    """Segundos a partir de um número ou de "SS", "MM:SS" ou "HH:MM:SS(.mmm)"; None se ausente"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, bool):
+        raise ValueError(f'Tempo inválido: {value!r}')
+    if isinstance(value, (int, float)):
+        seconds = float(value)
+    else:
+        text = str(value).strip()
+        match = _TIMESTAMP_PATTERN.match(text)
+        if match:
+            hours, minutes, secs = match.groups()
+            seconds = int(hours or 0) * 3600 + int(minutes) * 60 + float(secs)
+        else:
+            try:
+                seconds = float(text)
+            except ValueError:
+                raise ValueError(f'Tempo inválido: {value!r} (use segundos ou HH:MM:SS)')
+    if not math.isfinite(seconds) or seconds < 0:
+        raise ValueError(f'Tempo inválido: {value!r}')
+    return seconds
+
+
+class ClipRange:
+    """
+    Trecho [start, end) de um vídeo pedido no download.
+
+    O yt-dlp recebe o trecho em `download_ranges` e busca só os bytes/fragmentos dele, então
+    banda e disco ficam proporcionais ao tamanho do clipe. Sem `force_keyframes`, os cortes
+    caem no keyframe mais próximo e o stream é copiado; com ele, o ffmpeg recodifica o vídeo
+    para cortar no tempo exato (mais CPU).
+    """
+
+    def __init__(self, start: float = 0.0, end: Optional[float] = None):
+        self.start = start
+        self.end = end
+
+    @classmethod
+    def from_request(cls, data: Optional[Dict[str, Any]]) -> Optional['ClipRange']:
+        """Lê `start`/`end` do corpo JSON; None se nenhum foi enviado. ValueError se inválidos"""
+        data = data or {}
+        start = parse_timestamp(data.get('start'))
+        end = parse_timestamp(data.get('end'))
+        if start is None and end is None:
+            return None
+        clip = cls(start or 0.0, end)
+        if clip.end is not None and clip.end <= clip.start:
+            raise ValueError('O fim do trecho deve ser maior que o início.')
+        return clip
+
+    def validate(self, duration: Optional[float]):
+        """Confere o trecho contra a duração do vídeo (quando conhecida) e limita o fim a ela"""
+        if not duration:
+            return
+        if self.start >= duration:
+            raise ValueError(f'O início do trecho passa da duração do vídeo ({int(duration)} s).')
+        if self.end is None or self.end > duration:
+            self.end = float(duration)
+
+    def fraction(self, duration: Optional[float]) -> float:
+        """Parte do vídeo coberta pelo trecho (1.0 se a duração não é conhecida)"""
+        if not duration or self.end is None:
+            return 1.0
+        return min(1.0, max(0.0, (self.end - self.start) / duration))
+
+    @property
+    def suffix(self) -> str:
+        """Sufixo para o nome do arquivo baixado, ex.: `_clip_90-150`"""
+        end = f'{self.end:g}' if self.end is not None else 'fim'
+        return f'_clip_{self.start:g}-{end}'
+
+    def apply(self, opts: Dict[str, Any], force_keyframes: bool = False) -> Dict[str, Any]:
+        """Ajusta as opções do yt-dlp para baixar só o trecho"""
+        opts['download_ranges'] = download_range_func(None, [(self.start, self.end if self.end is not None else math.inf)])
+        opts['force_keyframes_at_cuts'] = force_keyframes
+        return opts
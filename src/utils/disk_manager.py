@@ -0,0 +1,236 @@
+# src/utils/disk_manager.py
+
+import fnmatch
+import os
+import shutil
+import threading
+import time
+from typing import Callable, Dict, Any, List, Optional
+
+# Artefatos deixados por downloads falhos ou interrompidos
+ORPHAN_PATTERNS = [
+    '*.part',          # Download parcial
+    '*.part-Frag*',    # Fragmentos parciais
+    '*.ytdl',          # Estado de retomada do yt-dlp
+    '*.temp.*',        # Arquivos temporários do merge
+    '*.f[0-9]*.*',     # Componentes de formato (ex.: .f137.mp4) que não foram combinados
+    '*.info.json',     # Metadados
+    '*.jpg',           # Thumbnails
+    '*.webp',
+    '*.png',
+]
+
+# Arquivo com o PID do servidor dono de um diretório de downloads (nunca removido pelo janitor)
+OWNER_PID_FILE = 'owner.pid'
+
+
+class InsufficientDiskSpace(Exception):
+    """Não há espaço livre para o download mesmo após aguardar a fila"""
+
+    def __init__(self, required: int, available: int):
+        super().__init__(f'Espaço insuficiente: necessário {required} bytes, disponível {available} bytes')
+        self.required = required
+        self.available = available
+
+
+def write_owner_pid(directory: str):
+    """Marca o diretório de downloads como em uso por este processo"""
+    with open(os.path.join(directory, OWNER_PID_FILE), 'w') as f:
+        f.write(str(os.getpid()))
+
+
+def owner_alive(directory: str) -> bool:
+    """True se o processo que gravou o `owner.pid` do diretório ainda está rodando"""
+    try:
+        with open(os.path.join(directory, OWNER_PID_FILE)) as f:
+            pid = int(f.read().strip())
+    except (OSError, ValueError):
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # Processo de outro usuário
+    return True
+
+
+class DownloadJanitor:
+    """Remove periodicamente artefatos órfãos do diretório de downloads"""
+
+    def __init__(self, directory: str, orphan_age: float = 1800, stale_age: float = 6 * 3600,
+                 interval: float = 300, patterns: Optional[List[str]] = None, exclude: Optional[List[str]] = None,
+                 in_use: Optional[Callable[[str], bool]] = None):
+        self.directory = directory
+        self.orphan_age = orphan_age    # Idade mínima para remover arquivos que casam com os padrões
+        self.stale_age = stale_age      # Idade mínima para remover qualquer outro arquivo
+        self.interval = interval
+        self.patterns = patterns or ORPHAN_PATTERNS
+        # Subárvores com dono próprio (ex.: o cache de mídia, que tem LRU e TTL próprios)
+        self.exclude = [os.path.abspath(path) for path in exclude or []]
+        # Diretórios de jobs em andamento: nada dentro deles é removido, por mais velho que seja
+        # (um download longo ainda vai usar a thumbnail e os streams no merge)
+        self.in_use = in_use
+        self._stop = threading.Event()
+        self._thread = None
+
+    def is_orphan_artifact(self, filename: str) -> bool:
+        """Verifica se o nome do arquivo casa com algum padrão de artefato órfão"""
+        return any(fnmatch.fnmatch(filename, pattern) for pattern in self.patterns)
+
+    def is_excluded(self, path: str) -> bool:
+        path = os.path.abspath(path)
+        return any(path == excluded or path.startswith(excluded + os.sep) for excluded in self.exclude)
+
+    def reap_once(self, orphan_age: Optional[float] = None, stale_age: Optional[float] = None) -> List[str]:
+        """Faz uma varredura e retorna os caminhos removidos"""
+        orphan_age = self.orphan_age if orphan_age is None else orphan_age
+        stale_age = self.stale_age if stale_age is None else stale_age
+        now = time.time()
+        removed = []
+
+        if not os.path.isdir(self.directory):
+            return removed
+
+        for root, dirs, files in os.walk(self.directory, topdown=False):
+            if self.is_excluded(root) or (self.in_use is not None and self.in_use(root)):
+                continue
+            for filename in files:
+                if filename == OWNER_PID_FILE:
+                    continue
+                path = os.path.join(root, filename)
+                try:
+                    age = now - os.path.getmtime(path)
+                    max_age = orphan_age if self.is_orphan_artifact(filename) else stale_age
+                    if age >= max_age:
+                        os.remove(path)
+                        removed.append(path)
+                except OSError:
+                    # Arquivo removido por outra thread ou ainda em uso
+                    continue
+
+            # Remove subdiretórios vazios deixados por jobs abandonados
+            if root != self.directory:
+                try:
+                    if not os.listdir(root) and now - os.path.getmtime(root) >= orphan_age:
+                        os.rmdir(root)
+                        removed.append(root)
+                except OSError:
+                    continue
+
+        return removed
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                removed = self.reap_once()
+                if removed:
+                    print(f"Janitor: {len(removed)} artefatos órfãos removidos de {self.directory}")
+            except Exception as e:
+                print(f"Erro no janitor de downloads: {e}")
+
+    def start(self) -> 'DownloadJanitor':
+        """Inicia a varredura periódica em uma thread de fundo"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='download-janitor', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Interrompe a varredura periódica"""
+        self._stop.set()
+
+
+class DiskReservation:
+    """Espaço reservado para um download; deve ser liberado quando o arquivo for removido"""
+
+    def __init__(self, admission: 'DiskAdmission', size: int):
+        self.admission = admission
+        self.size = size
+        self._released = False
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self.admission._release(self.size)
+
+
+class DiskAdmission:
+    """Controle de admissão: só inicia downloads cujo tamanho estimado cabe no disco"""
+
+    def __init__(self, directory: str, min_free_bytes: int = 512 * 1024 * 1024, wait_timeout: float = 30,
+                 safety_factor: float = 1.1):
+        self.directory = directory
+        self.min_free_bytes = min_free_bytes    # Margem que nunca é entregue a downloads
+        self.wait_timeout = wait_timeout        # Tempo máximo na fila esperando espaço
+        self.safety_factor = safety_factor      # Folga sobre o tamanho estimado
+        self.reserved_bytes = 0
+        self._condition = threading.Condition()
+
+    def free_bytes(self) -> int:
+        """Espaço livre no disco do diretório de downloads"""
+        return shutil.disk_usage(self.directory).free
+
+    def available_bytes(self) -> int:
+        """Espaço livre descontando a margem e o que já foi reservado por downloads em andamento"""
+        return self.free_bytes() - self.min_free_bytes - self.reserved_bytes
+
+    def reserve(self, estimated_size: int, timeout: Optional[float] = None) -> DiskReservation:
+        """Reserva espaço para o download, aguardando na fila até `timeout` segundos"""
+        required = int((estimated_size or 0) * self.safety_factor)
+        timeout = self.wait_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+
+        with self._condition:
+            while True:
+                available = self.available_bytes()
+                if required <= available:
+                    self.reserved_bytes += required
+                    return DiskReservation(self, required)
+
+                remaining = deadline - time.monotonic()
+                # Se o download não cabe nem com o disco vazio de reservas, não adianta esperar
+                if remaining <= 0 or required > available + self.reserved_bytes:
+                    raise InsufficientDiskSpace(required, max(0, available))
+                self._condition.wait(min(remaining, 1.0))
+
+    def _release(self, size: int):
+        with self._condition:
+            self.reserved_bytes = max(0, self.reserved_bytes - size)
+            self._condition.notify_all()
+
+
+def estimate_format_size(fmt: Optional[Dict[str, Any]], duration: Optional[float] = None) -> int:
+    """Tamanho de um formato a partir de filesize/filesize_approx (ou bitrate x duração)"""
+    if not fmt:
+        return 0
+    size = fmt.get('filesize') or fmt.get('filesize_approx')
+    if not size and fmt.get('tbr') and duration:
+        size = fmt['tbr'] * 1000 / 8 * duration
+    return int(size or 0)
+
+
+def estimate_download_size(info_dict: Dict[str, Any], selected_format: Optional[Dict[str, Any]],
+                           merge_audio: bool = False) -> int:
+    """
+    Estima o espaço em disco que o download vai ocupar no pico.
+
+    Em merges, os componentes de vídeo e áudio coexistem com o arquivo final até o
+    yt-dlp apagá-los, então o pico é o dobro da soma dos componentes.
+    """
+    duration = info_dict.get('duration')
+    size = estimate_format_size(selected_format, duration)
+
+    if merge_audio:
+        audio_formats = [
+            f for f in info_dict.get('formats', [])
+            if f.get('vcodec') == 'none' and f.get('acodec') not in (None, 'none')
+        ]
+        m4a = [f for f in audio_formats if f.get('ext') == 'm4a'] or audio_formats
+        if m4a:
+            best_audio = max(m4a, key=lambda f: f.get('abr') or f.get('tbr') or 0)
+            size += estimate_format_size(best_audio, duration)
+        size *= 2
+
+    return size
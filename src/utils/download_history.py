@@ -0,0 +1,221 @@
+# src/utils/download_history.py
+
+import atexit
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional
+
+from sqlalchemy import case, func, insert
+
+from src.models.user import db
+from src.models.download import DownloadRecord
+
+
+class DownloadHistory:
+    """
+    Histórico persistente de requisições de info/download.
+
+    Os registros entram em uma fila em memória e uma thread de fundo os grava em lotes,
+    fora do caminho da requisição. Enquanto `init_app` não for chamado, `record` é no-op.
+    """
+
+    def __init__(self, batch_size: int = 200, flush_interval: float = 2.0, max_queue: int = 10000):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.app = None
+        self.dropped = 0
+        self._queue: 'queue.Queue[Dict[str, Any]]' = queue.Queue(maxsize=max_queue)
+        self._write_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def init_app(self, app) -> 'DownloadHistory':
+        """Associa o histórico ao app (que já deve ter o `db` configurado) e inicia o gravador"""
+        self.app = app
+        app.extensions['download_history'] = self
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='download-history', daemon=True)
+            self._thread.start()
+            atexit.register(self.stop)
+        return self
+
+    @property
+    def enabled(self) -> bool:
+        return self.app is not None
+
+    def record(self, video_id: Optional[str], kind: str, status: str, format_id: Optional[str] = None,
+               http_status: Optional[int] = None, bytes_served: int = 0, duration_ms: Optional[int] = None,
+               error: Optional[str] = None):
+        """Enfileira um registro; nunca bloqueia a requisição (descarta se a fila estiver cheia)"""
+        if not self.enabled or not video_id:
+            return
+        row = {
+            'video_id': video_id,
+            'format_id': format_id,
+            'kind': kind,
+            'status': status,
+            'http_status': http_status,
+            'bytes_served': int(bytes_served or 0),
+            'duration_ms': duration_ms,
+            'error': error[:255] if error else None,
+            'created_at': datetime.utcnow(),
+        }
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            self.dropped += 1
+
+    def _drain(self, block: bool) -> List[Dict[str, Any]]:
+        rows = []
+        try:
+            if block:
+                rows.append(self._queue.get(timeout=self.flush_interval))
+            while len(rows) < self.batch_size:
+                rows.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return rows
+
+    def _write(self, rows: List[Dict[str, Any]]):
+        with self._write_lock, self.app.app_context():
+            try:
+                db.session.execute(insert(DownloadRecord), rows)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                print(f"Erro ao gravar histórico de downloads ({len(rows)} registros): {e}")
+            finally:
+                db.session.remove()
+
+    def flush(self):
+        """Grava imediatamente tudo o que está na fila"""
+        if not self.enabled:
+            return
+        while True:
+            rows = self._drain(block=False)
+            if not rows:
+                break
+            self._write(rows)
+
+    def _run(self):
+        while not self._stop.is_set():
+            rows = self._drain(block=True)
+            if rows:
+                self._write(rows)
+
+    def stop(self):
+        """Interrompe o gravador e grava o que restou na fila"""
+        self._stop.set()
+        self.flush()
+
+    # Consultas
+
+    @staticmethod
+    def _since(hours: float) -> datetime:
+        return datetime.utcnow() - timedelta(hours=hours)
+
+    def top_videos(self, hours: float = 24, limit: int = 10, kind: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Vídeos mais requisitados no período (base para o pré-aquecimento de cache)"""
+        downloads = func.sum(case((DownloadRecord.kind == 'download', 1), else_=0))
+        query = db.session.query(
+            DownloadRecord.video_id,
+            func.count(DownloadRecord.id).label('requests'),
+            downloads.label('downloads'),
+            func.sum(DownloadRecord.bytes_served).label('bytes_served'),
+            func.max(DownloadRecord.created_at).label('last_seen'),
+        ).filter(DownloadRecord.created_at >= self._since(hours))
+        if kind:
+            query = query.filter(DownloadRecord.kind == kind)
+        rows = query.group_by(DownloadRecord.video_id).order_by(func.count(DownloadRecord.id).desc()).limit(limit)
+
+        return [{
+            'video_id': row.video_id,
+            'requests': row.requests,
+            'downloads': int(row.downloads or 0),
+            'bytes_served': int(row.bytes_served or 0),
+            'last_seen': row.last_seen.isoformat() if row.last_seen else None,
+        } for row in rows]
+
+    def top_formats(self, hours: float = 24, limit: int = 10) -> List[Dict[str, Any]]:
+        """Pares (vídeo, formato) mais baixados com sucesso no período"""
+        rows = db.session.query(
+            DownloadRecord.video_id,
+            DownloadRecord.format_id,
+            func.count(DownloadRecord.id).label('downloads'),
+        ).filter(
+            DownloadRecord.kind == 'download',
+            DownloadRecord.status == 'success',
+            DownloadRecord.created_at >= self._since(hours),
+        ).group_by(DownloadRecord.video_id, DownloadRecord.format_id) \
+            .order_by(func.count(DownloadRecord.id).desc()).limit(limit)
+
+        return [{'video_id': row.video_id, 'format_id': row.format_id, 'downloads': row.downloads} for row in rows]
+
+    def hourly_usage(self, hours: float = 24) -> List[Dict[str, Any]]:
+        """Requisições, downloads e bytes servidos por hora (base para o planejamento de capacidade)"""
+        bucket = func.strftime('%Y-%m-%dT%H:00:00', DownloadRecord.created_at)
+        rows = db.session.query(
+            bucket.label('hour'),
+            func.count(DownloadRecord.id).label('requests'),
+            func.sum(case((DownloadRecord.kind == 'download', 1), else_=0)).label('downloads'),
+            func.sum(DownloadRecord.bytes_served).label('bytes_served'),
+            func.avg(DownloadRecord.duration_ms).label('avg_duration_ms'),
+        ).filter(DownloadRecord.created_at >= self._since(hours)).group_by(bucket).order_by(bucket)
+
+        return [{
+            'hour': row.hour,
+            'requests': row.requests,
+            'downloads': int(row.downloads or 0),
+            'bytes_served': int(row.bytes_served or 0),
+            'avg_duration_ms': round(row.avg_duration_ms) if row.avg_duration_ms is not None else None,
+        } for row in rows]
+
+    def failure_rates(self, hours: float = 24) -> List[Dict[str, Any]]:
+        """Taxa de falhas por tipo de requisição e formato"""
+        failures = func.sum(case((DownloadRecord.status != 'success', 1), else_=0))
+        rows = db.session.query(
+            DownloadRecord.kind,
+            DownloadRecord.format_id,
+            func.count(DownloadRecord.id).label('total'),
+            failures.label('failures'),
+        ).filter(DownloadRecord.created_at >= self._since(hours)) \
+            .group_by(DownloadRecord.kind, DownloadRecord.format_id) \
+            .order_by(failures.desc())
+
+        return [{
+            'kind': row.kind,
+            'format_id': row.format_id,
+            'total': row.total,
+            'failures': int(row.failures or 0),
+            'failure_rate': round((row.failures or 0) / row.total, 4) if row.total else 0.0,
+        } for row in rows]
+
+    def totals(self, hours: float = 24) -> Dict[str, Any]:
+        """Resumo do período: requisições, falhas e bytes servidos"""
+        row = db.session.query(
+            func.count(DownloadRecord.id),
+            func.sum(case((DownloadRecord.status != 'success', 1), else_=0)),
+            func.sum(DownloadRecord.bytes_served),
+        ).filter(DownloadRecord.created_at >= self._since(hours)).one()
+        total, failures, bytes_served = row
+        return {
+            'hours': hours,
+            'requests': total or 0,
+            'failures': int(failures or 0),
+            'failure_rate': round((failures or 0) / total, 4) if total else 0.0,
+            'bytes_served': int(bytes_served or 0),
+            'pending_writes': self._queue.qsize(),
+            'dropped_records': self.dropped,
+        }
+
+
+def elapsed_ms(started: float) -> int:
+    """Milissegundos desde `started` (time.perf_counter)"""
+    return int((time.perf_counter() - started) * 1000)
+
+
+# Instância compartilhada pelas rotas; o app a ativa com download_history.init_app(app)
+download_history = DownloadHistory()
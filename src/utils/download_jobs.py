@@ -0,0 +1,121 @@
+# src/utils/download_jobs.py
+
+import os
+import re
+import shutil
+import signal
+import threading
+import uuid
+from typing import Dict, Any, Optional
+
+from yt_dlp.utils import DownloadCancelled
+
+# Arquivos intermediários de um merge do yt-dlp: <id>.f137.mp4, <id>.f140.m4a
+_COMPONENT_PATTERN = re.compile(r'\.f([0-9A-Za-z_-]+)\.[0-9A-Za-z]+$')
+
+
+def kill_child_processes(marker: str, sig: int = signal.SIGTERM) -> int:
+    """
+    Envia `sig` aos processos filhos deste processo cuja linha de comando contém `marker`
+    (ex.: o ffmpeg de um merge, que recebe caminhos dentro do diretório do job).
+    Usa /proc; em sistemas sem /proc não faz nada. Retorna quantos processos foram sinalizados.
+    """
+    if not os.path.isdir('/proc'):
+        return 0
+    parent = os.getpid()
+    killed = 0
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat', 'rb') as f:
+                # O nome do processo (2º campo) pode ter espaços: o PPID vem depois do último ')'
+                ppid = int(f.read().rsplit(b')', 1)[1].split()[1])
+            if ppid != parent:
+                continue
+            with open(f'/proc/{entry}/cmdline', 'rb') as f:
+                cmdline = f.read().replace(b'\0', b' ').decode('utf-8', 'replace')
+            if marker in cmdline:
+                os.kill(int(entry), sig)
+                killed += 1
+        except (OSError, ValueError, IndexError):
+            continue
+    return killed
+
+
+# Diretórios de jobs ainda não limpos (download, merge ou streaming do arquivo em andamento)
+_active_work_dirs = set()
+_active_lock = threading.Lock()
+
+
+def in_active_job(path: str) -> bool:
+    """True se `path` fica dentro do diretório de um job ativo; o janitor não mexe nele"""
+    path = os.path.abspath(path)
+    with _active_lock:
+        return any(path == work_dir or path.startswith(work_dir + os.sep) for work_dir in _active_work_dirs)
+
+
+class DownloadJob:
+    """Download isolado em um diretório próprio, com o caminho final informado pelos hooks do yt-dlp"""
+
+    def __init__(self, base_dir: str):
+        # Nome sempre gerado aqui: o job_id do cliente é só a chave do progresso
+        self.id = uuid.uuid4().hex
+        self.work_dir = os.path.join(base_dir, self.id)
+        os.makedirs(self.work_dir)
+        with _active_lock:
+            _active_work_dirs.add(os.path.abspath(self.work_dir))
+        self.final_path: Optional[str] = None
+        self.cancel_reason: Optional[str] = None
+        self._cancelled = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self, reason: str = 'cancelado'):
+        """
+        Interrompe o job: o próximo progress hook do yt-dlp aborta o download e um ffmpeg
+        já em execução (merge, conversão) é encerrado.
+        """
+        self.cancel_reason = reason
+        self._cancelled.set()
+        kill_child_processes(self.work_dir)
+
+    def progress_hook(self, d: Dict[str, Any]):
+        """Chamado pelo yt-dlp a cada bloco baixado; é onde o cancelamento interrompe o download"""
+        if self._cancelled.is_set():
+            raise DownloadCancelled(f'Download cancelado: {self.cancel_reason}')
+
+    @property
+    def outtmpl(self) -> str:
+        """Template de saída determinístico: o nome depende só do ID do vídeo, nunca do título"""
+        return os.path.join(self.work_dir, '%(id)s.%(ext)s')
+
+    def post_hook(self, filename: str):
+        """Chamado pelo yt-dlp com o arquivo final, depois de todos os post-processadores"""
+        self.final_path = filename
+
+    def postprocessor_hook(self, d: Dict[str, Any]):
+        """Acompanha o caminho do arquivo a cada post-processador (merge, conversão)"""
+        if self._cancelled.is_set():
+            raise DownloadCancelled(f'Download cancelado: {self.cancel_reason}')
+        if d.get('status') == 'finished':
+            filepath = d.get('info_dict', {}).get('filepath')
+            if filepath:
+                self.final_path = filepath
+
+    def components(self) -> Dict[str, str]:
+        """Streams baixados separadamente para um merge (mantidos com `keepvideo`), por format_id"""
+        found = {}
+        for name in os.listdir(self.work_dir):
+            match = _COMPONENT_PATTERN.search(name)
+            if match:
+                found[match.group(1)] = os.path.join(self.work_dir, name)
+        return found
+
+    def cleanup(self):
+        """Remove o diretório do job com tudo o que sobrou dentro dele"""
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+        with _active_lock:
+            _active_work_dirs.discard(os.path.abspath(self.work_dir))
@@ -0,0 +1,172 @@
+# src/utils/download_progress.py
+
+import json
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from .cache_backends import CacheBackend
+
+# Estágios em que o job não muda mais
+TERMINAL_STAGES = ('ready', 'error', 'cancelled')
+
+
+class ProgressBoard:
+    """
+    Último estado de progresso de cada job, lido pelo endpoint de SSE.
+
+    No processo, leitores são acordados por uma Condition assim que um estado novo é
+    publicado. Com um backend compartilhado (SQLite/Redis, o mesmo do CACHE_BACKEND_URL),
+    os estados também são gravados nele, e leitores de outros workers o consultam a cada
+    `poll_interval` segundos.
+    """
+
+    def __init__(self, backend: Optional[CacheBackend] = None, ttl: float = 600, poll_interval: float = 0.5,
+                 prefix: str = 'job:'):
+        self.backend = backend if backend is not None and backend.shared else None
+        self.ttl = ttl
+        self.poll_interval = poll_interval
+        self.prefix = prefix
+        self._states: Dict[str, Dict[str, Any]] = {}
+        self._condition = threading.Condition()
+
+    def publish(self, job_id: str, state: Dict[str, Any]):
+        with self._condition:
+            previous = self._states.get(job_id)
+            state = dict(state, job_id=job_id, seq=(previous['seq'] + 1) if previous else 0, updated_at=time.time())
+            self._states[job_id] = state
+            self._purge()
+            self._condition.notify_all()
+        if self.backend is not None:
+            try:
+                self.backend.set(self.prefix + job_id, json.dumps(state).encode('utf-8'), self.ttl)
+            except Exception as e:
+                print(f"Erro ao publicar progresso do job {job_id}: {e}")
+
+    def reserve(self, job_id: str, state: Dict[str, Any]) -> bool:
+        """
+        Publica o primeiro estado de um job só se o ID está livre. No processo, conferência e
+        inserção acontecem sob o mesmo lock; no backend compartilhado, com um set-if-absent
+        atômico (SET NX no Redis, INSERT no SQLite), então dois POSTs simultâneos com o mesmo
+        ID não passam os dois, nem em workers diferentes.
+        """
+        with self._condition:
+            self._purge()
+            if job_id in self._states:
+                return False
+            state = dict(state, job_id=job_id, seq=0, updated_at=time.time())
+            if self.backend is not None:
+                try:
+                    if not self.backend.add(self.prefix + job_id, json.dumps(state).encode('utf-8'), self.ttl):
+                        return False
+                except Exception as e:
+                    # Sem o backend, a reserva vale só para este worker
+                    print(f"Erro ao reservar o job {job_id}: {e}")
+            self._states[job_id] = state
+            self._condition.notify_all()
+        return True
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._condition:
+            state = self._states.get(job_id)
+        if state is None and self.backend is not None:
+            entry = self.backend.get(self.prefix + job_id)
+            if entry is not None:
+                state = json.loads(entry[0])
+        return state
+
+    def wait(self, job_id: str, after_seq: int, timeout: float) -> Optional[Dict[str, Any]]:
+        """Próximo estado com seq > after_seq, ou None se nada mudar em `timeout` segundos"""
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._condition:
+                state = self._states.get(job_id)
+                if state is not None and state['seq'] > after_seq:
+                    return state
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                if state is not None or self.backend is None:
+                    # Job deste processo (ou sem backend compartilhado): espera a notificação
+                    self._condition.wait(remaining)
+                    continue
+            # Job possivelmente de outro worker: consulta o backend compartilhado
+            state = self.get(job_id)
+            if state is not None and state['seq'] > after_seq:
+                return state
+            time.sleep(min(self.poll_interval, max(0.0, deadline - time.monotonic())))
+
+    def _purge(self):
+        # Chamado com a Condition adquirida: descarta estados antigos
+        cutoff = time.time() - self.ttl
+        for job_id in [j for j, s in self._states.items() if s['updated_at'] < cutoff]:
+            del self._states[job_id]
+
+
+class ProgressTracker:
+    """
+    Converte os hooks do yt-dlp em estados de progresso de um job e os publica no board.
+
+    Os progress hooks disparam a cada bloco baixado; para não inundar a conexão, um estado
+    novo só é publicado a cada `min_interval` segundos, ou quando o estágio muda.
+    """
+
+    def __init__(self, board: ProgressBoard, job_id: str, min_interval: float = 0.5):
+        self.board = board
+        self.job_id = job_id
+        self.min_interval = min_interval
+        self.stage = None
+        self.component = 0  # Em merges, o vídeo e o áudio são baixados um depois do outro
+        self._last_filename = None
+        self._last_emit = 0.0
+
+    def update(self, stage: str, force: bool = False, **fields):
+        now = time.monotonic()
+        if not force and stage == self.stage and now - self._last_emit < self.min_interval:
+            return
+        self.stage = stage
+        self._last_emit = now
+        self.board.publish(self.job_id, dict(fields, stage=stage, component=self.component))
+
+    def progress_hook(self, d: Dict[str, Any]):
+        filename = d.get('filename')
+        if filename and filename != self._last_filename:
+            if self._last_filename is not None:
+                self.component += 1
+            self._last_filename = filename
+
+        status = d.get('status')
+        if status == 'downloading':
+            total = d.get('total_bytes') or d.get('total_bytes_estimate')
+            downloaded = d.get('downloaded_bytes') or 0
+            self.update(
+                'download',
+                downloaded_bytes=downloaded,
+                total_bytes=total,
+                percent=round(downloaded * 100.0 / total, 1) if total else None,
+                speed=d.get('speed'),
+                eta=d.get('eta'),
+            )
+        elif status == 'finished':
+            downloaded = d.get('downloaded_bytes') or d.get('total_bytes') or 0
+            self.update('download', force=True, downloaded_bytes=downloaded, total_bytes=downloaded, percent=100.0)
+
+    def postprocessor_hook(self, d: Dict[str, Any]):
+        if d.get('status') != 'started':
+            return
+        stage = 'merge' if d.get('postprocessor') == 'Merger' else 'postprocess'
+        self.update(stage, force=True, postprocessor=d.get('postprocessor'))
+
+    def reserve(self) -> bool:
+        """Publica 'queued' reservando o job_id; False se outro job já o usa"""
+        if not self.board.reserve(self.job_id, {'stage': 'queued', 'component': self.component}):
+            return False
+        self.stage = 'queued'
+        self._last_emit = time.monotonic()
+        return True
+
+    def ready(self, size: Optional[int] = None):
+        self.update('ready', force=True, total_bytes=size)
+
+    def failed(self, message: str, cancelled: bool = False):
+        self.update('cancelled' if cancelled else 'error', force=True, error=message)
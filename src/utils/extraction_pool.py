@@ -0,0 +1,101 @@
+# src/utils/extraction_pool.py
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..models.video_info import VideoInfo
+from .stream_urls import DIRECT_PROTOCOLS, STREAM_FIELDS
+
+# YoutubeDL do processo worker, criado uma vez e reaproveitado entre extrações: o player JS
+# baixado e as funções de assinatura/nsig já interpretadas ficam no cache dele
+_worker_ydl = None
+
+
+def stream_formats(formats: Optional[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Formatos com URL direta reduzidos aos campos do StreamURLCache (o resto do info_dict fica no worker)"""
+    return [
+        {field: fmt[field] for field in STREAM_FIELDS if fmt.get(field) is not None}
+        for fmt in formats or []
+        if fmt.get('protocol') in DIRECT_PROTOCOLS and not fmt.get('fragments')
+    ]
+
+
+def _init_worker(ydl_opts: Dict[str, Any]):
+    global _worker_ydl
+    import yt_dlp
+    _worker_ydl = yt_dlp.YoutubeDL(ydl_opts)
+
+
+def _warm_up() -> int:
+    # Só garante que o worker subiu e passou pelo initializer (import do yt_dlp incluso)
+    return os.getpid()
+
+
+def _extract_in_worker(url: str) -> Tuple[bytes, List[Dict[str, Any]]]:
+    import yt_dlp
+    try:
+        info_dict = _worker_ydl.extract_info(url, download=False)
+    except yt_dlp.utils.DownloadError as e:
+        # Só a mensagem atravessa o processo (o exc_info original não é serializável)
+        raise yt_dlp.utils.DownloadError(str(e)) from None
+    # Só o resultado compacto volta ao processo web: o info_dict completo tem centenas de KB
+    return VideoInfo.from_info_dict(info_dict).dumps(), stream_formats(info_dict.get('formats'))
+
+
+class ExtractionPool:
+    """
+    Extrações do yt-dlp em processos separados.
+
+    A decifragem de assinatura/nsig roda num interpretador JS em Python puro e o info_dict
+    passa por muito processamento de JSON: partes presas à CPU que, em threads do Flask,
+    se revezam no GIL. Com `workers` processos, extrações simultâneas usam núcleos
+    diferentes. Os processos sobem no primeiro uso e todos são aquecidos de uma vez;
+    cada um mantém o próprio YoutubeDL entre extrações.
+    """
+
+    def __init__(self, workers: int, ydl_opts: Dict[str, Any], mp_context=None):
+        self.workers = workers
+        self.ydl_opts = ydl_opts
+        # forkserver: o processo web tem threads, e um fork delas pode herdar locks presos
+        self.mp_context = mp_context or multiprocessing.get_context(
+            'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        )
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=self.mp_context,
+                    initializer=_init_worker,
+                    initargs=(self.ydl_opts,),
+                )
+                for _ in range(self.workers):
+                    self._executor.submit(_warm_up)
+            return self._executor
+
+    def extract(self, url: str) -> Tuple[VideoInfo, List[Dict[str, Any]]]:
+        """(VideoInfo, formatos com URL direta) de uma extração feita num worker"""
+        executor = self._get_executor()
+        try:
+            data, formats = executor.submit(_extract_in_worker, url).result()
+        except BrokenProcessPool:
+            # Um worker morreu (ex.: OOM): o pool é recriado na próxima extração
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+            executor.shutdown(wait=False)
+            raise
+        return VideoInfo.loads(data), formats
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
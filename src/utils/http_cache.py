@@ -0,0 +1,43 @@
+# src/utils/http_cache.py
+
+import hashlib
+import json
+from typing import Any, Optional
+
+from flask import Response, request
+
+
+def payload_etag(payload: Any) -> str:
+    """ETag forte derivada do JSON canônico da resposta"""
+    body = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return '"' + hashlib.sha256(body.encode('utf-8')).hexdigest()[:20] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """True se o If-None-Match do cliente contém a ETag (comparação fraca, como manda o RFC 9110)"""
+    if not if_none_match:
+        return False
+    tags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+    return '*' in tags or etag.removeprefix('W/') in tags
+
+
+def cache_control(max_age: float, stale_while_revalidate: float = 0) -> str:
+    """Cache-Control público; s-maxage deixa explícito que CDNs podem guardar a resposta"""
+    max_age = max(0, int(max_age))
+    value = f'public, max-age={max_age}, s-maxage={max_age}'
+    if stale_while_revalidate > 0:
+        value += f', stale-while-revalidate={int(stale_while_revalidate)}'
+    return value
+
+
+def conditional_json(payload: Any, max_age: float, stale_while_revalidate: float = 0) -> Response:
+    """
+    Resposta JSON cacheável: ETag + Cache-Control e `304 Not Modified`
+    quando o If-None-Match do cliente (ou da CDN) já tem essa versão.
+    """
+    etag = payload_etag(payload)
+    headers = {'ETag': etag, 'Cache-Control': cache_control(max_age, stale_while_revalidate)}
+    if etag_matches(request.headers.get('If-None-Match'), etag):
+        return Response(status=304, headers=headers)
+    body = json.dumps(payload, ensure_ascii=False, default=str)
+    return Response(body, status=200, headers=headers, mimetype='application/json')
@@ -0,0 +1,237 @@
+# src/utils/media_proxy.py
+
+import os
+import re
+import select
+import shutil
+import subprocess
+import tempfile
+from typing import Callable, Dict, Any, Iterable, Iterator, List, Optional, Tuple
+
+import requests
+
+# Headers da resposta do servidor de mídia repassados ao cliente
+FORWARDED_HEADERS = ('Content-Length', 'Content-Range', 'Accept-Ranges', 'Last-Modified')
+
+_RANGE_PATTERN = re.compile(r'^bytes=(\d+)-(\d*)$')
+_CONTENT_RANGE_PATTERN = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+
+
+class UpstreamForbidden(Exception):
+    """O servidor de mídia recusou a URL (assinatura vencida ou revogada)"""
+
+
+def open_upstream(stream: Dict[str, Any], range_header: Optional[str] = None, timeout: float = 15) -> requests.Response:
+    """
+    Abre a URL de mídia resolvida (entrada do StreamURLCache) com os headers que o yt-dlp
+    usaria e o Range pedido. O corpo não é lido: fica para o `RangedUpstream.relay`.
+    """
+    headers = dict(stream.get('http_headers') or {})
+    if range_header:
+        headers['Range'] = range_header
+    response = requests.get(stream['url'], headers=headers, stream=True, timeout=timeout)
+    if response.status_code == 403:
+        response.close()
+        raise UpstreamForbidden(f"HTTP 403 ao abrir a mídia do formato {stream.get('format_id')}")
+    if response.status_code not in (200, 206, 416):
+        response.close()
+        response.raise_for_status()
+    return response
+
+
+def forwarded_headers(response: requests.Response) -> Dict[str, str]:
+    return {name: response.headers[name] for name in FORWARDED_HEADERS if name in response.headers}
+
+
+def parse_range(range_header: Optional[str]) -> Optional[Tuple[int, Optional[int]]]:
+    """(início, fim inclusivo ou None) de um Range `bytes=a-b` ou `bytes=a-`; None nos demais casos"""
+    match = _RANGE_PATTERN.match((range_header or '').strip())
+    if not match:
+        return None
+    start, end = int(match.group(1)), int(match.group(2)) if match.group(2) else None
+    return (start, end) if end is None or end >= start else None
+
+
+class RangedUpstream:
+    """
+    Mídia lida do servidor de mídia em janelas de `window` bytes, uma requisição com Range por
+    janela, como o `http_chunk_size` do yt-dlp: o googlevideo limita a velocidade de GETs do
+    arquivo inteiro, mas não a de pedidos por intervalos. A primeira janela é aberta aqui (um
+    403 sai como UpstreamForbidden, antes da resposta começar); as seguintes, conforme o
+    cliente lê. `status` e `headers` descrevem o intervalo pedido pelo cliente como um todo.
+    """
+
+    def __init__(self, stream: Dict[str, Any], range_header: Optional[str], window: int, timeout: float = 15):
+        self.stream = stream
+        self.window = window
+        self.timeout = timeout
+        self.end: Optional[int] = None  # Último byte a enviar; None = só a primeira resposta
+        requested = parse_range(range_header)
+        if range_header and requested is None:
+            # Sufixo (bytes=-N) ou vários intervalos: repassado como veio, num pedido só
+            self._passthrough(open_upstream(stream, range_header, timeout))
+            return
+
+        self.start, end = requested or (0, None)
+        self.first = open_upstream(stream, self._window_range(self.start, end), timeout)
+        match = _CONTENT_RANGE_PATTERN.match(self.first.headers.get('Content-Range', ''))
+        if self.first.status_code != 206 or not match:
+            # Servidor ignorou o Range (200) ou o intervalo não existe (416)
+            self._passthrough(self.first)
+            return
+
+        total = int(match.group(3))
+        self.end = total - 1 if end is None else min(end, total - 1)
+        self.status = 206 if range_header else 200
+        self.headers = {'Content-Length': str(self.end - self.start + 1), 'Accept-Ranges': 'bytes'}
+        if range_header:
+            self.headers['Content-Range'] = f'bytes {self.start}-{self.end}/{total}'
+        if 'Last-Modified' in self.first.headers:
+            self.headers['Last-Modified'] = self.first.headers['Last-Modified']
+
+    def _passthrough(self, response: requests.Response):
+        self.first = response
+        self.status = response.status_code
+        self.headers = forwarded_headers(response)
+
+    def _window_range(self, start: int, end: Optional[int]) -> str:
+        window_end = start + self.window - 1
+        return f'bytes={start}-{window_end if end is None else min(end, window_end)}'
+
+    def relay(self, chunk_size: int, on_close: Callable[[int], None]) -> Iterator[bytes]:
+        """
+        Repassa as janelas em blocos de `chunk_size`. O próximo bloco só é lido quando o servidor
+        WSGI pede, então um cliente lento segura a leitura do upstream (backpressure) sem acumular
+        nada em memória ou disco. `on_close(bytes_enviados)` roda ao fim ou na desconexão.
+        """
+        sent = 0
+        response = self.first
+        try:
+            while True:
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    sent += len(chunk)
+                    yield chunk
+                response.close()
+                position = self.start + sent if self.end is not None else None
+                if position is None or position > self.end:
+                    return
+                try:
+                    response = open_upstream(self.stream, self._window_range(position, self.end), self.timeout)
+                except (UpstreamForbidden, requests.RequestException) as e:
+                    # Os headers já foram enviados: a resposta termina curta e o cliente vê o download incompleto
+                    print(f"Erro ao abrir a janela {position}-{self.end} da mídia: {e}")
+                    return
+                if response.status_code != 206:
+                    print(f"Servidor de mídia respondeu {response.status_code} à janela {position}-{self.end}")
+                    return
+        finally:
+            response.close()
+            on_close(sent)
+
+
+def best_audio(streams: Iterable[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Melhor formato só de áudio, preferindo m4a (o mesmo critério de `bestaudio[ext=m4a]/bestaudio`)"""
+    audio = [s for s in streams if s.get('vcodec') == 'none' and s.get('acodec') not in (None, 'none')]
+    if not audio:
+        return None
+    return max(audio, key=lambda s: (s.get('ext') == 'm4a', s.get('abr') or s.get('tbr') or 0))
+
+
+def _ffmpeg_headers(stream: Dict[str, Any]) -> List[str]:
+    headers = stream.get('http_headers') or {}
+    if not headers:
+        return []
+    return ['-headers', ''.join(f'{name}: {value}\r\n' for name, value in headers.items())]
+
+
+def fragmented_merge(video: Dict[str, Any], audio: Dict[str, Any], ffmpeg: Optional[str] = None) -> subprocess.Popen:
+    """
+    Inicia um ffmpeg que lê vídeo e áudio direto das URLs de mídia e escreve um MP4
+    fragmentado no stdout. Com `frag_keyframe+empty_moov` o moov vai no início e cada
+    fragmento é autocontido, então o cliente recebe bytes enquanto o mux acontece, sem
+    arquivo temporário (o MP4 comum só fica válido quando o moov é escrito no fim).
+    """
+    command = [ffmpeg or shutil.which('ffmpeg') or 'ffmpeg', '-nostdin', '-hide_banner', '-nostats', '-loglevel', 'error']
+    command += _ffmpeg_headers(video) + ['-i', video['url']]
+    command += _ffmpeg_headers(audio) + ['-i', audio['url']]
+    command += [
+        '-map', '0:v:0', '-map', '1:a:0',
+        '-c', 'copy',
+        '-movflags', 'frag_keyframe+empty_moov+default_base_moof',
+        '-f', 'mp4', 'pipe:1',
+    ]
+    # stderr vai para um arquivo temporário: um pipe que só é lido no fim enche com os avisos
+    # de um merge longo e trava o ffmpeg no meio da resposta
+    log = tempfile.TemporaryFile()
+    try:
+        process = subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=log)
+    except BaseException:
+        log.close()
+        raise
+    process.log = log
+    return process
+
+
+def _log_tail(process: subprocess.Popen, size: int = 500) -> str:
+    log = process.log
+    log.seek(0, os.SEEK_END)
+    log.seek(max(0, log.tell() - size))
+    return log.read().decode('utf-8', 'replace')
+
+
+def first_output(process: subprocess.Popen, chunk_size: int, timeout: float) -> bytes:
+    """
+    Primeiro bloco do stdout, esperando no máximo `timeout` segundos: um upstream travado não
+    prende o worker antes de a resposta começar. b'' se o processo terminou sem escrever nada
+    ou se o prazo estourou (nesse caso ele é encerrado).
+    """
+    ready, _, _ = select.select([process.stdout], [], [], timeout)
+    if not ready:
+        process.kill()
+        return b''
+    return process.stdout.read1(chunk_size)
+
+
+def process_error(process: subprocess.Popen) -> str:
+    """Espera o processo terminar e retorna o fim do stderr (para processos que falharam antes de produzir saída)"""
+    process.wait()
+    error = _log_tail(process)
+    process.stdout.close()
+    process.log.close()
+    return error
+
+
+def relay_process(process: subprocess.Popen, chunk_size: int, on_close: Callable[[int, int], None],
+                  first_chunk: bytes = b'', exit_timeout: float = 10) -> Iterator[bytes]:
+    """
+    Repassa o stdout do processo em blocos de até `chunk_size`, assim que ficam disponíveis
+    (`first_chunk` é o que o chamador já leu). Depois do EOF, espera o processo sair por até
+    `exit_timeout` segundos; só na desconexão do cliente (ou em erro) antes do EOF ele é
+    encerrado. `on_close(bytes_enviados, returncode)` roda no fim.
+    """
+    sent = 0
+    finished = False
+    try:
+        chunk = first_chunk or process.stdout.read1(chunk_size)
+        while chunk:
+            sent += len(chunk)
+            yield chunk
+            chunk = process.stdout.read1(chunk_size)
+        # EOF no stdout: o ffmpeg está saindo sozinho (o poll() ainda pode dar None aqui)
+        finished = True
+    finally:
+        killed = False
+        try:
+            returncode = process.wait(timeout=exit_timeout) if finished else None
+        except subprocess.TimeoutExpired:
+            returncode = None
+        if returncode is None:
+            # Cliente desconectou (ou erro) antes do fim, ou o ffmpeg não saiu após o EOF
+            killed = True
+            process.kill()
+            returncode = process.wait()
+        if returncode and not killed:
+            print(f"ffmpeg terminou com código {returncode}: {_log_tail(process)}")
+        process.stdout.close()
+        process.log.close()
+        on_close(sent, returncode)
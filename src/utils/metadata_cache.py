@@ -0,0 +1,245 @@
+# src/utils/metadata_cache.py
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, Any, Optional
+
+from .cache_backends import MemoryBackend, TieredCache
+
+
+class MetadataCache:
+    """
+    Cache com TTL dos info_dicts do yt-dlp, indexado pelo ID do vídeo.
+
+    O armazenamento é um TieredCache: L1 em memória do processo e, se configurado,
+    L2 compartilhado (SQLite ou Redis) para que todos os workers aproveitem as extrações.
+
+    Stale-while-revalidate: até `ttl` (TTL "soft") a entrada é fresca; entre `ttl` e
+    `stale_ttl` (TTL "hard") ela ainda é servida na hora por `get_or_load`, enquanto uma
+    única atualização em segundo plano por vídeo roda a extração de novo. Depois do
+    `stale_ttl` a entrada some e a próxima requisição espera a extração.
+    """
+
+    def __init__(self, ttl: float = 1800, max_entries: int = 256, cache: Optional[TieredCache] = None,
+                 prefix: str = 'info:', stale_ttl: Optional[float] = None):
+        self.ttl = ttl
+        self.stale_ttl = max(ttl, stale_ttl or ttl)
+        self.cache = cache or TieredCache(MemoryBackend(max_entries))
+        self.prefix = prefix
+        self.stale_hits = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self._inflight: Dict[str, threading.Event] = {}
+        self._inflight_lock = threading.Lock()
+
+    @property
+    def stale_window(self) -> float:
+        return self.stale_ttl - self.ttl
+
+    def get(self, video_id: str) -> Optional[Dict[str, Any]]:
+        """Retorna o info_dict se ainda estiver dentro do TTL (fresco ou velho)"""
+        return self.cache.get(self.prefix + video_id)
+
+    def set(self, video_id: str, info_dict: Dict[str, Any], ttl: Optional[float] = None):
+        # O backend guarda a entrada até o TTL hard; o soft é derivado da expiração
+        ttl = self.ttl if ttl is None else ttl
+        self.cache.set(self.prefix + video_id, info_dict, ttl + self.stale_window)
+
+    def expires_in(self, video_id: str) -> float:
+        """Segundos até a entrada deixar de ser fresca (0 se ausente ou já velha)"""
+        entry = self.cache.get_entry(self.prefix + video_id)
+        return max(0.0, entry[1] - self.stale_window - time.time()) if entry else 0.0
+
+    def delete(self, video_id: str):
+        self.cache.delete(self.prefix + video_id)
+
+    def get_or_load(self, video_id: str, loader: Callable[[], Dict[str, Any]],
+                    ttl_for: Optional[Callable[[Dict[str, Any]], float]] = None) -> Dict[str, Any]:
+        """
+        info_dict do cache ou de `loader()`.
+
+        Entradas frescas e velhas retornam na hora (as velhas disparam uma atualização em
+        segundo plano); ausentes bloqueiam, e requisições simultâneas pelo mesmo vídeo
+        esperam a mesma extração em vez de repeti-la. `ttl_for(info_dict)` permite um TTL
+        soft menor para resultados degradados, que assim são revalidados mais cedo.
+        """
+        entry = self.cache.get_entry(self.prefix + video_id)
+        if entry is not None:
+            if entry[1] - self.stale_window <= time.time():
+                self.stale_hits += 1
+                self._refresh_in_background(video_id, loader, ttl_for)
+            return entry[0]
+        return self._load(video_id, loader, ttl_for)
+
+    def refresh(self, video_id: str, loader: Callable[[], Dict[str, Any]],
+                ttl_for: Optional[Callable[[Dict[str, Any]], float]] = None) -> Dict[str, Any]:
+        """
+        Extrai de novo e substitui a entrada, ignorando o que está em cache. Usa a mesma
+        reserva de `get_or_load`: refreshes simultâneos do mesmo vídeo (ex.: vários 403 de
+        URLs de mídia vencidas) esperam uma única extração em vez de repeti-la.
+        """
+        return self._load(video_id, loader, ttl_for)
+
+    def _claim(self, video_id: str):
+        """(evento, True se esta thread é a dona da extração do vídeo)"""
+        with self._inflight_lock:
+            event = self._inflight.get(video_id)
+            if event is not None:
+                return event, False
+            event = self._inflight[video_id] = threading.Event()
+            return event, True
+
+    def _release(self, video_id: str, event: threading.Event):
+        with self._inflight_lock:
+            self._inflight.pop(video_id, None)
+        event.set()
+
+    def _load(self, video_id: str, loader, ttl_for):
+        event, owner = self._claim(video_id)
+        if not owner:
+            event.wait()
+            info_dict = self.get(video_id)
+            if info_dict is not None:
+                return info_dict
+            # A extração da outra thread falhou: tenta de novo por conta própria
+            return loader()
+        try:
+            info_dict = loader()
+            self.set(video_id, info_dict, ttl_for(info_dict) if ttl_for else None)
+            return info_dict
+        finally:
+            self._release(video_id, event)
+
+    def _refresh_in_background(self, video_id: str, loader, ttl_for):
+        event, owner = self._claim(video_id)
+        if not owner:
+            return  # Já há uma atualização (ou extração) em andamento para o vídeo
+
+        def refresh():
+            try:
+                info_dict = loader()
+                self.set(video_id, info_dict, ttl_for(info_dict) if ttl_for else None)
+                self.refreshes += 1
+            except Exception as e:
+                # A entrada velha continua valendo até o TTL hard
+                self.refresh_errors += 1
+                print(f"Erro ao atualizar metadados de {video_id} em segundo plano: {e}")
+            finally:
+                self._release(video_id, event)
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self.cache.stats()
+        stats.update({
+            'stale_hits': self.stale_hits,
+            'background_refreshes': self.refreshes,
+            'refresh_errors': self.refresh_errors,
+        })
+        return stats
+
+
+class MediaCache:
+    """
+    Arquivos de mídia já baixados, em `directory/<video_id>/<format_key>.<ext>`.
+
+    Além dos arquivos finais, guarda os componentes de merges (streams só de vídeo e só de
+    áudio) em `component-<format_id>.<ext>`, para que outra resolução do mesmo vídeo reuse
+    o áudio já baixado. Quando o total passa de `max_bytes`, os arquivos usados há mais
+    tempo são removidos.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 2 * 1024 * 1024 * 1024, ttl: float = 6 * 3600):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def format_key(format_id: Optional[str]) -> str:
+        return format_id or 'default'
+
+    @staticmethod
+    def component_key(format_id: str) -> str:
+        return f'component-{format_id}'
+
+    def _video_dir(self, video_id: str) -> str:
+        return os.path.join(self.directory, video_id)
+
+    def get(self, video_id: str, format_id: Optional[str]) -> Optional[str]:
+        """Caminho do arquivo em cache, ou None"""
+        video_dir = self._video_dir(video_id)
+        prefix = self.format_key(format_id) + '.'
+        try:
+            names = os.listdir(video_dir)
+        except OSError:
+            return None
+        for name in names:
+            if name.startswith(prefix) and not name.endswith('.tmp'):
+                path = os.path.join(video_dir, name)
+                try:
+                    if time.time() - os.path.getmtime(path) > self.ttl:
+                        os.remove(path)
+                        return None
+                    os.utime(path, (time.time(), os.path.getmtime(path)))  # atime = último uso
+                except OSError:
+                    return None
+                return path
+        return None
+
+    def put(self, video_id: str, format_id: Optional[str], source_path: str) -> str:
+        """Move um arquivo baixado para o cache e aplica o limite de tamanho"""
+        video_dir = self._video_dir(video_id)
+        os.makedirs(video_dir, exist_ok=True)
+        ext = os.path.basename(source_path).rsplit('.', 1)[-1]
+        key = self.format_key(format_id)
+        target = os.path.join(video_dir, f'{key}.{ext}')
+        # Move atômico dentro do mesmo sistema de arquivos: leitores nunca veem arquivo parcial.
+        # O temporário tem nome único: dois puts da mesma chave (ex.: o preenchimento do áudio em
+        # segundo plano e o fallback pelo yt-dlp) não se atropelam, e o último vence
+        fd, tmp_target = tempfile.mkstemp(prefix=f'{key}.', suffix='.tmp', dir=video_dir)
+        os.close(fd)
+        try:
+            shutil.move(source_path, tmp_target)
+            os.replace(tmp_target, target)
+        except BaseException:
+            try:
+                os.remove(tmp_target)
+            except OSError:
+                pass
+            raise
+        self.evict()
+        return target
+
+    def get_component(self, video_id: str, format_id: str) -> Optional[str]:
+        """Caminho do stream só de vídeo ou só de áudio em cache, ou None"""
+        return self.get(video_id, self.component_key(format_id))
+
+    def put_component(self, video_id: str, format_id: str, source_path: str) -> str:
+        return self.put(video_id, self.component_key(format_id), source_path)
+
+    def evict(self):
+        """Remove os arquivos menos usados até o total caber em `max_bytes`"""
+        with self._lock:
+            files = []
+            for root, _, names in os.walk(self.directory):
+                for name in names:
+                    path = os.path.join(root, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    files.append((st.st_atime, st.st_size, path))
+            total = sum(size for _, size, _ in files)
+            for _, size, path in sorted(files):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    continue
@@ -1,14 +1,39 @@
 # src/utils/serverless_extractor.py
 
-import yt_dlp
 import random
 import time
 import json
-import requests
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Iterable, Optional, List
 from urllib.parse import urlparse, parse_qs
+import os
 import re
 
+from ..models.video_info import VideoInfo, FormatRecord
+from .circuit_breaker import breakers, CircuitOpen, OPEN
+from .strategy_ranking import ranking, run_strategy
+
+# URL base do YouTube (pode ser apontada para um servidor local em benchmarks offline)
+YOUTUBE_BASE_URL = os.environ.get('YOUTUBE_BASE_URL', 'https://www.youtube.com').rstrip('/')
+
+# Erros que indicam a estratégia bloqueada ou o upstream fora do ar (contam para o circuit breaker);
+# vídeo privado, removido etc. não dizem nada sobre a saúde da estratégia
+BLOCKING_KEYWORDS = ['blocked', 'forbidden', '403', 'rate limit', 'too many requests']
+UPSTREAM_ERROR_KEYWORDS = BLOCKING_KEYWORDS + ['timed out', 'timeout', 'connection', 'sign in to confirm', '429']
+
+
+# Estratégias completas (com formatos): o yt-dlp com cada player_client. A ordem aqui é a
+# padrão; em produção elas são tentadas na ordem do ranking (sucesso e latência observados)
+YTDLP_STRATEGIES = {
+    'ytdlp_web': ['web'],
+    'ytdlp_android': ['android'],
+    'ytdlp_ios': ['ios'],
+}
+
+
+def is_upstream_error(error: Exception) -> bool:
+    message = str(error).lower()
+    return any(keyword in message for keyword in UPSTREAM_ERROR_KEYWORDS)
+
 class ServerlessYouTubeExtractor:
     """Extrator do YouTube otimizado para ambientes serverless (Vercel, etc.)"""
     
@@ -84,7 +109,7 @@ class ServerlessYouTubeExtractor:
             
         return headers
     
-    def get_ydl_opts(self, use_alternative_client: bool = False) -> Dict[str, Any]:
+    def get_ydl_opts(self, use_alternative_client: bool = False, player_client: Optional[List[str]] = None) -> Dict[str, Any]:
         """Configurações do yt-dlp otimizadas para serverless"""
         headers = self.get_random_headers()
         
@@ -113,7 +138,7 @@ class ServerlessYouTubeExtractor:
             'extractor_args': {
                 'youtube': {
                     'skip': ['dash', 'hls'],
-                    'player_client': ['android', 'web', 'ios'] if use_alternative_client else ['web'],
+                    'player_client': player_client or (['android', 'web', 'ios'] if use_alternative_client else ['web']),
                     'player_skip': ['webpage'],
                 }
             },
@@ -148,59 +173,62 @@ class ServerlessYouTubeExtractor:
         if not video_id:
             raise Exception('URL do YouTube inválida')
         
-        # Estratégia 1: Tentar com cliente web padrão
+        # Importado no primeiro uso: o yt_dlp é o módulo mais pesado do cold start
+        import yt_dlp
+        
         for attempt in range(self.retry_count):
-            try:
-                opts = self.get_ydl_opts(use_alternative_client=False)
-                
-                with yt_dlp.YoutubeDL(opts) as ydl:
-                    info = ydl.extract_info(url, download=False)
+            blocked = False
+            
+            # Estratégias completas, da historicamente mais rápida com sucesso para a pior
+            for name in ranking.order(list(YTDLP_STRATEGIES)):
+                try:
+                    info = run_strategy(
+                        name,
+                        lambda: self._extract_info(yt_dlp, url, player_client=YTDLP_STRATEGIES[name]),
+                        counts=is_upstream_error,
+                    )
                     return self._format_video_info(info)
-                    
-            except Exception as e:
-                error_msg = str(e).lower()
-                
-                # Se detectou bloqueio, tenta estratégias alternativas
-                if any(keyword in error_msg for keyword in ['blocked', 'forbidden', '403', 'rate limit', 'too many requests']):
-                    print(f"Tentativa {attempt + 1}: Bloqueio detectado, tentando estratégia alternativa...")
-                    
-                    if attempt < self.retry_count - 1:
-                        # Estratégia 2: Usar cliente alternativo
-                        try:
-                            opts = self.get_ydl_opts(use_alternative_client=True)
-                            with yt_dlp.YoutubeDL(opts) as ydl:
-                                info = ydl.extract_info(url, download=False)
-                                return self._format_video_info(info)
-                        except:
-                            pass
-                        
-                        # Estratégia 3: Usar API não oficial como fallback
-                        try:
-                            fallback_info = self._get_fallback_info(video_id)
-                            if fallback_info:
-                                return fallback_info
-                        except:
-                            pass
-                        
-                        # Espera antes da próxima tentativa
-                        delay = min(self.base_delay * (2 ** attempt), self.max_delay)
-                        time.sleep(delay + random.uniform(0, 1))
-                        continue
-                
-                # Se é a última tentativa, relança o erro
-                if attempt == self.retry_count - 1:
-                    # Retorna informações básicas como fallback final
-                    return self._get_minimal_info(video_id, url)
-                
-                # Espera antes da próxima tentativa
-                delay = min(self.base_delay * (2 ** attempt), self.max_delay)
-                time.sleep(delay + random.uniform(0, 1))
+                except CircuitOpen:
+                    # Circuito aberto: a estratégia é pulada sem esperar o timeout do upstream
+                    blocked = True
+                except Exception as e:
+                    if not is_upstream_error(e):
+                        # Erro do próprio vídeo (privado, removido...): outro cliente não muda nada
+                        print(f"Tentativa {attempt + 1} ({name}): {e}")
+                        break
+                    print(f"Tentativa {attempt + 1} ({name}): Bloqueio detectado, tentando estratégia alternativa...")
+                    blocked = True
+            
+            # Fallback degradado: API não oficial (sem formatos)
+            if blocked:
+                try:
+                    fallback_info = run_strategy('oembed', lambda: self._get_fallback_info(video_id),
+                                                 is_failure=lambda result: result is None)
+                    if fallback_info:
+                        return fallback_info
+                except Exception:
+                    pass
+            
+            # Com todos os circuitos abertos, repetir só acumularia os atrasos do backoff
+            if attempt == self.retry_count - 1 or all(breakers.get(name).state == OPEN for name in YTDLP_STRATEGIES):
+                break
+            
+            # Espera antes da próxima tentativa
+            delay = min(self.base_delay * (2 ** attempt), self.max_delay)
+            time.sleep(delay + random.uniform(0, 1))
         
         # Fallback final
         return self._get_minimal_info(video_id, url)
     
+    def _extract_info(self, yt_dlp, url: str, player_client: List[str]) -> Dict[str, Any]:
+        opts = self.get_ydl_opts(player_client=player_client)
+        with yt_dlp.YoutubeDL(opts) as ydl:
+            return ydl.extract_info(url, download=False)
+    
     def _format_video_info(self, info: Dict[str, Any]) -> Dict[str, Any]:
         """Formata as informações do vídeo de forma consistente"""
+        # Só os campos e os formatos usados na resposta; o info_dict completo é descartado logo aqui
+        info = VideoInfo.from_info_dict(info, formats=self._select_formats(info.get('formats') or []))
         return {
             'success': True,
             'video_id': info.get('id', ''),
@@ -219,8 +247,10 @@ class ServerlessYouTubeExtractor:
     def _get_fallback_info(self, video_id: str) -> Optional[Dict[str, Any]]:
         """Tenta obter informações básicas via API não oficial"""
         try:
+            import requests
+            
             # Usa uma API pública para obter informações básicas
-            api_url = f"https://www.youtube.com/oembed?url=https://www.youtube.com/watch?v={video_id}&format=json"
+            api_url = f"{YOUTUBE_BASE_URL}/oembed?url=https://www.youtube.com/watch?v={video_id}&format=json"
             
             headers = self.get_random_headers()
             response = requests.get(api_url, headers=headers, timeout=10)
@@ -265,25 +295,23 @@ class ServerlessYouTubeExtractor:
             'formats': []
         }
     
-    def _extract_formats(self, formats: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Extrai formatos de vídeo disponíveis"""
-        video_formats = []
-        
-        for fmt in formats:
-            if fmt.get('vcodec') and fmt.get('vcodec') != 'none':
-                video_formats.append({
-                    'format_id': fmt.get('format_id', ''),
-                    'resolution': f"{fmt.get('height', 0)}p",
-                    'ext': fmt.get('ext', ''),
-                    'quality': fmt.get('format_note', ''),
-                    'has_audio': fmt.get('acodec') and fmt.get('acodec') != 'none',
-                    'filesize': fmt.get('filesize', 0)
-                })
-        
-        # Ordena por qualidade
-        video_formats.sort(key=lambda x: x.get('height', 0), reverse=True)
+    def _select_formats(self, formats: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Formatos de vídeo do info_dict, da maior para a menor altura, limitados a 10"""
+        video_formats = [fmt for fmt in formats if fmt.get('vcodec') and fmt.get('vcodec') != 'none']
+        video_formats.sort(key=lambda fmt: fmt.get('height') or 0, reverse=True)
         return video_formats[:10]  # Limita a 10 formatos
     
+    def _extract_formats(self, formats: Iterable[FormatRecord]) -> List[Dict[str, Any]]:
+        """Extrai formatos de vídeo disponíveis"""
+        return [{
+            'format_id': fmt.get('format_id', ''),
+            'resolution': f"{fmt.get('height', 0)}p",
+            'ext': fmt.get('ext', ''),
+            'quality': fmt.get('format_note', ''),
+            'has_audio': bool(fmt.acodec and fmt.acodec != 'none'),
+            'filesize': fmt.get('filesize', 0)
+        } for fmt in formats]
+    
     def _format_duration(self, duration: int) -> str:
         """Formata duração em segundos para formato legível"""
         if not duration:
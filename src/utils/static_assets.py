@@ -0,0 +1,159 @@
+# src/utils/static_assets.py
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+from typing import Dict, Optional
+
+from flask import Response
+
+try:
+    import brotli  # Opcional: sem ele, os assets são servidos só com gzip
+except ImportError:
+    brotli = None
+
+# Tipos que valem a pena comprimir (imagens e vídeos já são comprimidos)
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'image/svg+xml', 'application/xml')
+MIN_COMPRESS_SIZE = 512
+
+# Prefixo das URLs com hash de conteúdo (cache imutável); não colide com /static do Flask
+HASHED_PREFIX = 'assets/'
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE_CONTROL = 'no-cache'
+
+
+class StaticAsset:
+    """Arquivo estático carregado em memória, com as versões comprimidas pré-calculadas"""
+
+    def __init__(self, name: str, body: bytes, mimetype: Optional[str] = None):
+        self.name = name
+        self.mimetype = mimetype or mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        if self.mimetype.startswith('text/') and 'charset' not in self.mimetype:
+            self.mimetype += '; charset=utf-8'
+        self.digest = hashlib.sha256(body).hexdigest()[:16]
+        self.bodies: Dict[str, bytes] = {'identity': body}
+
+        if self.mimetype.startswith(COMPRESSIBLE_TYPES) and len(body) >= MIN_COMPRESS_SIZE:
+            # mtime=0 deixa o gzip determinístico (mesmo conteúdo, mesmos bytes)
+            gzipped = gzip.compress(body, compresslevel=9, mtime=0)
+            if len(gzipped) < len(body):
+                self.bodies['gzip'] = gzipped
+            if brotli is not None:
+                compressed = brotli.compress(body, quality=11)
+                if len(compressed) < len(body):
+                    self.bodies['br'] = compressed
+
+    @property
+    def hashed_name(self) -> str:
+        """Nome com hash de conteúdo: index.html -> index.<hash>.html"""
+        root, ext = os.path.splitext(self.name)
+        return f'{HASHED_PREFIX}{root}.{self.digest[:10]}{ext}'
+
+    def etag(self, encoding: str = 'identity') -> str:
+        """ETag forte por representação: a versão comprimida tem bytes diferentes"""
+        return f'"{self.digest}"' if encoding == 'identity' else f'"{self.digest}-{encoding}"'
+
+    def choose_encoding(self, accept_encoding: str) -> str:
+        accepted = {part.split(';')[0].strip().lower() for part in (accept_encoding or '').split(',')}
+        for encoding in ('br', 'gzip'):
+            if encoding in self.bodies and encoding in accepted:
+                return encoding
+        return 'identity'
+
+
+class StaticAssets:
+    """
+    Manifesto em memória dos arquivos estáticos, montado uma vez na inicialização.
+
+    Cada asset é servido pelo nome original (Cache-Control: no-cache, revalidado por ETag)
+    e por uma URL com hash de conteúdo (`/assets/nome.<hash>.ext`, cache imutável de 1 ano).
+    Nenhuma chamada ao sistema de arquivos acontece durante as requisições.
+    """
+
+    def __init__(self, folder: Optional[str] = None, index: str = 'index.html'):
+        self.folder = folder
+        self.index = index
+        self.assets: Dict[str, StaticAsset] = {}
+        self._routes: Dict[str, StaticAsset] = {}
+        if folder and os.path.isdir(folder):
+            for root, _, names in os.walk(folder):
+                for name in sorted(names):
+                    path = os.path.join(root, name)
+                    with open(path, 'rb') as f:
+                        self.register(os.path.relpath(path, folder).replace(os.sep, '/'), f.read())
+            self._rewrite_html_references()
+
+    def register(self, name: str, body, mimetype: Optional[str] = None) -> StaticAsset:
+        """Adiciona (ou substitui) um asset no manifesto"""
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        old = self.assets.get(name)
+        if old is not None:
+            self._routes.pop(old.hashed_name, None)
+        asset = StaticAsset(name, body, mimetype)
+        self.assets[name] = asset
+        self._routes[name] = asset
+        self._routes[asset.hashed_name] = asset
+        return asset
+
+    def register_default(self, name: str, body, mimetype: Optional[str] = None) -> StaticAsset:
+        """Registra o asset apenas se não houver um arquivo com esse nome na pasta estática"""
+        return self.assets.get(name) or self.register(name, body, mimetype)
+
+    def _rewrite_html_references(self):
+        """Troca referências a outros assets nos HTML pelas URLs com hash"""
+        names = [name for name in self.assets if not name.endswith('.html')]
+        if not names:
+            return
+        pattern = re.compile(r'(src|href)=(["\'])/?(' + '|'.join(re.escape(n) for n in names) + r')\2')
+        for name, asset in list(self.assets.items()):
+            if not name.endswith('.html'):
+                continue
+            html = asset.bodies['identity'].decode('utf-8')
+            rewritten = pattern.sub(lambda m: f'{m.group(1)}={m.group(2)}/{self.assets[m.group(3)].hashed_name}{m.group(2)}', html)
+            if rewritten != html:
+                self.register(name, rewritten, asset.mimetype)
+
+    def url_for(self, name: str) -> str:
+        """URL imutável (com hash) de um asset"""
+        return '/' + self.assets[name].hashed_name
+
+    def lookup(self, path: str) -> Optional[StaticAsset]:
+        """Asset para o caminho da requisição, com fallback para o index (SPA)"""
+        path = path.lstrip('/')
+        asset = self._routes.get(path or self.index)
+        if asset is None and not path.startswith(HASHED_PREFIX):
+            # URLs com hash desconhecido (deploy antigo) não caem no index com cache imutável
+            asset = self._routes.get(self.index)
+        return asset
+
+    def response(self, asset: StaticAsset, request) -> Response:
+        """Resposta com ETag, Cache-Control e a melhor codificação aceita pelo cliente"""
+        immutable = request.path.lstrip('/').startswith(HASHED_PREFIX)
+        encoding = asset.choose_encoding(request.headers.get('Accept-Encoding', ''))
+        headers = {
+            'ETag': asset.etag(encoding),
+            'Cache-Control': IMMUTABLE_CACHE_CONTROL if immutable else REVALIDATE_CACHE_CONTROL,
+            'Vary': 'Accept-Encoding',
+        }
+
+        # Qualquer representação do mesmo conteúdo ainda válida no cliente dispensa o corpo
+        if_none_match = request.headers.get('If-None-Match', '')
+        client_tags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+        if '*' in client_tags or client_tags & {asset.etag(e) for e in asset.bodies}:
+            return Response(status=304, headers=headers)
+
+        if encoding != 'identity':
+            headers['Content-Encoding'] = encoding
+        body = asset.bodies[encoding]
+        return Response(body if request.method != 'HEAD' else b'', status=200, headers=headers,
+                        content_type=asset.mimetype)
+
+    def serve(self, path: str, request):
+        """Atende o catch-all do app; retorna None se não houver nenhum asset para o caminho"""
+        asset = self.lookup(path)
+        if asset is None:
+            return None
+        return self.response(asset, request)
@@ -0,0 +1,105 @@
+# src/utils/strategy_ranking.py
+
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from .circuit_breaker import breakers, CircuitOpen
+
+
+class StrategyStats:
+    """Sucessos e falhas com decaimento (janela móvel) e latência média móvel de uma estratégia"""
+
+    __slots__ = ('successes', 'failures', 'latency', 'calls')
+
+    def __init__(self):
+        self.successes = 0.0
+        self.failures = 0.0
+        self.latency: Optional[float] = None
+        self.calls = 0
+
+
+class StrategyRanker:
+    """
+    Ordena as estratégias de uma cadeia de fallback pelo histórico observado (bandit).
+
+    Cada resultado entra com decaimento `decay`, então o passado recente pesa mais e a ordem
+    acompanha mudanças do upstream. A cada requisição, a taxa de sucesso de cada estratégia é
+    sorteada de uma Beta(sucessos + 1, falhas + 1) (Thompson sampling) e dividida pela latência
+    média: a estratégia com o melhor "sucesso por segundo" vem primeiro. Estratégias pouco
+    testadas têm distribuições largas e de vez em quando sobem na fila, o que mantém a
+    exploração sem um epsilon fixo.
+    """
+
+    def __init__(self, decay: float = 0.95, latency_alpha: float = 0.2, default_latency: float = 1.0,
+                 rng: Optional[random.Random] = None):
+        self.decay = decay
+        self.latency_alpha = latency_alpha
+        self.default_latency = default_latency
+        self.rng = rng or random.Random()
+        self._stats: Dict[str, StrategyStats] = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, success: bool, latency: float):
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = StrategyStats()
+            stats.successes = stats.successes * self.decay + (1.0 if success else 0.0)
+            stats.failures = stats.failures * self.decay + (0.0 if success else 1.0)
+            # Tentativas que falham também custam tempo: a latência média inclui todas
+            stats.latency = latency if stats.latency is None else \
+                stats.latency + self.latency_alpha * (latency - stats.latency)
+            stats.calls += 1
+
+    def order(self, names: List[str]) -> List[str]:
+        """Estratégias da melhor para a pior; empates mantêm a ordem recebida (a padrão)"""
+        with self._lock:
+            known = [self._stats[name] for name in names if name in self._stats]
+            if not known:
+                return list(names)
+            # Estratégia ainda não testada assume a latência da mais lenta conhecida (pessimista)
+            unknown_latency = max([s.latency for s in known if s.latency is not None] or [self.default_latency])
+            scores = {}
+            for name in names:
+                stats = self._stats.get(name) or StrategyStats()
+                sampled = self.rng.betavariate(stats.successes + 1, stats.failures + 1)
+                latency = stats.latency if stats.latency is not None else unknown_latency
+                scores[name] = sampled / max(latency, 1e-3)
+        return sorted(names, key=lambda name: -scores[name])
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {
+                name: {
+                    'success_rate': round((s.successes + 1) / (s.successes + s.failures + 2), 3),
+                    'latency_ms': round(s.latency * 1000, 1) if s.latency is not None else None,
+                    'calls': s.calls,
+                }
+                for name, s in self._stats.items()
+            }
+
+
+# Histórico do processo, compartilhado pelo ServerlessYouTubeExtractor e pelo api/index.py
+ranking = StrategyRanker(decay=float(os.environ.get('STRATEGY_STATS_DECAY', 0.95)))
+
+
+def run_strategy(name: str, fn: Callable[[], Any], is_failure: Optional[Callable[[Any], bool]] = None,
+                 counts: Optional[Callable[[Exception], bool]] = None) -> Any:
+    """
+    Executa uma estratégia pelo circuit breaker dela e registra resultado e latência no
+    ranking. Chamadas puladas pelo circuito aberto (CircuitOpen) não entram no histórico.
+    """
+    started = time.perf_counter()
+    try:
+        result = breakers.get(name).call(fn, is_failure=is_failure, counts=counts)
+    except CircuitOpen:
+        raise
+    except Exception as e:
+        if counts is None or counts(e):
+            ranking.record(name, False, time.perf_counter() - started)
+        raise
+    ranking.record(name, not (is_failure is not None and is_failure(result)), time.perf_counter() - started)
+    return result
@@ -0,0 +1,94 @@
+# src/utils/stream_urls.py
+
+import re
+import time
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from .cache_backends import MemoryBackend, TieredCache
+
+# URLs do googlevideo carregam a expiração na query (?expire=...) ou no caminho (/expire/.../)
+_PATH_EXPIRE_PATTERN = re.compile(r'/expire/(\d+)')
+
+# Protocolos baixados com uma única URL; DASH/HLS fragmentados dependem de manifestos e ficam de fora
+DIRECT_PROTOCOLS = ('https', 'http')
+
+# Campos do formato de que o yt-dlp precisa para escolher e baixar sem extrair de novo
+STREAM_FIELDS = ('format_id', 'url', 'protocol', 'ext', 'vcodec', 'acodec', 'height', 'width', 'fps',
+                 'tbr', 'abr', 'asr', 'filesize', 'filesize_approx', 'format_note', 'container',
+                 'http_headers', 'downloader_options')
+
+
+def url_expiry(url: str) -> Optional[float]:
+    """Timestamp de expiração embutido na URL assinada, ou None se ela não informa"""
+    parsed = urlparse(url or '')
+    value = parse_qs(parsed.query).get('expire', [None])[0]
+    if value is None:
+        match = _PATH_EXPIRE_PATTERN.search(parsed.path)
+        value = match.group(1) if match else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def is_forbidden_error(error: Exception) -> bool:
+    """True se o yt-dlp falhou porque o servidor de mídia recusou a URL (HTTP 403)"""
+    message = str(error)
+    return 'HTTP Error 403' in message or '403: Forbidden' in message
+
+
+class StreamURLCache:
+    """
+    URLs de mídia já resolvidas pelo yt-dlp, por (vídeo, formato), com os headers necessários.
+
+    Cada URL vale até o `expire` que o YouTube embute nela, menos `margin` segundos de folga
+    para que um download longo não comece com uma URL prestes a vencer. Com as URLs em cache,
+    um download repetido pula a extração (página, player JS, decifragem da assinatura) e vai
+    direto ao servidor de mídia. Um 403 invalida as URLs do vídeo.
+    """
+
+    def __init__(self, cache: Optional[TieredCache] = None, margin: float = 1800, max_entries: int = 256,
+                 prefix: str = 'stream:'):
+        self.cache = cache or TieredCache(MemoryBackend(max_entries))
+        self.margin = margin
+        self.prefix = prefix
+        self.invalidations = 0
+
+    def store(self, video_id: str, formats: Iterable[Dict[str, Any]]) -> int:
+        """Guarda as URLs diretas do info_dict completo; retorna quantos formatos entraram"""
+        now = time.time()
+        entries = {}
+        for fmt in formats or []:
+            if fmt.get('protocol') not in DIRECT_PROTOCOLS or fmt.get('fragments') or not fmt.get('format_id'):
+                continue
+            expires_at = url_expiry(fmt.get('url'))
+            if expires_at is None or expires_at - self.margin <= now:
+                continue
+            entry = {field: fmt[field] for field in STREAM_FIELDS if fmt.get(field) is not None}
+            entry['expires_at'] = expires_at - self.margin
+            entries[fmt['format_id']] = entry
+        if entries:
+            ttl = max(entry['expires_at'] for entry in entries.values()) - now
+            self.cache.set(self.prefix + video_id, entries, ttl)
+        return len(entries)
+
+    def get(self, video_id: str, format_id: str) -> Optional[Dict[str, Any]]:
+        """Formato com URL ainda válida, ou None"""
+        entry = (self.cache.get(self.prefix + video_id) or {}).get(format_id)
+        return entry if entry is not None and entry['expires_at'] > time.time() else None
+
+    def formats(self, video_id: str) -> List[Dict[str, Any]]:
+        """Todos os formatos do vídeo com URL ainda válida"""
+        entries = self.cache.get(self.prefix + video_id) or {}
+        now = time.time()
+        return [entry for entry in entries.values() if entry['expires_at'] > now]
+
+    def invalidate(self, video_id: str):
+        self.invalidations += 1
+        self.cache.delete(self.prefix + video_id)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self.cache.stats()
+        stats['invalidations'] = self.invalidations
+        return stats
@@ -5,6 +5,7 @@ import random
 import time
 from typing import Dict, Any, Optional
 from .proxy_manager import ProxyManager, UserAgentRotator, RequestThrottler
+from .artifact_policy import ArtifactPolicy
 
 class AntiDetectionYouTubeExtractor:
     """Extrator do YouTube com recursos anti-detecção"""
@@ -134,7 +135,8 @@ class AntiDetectionYouTubeExtractor:
         
         return None
     
-    def get_download_opts(self, format_id: Optional[str] = None, output_dir: str = '/tmp') -> Dict[str, Any]:
+    def get_download_opts(self, format_id: Optional[str] = None, output_dir: str = '/tmp',
+                          artifacts: Optional[ArtifactPolicy] = None) -> Dict[str, Any]:
         """Retorna configurações otimizadas para download"""
         opts = self.get_base_ydl_opts()
         
@@ -147,9 +149,6 @@ class AntiDetectionYouTubeExtractor:
             'concurrent_fragment_downloads': 4,
             'http_chunk_size': 10485760,  # 10MB chunks
             
-            # Preserva metadados
-            'writeinfojson': True,
-            'writethumbnail': True,
             'writesubtitles': False,
             'writeautomaticsub': False,
             
@@ -171,9 +170,13 @@ class AntiDetectionYouTubeExtractor:
         else:
             opts['format'] = 'best[height>=720][ext=mp4]/best[height>=480][ext=mp4]/best'
         
+        # Sidecars (.info.json, thumbnail) e metadados embutidos só quando pedidos
+        (artifacts or ArtifactPolicy()).apply(opts)
+        
         return opts
     
-    def download_with_anti_detection(self, url: str, format_id: Optional[str] = None, output_dir: str = '/tmp') -> str:
+    def download_with_anti_detection(self, url: str, format_id: Optional[str] = None, output_dir: str = '/tmp',
+                                     artifacts: Optional[ArtifactPolicy] = None) -> str:
         """Baixa vídeo com anti-detecção"""
         
         for attempt in range(self.retry_count):
@@ -182,7 +185,7 @@ class AntiDetectionYouTubeExtractor:
                 self.throttler.wait_if_needed()
                 
                 # Configura opções de download
-                opts = self.get_download_opts(format_id, output_dir)
+                opts = self.get_download_opts(format_id, output_dir, artifacts)
                 
                 # Adiciona proxy se necessário
                 if attempt > 0: